@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Micro benchmarks for the hot paths of endpoints
+
+each module in this package can be run directly from the repo's root directory:
+
+    $ python -m benchmarks.router
+
+the benchmarks use testdata (see tests_require in setup.py) to generate controller
+modules so they need the same dependencies as the tests
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import timeit
+import logging
+import gc
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# make sure debug logging doesn't pollute the timings
+logging.getLogger("endpoints").setLevel(logging.WARNING)
+
+
+class Benchmark(object):
+    """Times a callable and prints out a summary line
+
+    :example:
+        b = Benchmark("router", count=10000)
+        b.run("trie", lambda: router.find(req, res))
+        b.run("legacy", lambda: legacy_router.find(req, res))
+        b.compare("legacy", "trie")
+    """
+    def __init__(self, name, count=10000, repeat=3):
+        self.name = name
+        self.count = count
+        self.repeat = repeat
+        self.results = {}
+        self.peaks = {}
+        self.allocs = {}
+
+    def run(self, label, callback, count=0):
+        """run callback count times (best of self.repeat) and print ops/sec
+
+        :param label: string, the name of this run
+        :param callback: callable, will be called with no arguments
+        :param count: int, override the default count
+        :returns: float, the best per call time in seconds
+        """
+        count = count or self.count
+        t = timeit.Timer(callback)
+        best = min(t.repeat(repeat=self.repeat, number=count)) / count
+        self.results[label] = best
+        print("{}.{}: {:.2f} us per call, {:,.0f} calls/sec".format(
+            self.name,
+            label,
+            best * 1000000.0,
+            1.0 / best if best else 0.0
+        ))
+        return best
+
+    def compare(self, slow_label, fast_label):
+        """print how many times faster fast_label was than slow_label"""
+        slow = self.results[slow_label]
+        fast = self.results[fast_label]
+        print("{}: {} is {:.1f}x {}".format(
+            self.name,
+            fast_label,
+            slow / fast if fast else 0.0,
+            slow_label
+        ))
+
+    def memory(self, label, callback):
+        """call callback once and print the peak memory python allocated while it ran
+
+        :param label: string, the name of this run
+        :param callback: callable, will be called with no arguments
+        :returns: int, the peak in bytes
+        """
+        if not tracemalloc:
+            raise RuntimeError("memory benchmarks need tracemalloc (python 3)")
+
+        tracemalloc.start()
+        try:
+            callback()
+            peak = tracemalloc.get_traced_memory()[1]
+
+        finally:
+            tracemalloc.stop()
+
+        self.peaks[label] = peak
+        print("{}.{}: {:,.1f} MB peak memory".format(
+            self.name,
+            label,
+            peak / 1048576.0
+        ))
+        return peak
+
+    def allocations(self, label, callback, count=0):
+        """call callback count times, keeping everything it returns, and print how
+        many bytes and objects each call left allocated
+
+        :param label: string, the name of this run
+        :param callback: callable, will be called with no arguments and whatever
+            it returns is kept alive until the allocations have been measured
+        :param count: int, override the default count
+        :returns: tuple, (bytes, objects) per call
+        """
+        if not tracemalloc:
+            raise RuntimeError("memory benchmarks need tracemalloc (python 3)")
+
+        count = count or self.count
+        callback() # warm up any caches so they aren't counted
+
+        kept = []
+        gc.collect()
+        objects = len(gc.get_objects())
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            for _ in range(count):
+                kept.append(callback())
+            gc.collect()
+            after = tracemalloc.take_snapshot()
+            objects = len(gc.get_objects()) - objects
+
+        finally:
+            tracemalloc.stop()
+
+        stats = after.compare_to(before, "filename")
+        size = sum(stat.size_diff for stat in stats) / count
+        objects = objects / count
+        self.allocs[label] = (size, objects)
+        print("{}.{}: {:,.0f} bytes and {:,.1f} objects per call".format(
+            self.name,
+            label,
+            size,
+            objects
+        ))
+        return size, objects
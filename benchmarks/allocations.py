@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Print how many bytes and objects a request leaves allocated when it goes all
+the way through Call.handle with the WSGI interface, every Call is kept alive
+so its Request and Response are part of the count
+
+    $ python -m benchmarks.allocations
+
+this only uses the public interface so it can be ran against older versions of
+endpoints to compare them
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import io
+
+import testdata
+
+from endpoints.interface.wsgi import Application
+from . import Benchmark
+
+
+def create_environ(path, query=""):
+    return {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": query,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8080",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "CONTENT_LENGTH": "",
+        "CONTENT_TYPE": "",
+        "HTTP_HOST": "localhost:8080",
+        "HTTP_USER_AGENT": "Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/90.0",
+        "HTTP_ACCEPT": "application/json",
+        "HTTP_ACCEPT_ENCODING": "gzip, deflate, br",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+
+
+def main():
+    controller_prefix = testdata.get_module_name()
+    testdata.create_modules({
+        controller_prefix: [
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self, *args, **kwargs):",
+            "        return {'args': list(args), 'kwargs': kwargs}",
+            "",
+        ],
+    })
+
+    app = Application(controller_prefixes=[controller_prefix])
+
+    def handle(path, query=""):
+        def callback():
+            c = app.create_call(create_environ(path, query))
+            c.handle()
+            return c
+        return callback
+
+    b = Benchmark("allocations", count=2000)
+    b.allocations("root", handle("/"))
+    b.allocations("args_kwargs", handle("/foo/bar", "che=1&baz=2"))
+
+
+if __name__ == "__main__":
+    main()
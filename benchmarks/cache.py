@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Compare answering the same GET request over and over through the WSGI interface
+with and without the @cache decorator on a controller method that returns a list
+of a few hundred records, the method and the json encoding are skipped when the
+response is cached, it is ran with and without response compression
+
+    $ python -m benchmarks.cache
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+
+import testdata
+
+from endpoints.interface.wsgi import Application
+from endpoints.decorators import CacheBackend
+from .allocations import create_environ
+from . import Benchmark
+
+
+def main():
+    controller_prefix = testdata.get_module_name()
+    testdata.create_modules({
+        controller_prefix: [
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache",
+            "",
+            "def records(page):",
+            "    return [{",
+            "        'id': i,",
+            "        'username': 'user{}'.format(i),",
+            "        'email': 'user{}@example.com'.format(i),",
+            "        'active': i % 2 == 0,",
+            "    } for i in range(page * 250, (page + 1) * 250)]",
+            "",
+            "class Users(Controller):",
+            "    def GET(self, page=0):",
+            "        return records(int(page))",
+            "",
+            "class Cached(Controller):",
+            "    @cache(60)",
+            "    def GET(self, page=0):",
+            "        return records(int(page))",
+            "",
+        ],
+    })
+
+    app = Application(controller_prefixes=[controller_prefix])
+
+    def handle(path, query):
+        def callback():
+            body = app(create_environ(path, query), lambda *args: None)
+            for chunk in body: pass
+        return callback
+
+    b = Benchmark("hot_endpoint_gzip", count=2000)
+    b.run("uncached", handle("/users", "page=3"))
+    b.run("cached", handle("/cached", "page=3"))
+    b.compare("uncached", "cached")
+
+    # the body is still compressed for every request, so without compression
+    # it is easier to see what the cache saves
+    app.compression_level = 0
+    b = Benchmark("hot_endpoint", count=2000)
+    b.run("uncached", handle("/users", "page=3"))
+    b.run("cached", handle("/cached", "page=3"))
+    b.compare("uncached", "cached")
+
+    print("CacheBackend: {}".format(CacheBackend.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+Compare a burst of 50 identical GET requests handled at the same time by 50
+threads through the WSGI interface with and without the @coalesce decorator on a
+controller method that takes 50ms (like an expensive database query), with
+coalesce only one of the requests calls the method and the others get a copy of
+its response, the number of method calls is printed with the timings
+
+    $ python -m benchmarks.coalesce
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import threading
+import importlib
+
+import testdata
+
+from endpoints.interface.wsgi import Application
+from .allocations import create_environ
+from . import Benchmark
+
+
+def main():
+    controller_prefix = testdata.get_module_name()
+    testdata.create_modules({
+        controller_prefix: [
+            "import time",
+            "from endpoints import Controller",
+            "from endpoints.decorators import coalesce",
+            "",
+            "calls = {'users': 0, 'coalesced': 0}",
+            "",
+            "def records(page):",
+            "    time.sleep(0.05)",
+            "    return [{",
+            "        'id': i,",
+            "        'username': 'user{}'.format(i),",
+            "    } for i in range(page * 250, (page + 1) * 250)]",
+            "",
+            "class Users(Controller):",
+            "    def GET(self, page=0):",
+            "        calls['users'] += 1",
+            "        return records(int(page))",
+            "",
+            "class Coalesced(Controller):",
+            "    @coalesce()",
+            "    def GET(self, page=0):",
+            "        calls['coalesced'] += 1",
+            "        return records(int(page))",
+            "",
+        ],
+    })
+
+    app = Application(controller_prefixes=[controller_prefix])
+    calls = importlib.import_module(controller_prefix).calls
+
+    def burst(path, threads=50):
+        def handle():
+            body = app(create_environ(path, "page=3"), lambda *args: None)
+            for chunk in body: pass
+
+        def callback():
+            ts = [threading.Thread(target=handle) for _ in range(threads)]
+            for t in ts:
+                t.start()
+            for t in ts:
+                t.join()
+        return callback
+
+    b = Benchmark("burst_50", count=5, repeat=3)
+    b.run("uncoalesced", burst("/users"))
+    b.run("coalesced", burst("/coalesced"))
+    b.compare("uncoalesced", "coalesced")
+    print("method calls for 750 requests: {}".format(calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Show the cpu time against bytes saved trade off of gzip compressing a json
+response at every zlib level, both for a 500KB list body and for the same rows
+streamed from a generator, which is flushed after every chunk
+
+    $ python -m benchmarks.compression
+
+set ENDPOINTS_COMPRESSION_LEVEL to the level you want, 0 turns it off
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+
+from endpoints.interface import BaseServer
+from endpoints.http import Response, Request
+from . import Benchmark
+
+
+def rows(count):
+    for i in range(count):
+        yield {
+            "id": i,
+            "username": "user{}".format(i),
+            "email": "user{}@example.com".format(i),
+            "created": "2021-06-{:02}T12:34:56Z".format(i % 28 + 1),
+            "score": i * 1.5,
+            "active": i % 2 == 0,
+            "tags": ["tag{}".format(i % 10), "tag{}".format(i % 7)],
+        }
+
+
+def main():
+    count = 3500
+    body = list(rows(count))
+
+    req = Request()
+    req.set_header("Accept-Encoding", "gzip")
+
+    def create_response(streamed):
+        res = Response()
+        res.encoding = "UTF-8"
+        res.set_header("Content-Type", "application/json;charset=UTF-8")
+        res.body = rows(count) if streamed else body
+        return res
+
+    for streamed in [False, True]:
+        name = "stream" if streamed else "list"
+        b = Benchmark("compress_{}".format(name), count=20, repeat=3)
+        uncompressed = 0
+
+        for level in range(10):
+            server = BaseServer(controller_prefixes=["benchmarks"])
+            server.compression_level = level
+
+            def callback():
+                res = create_response(streamed)
+                server.set_response_compression(req, res)
+                return sum(len(chunk) for chunk in server.create_response_body(res))
+
+            label = "level_{}".format(level)
+            b.run(label, callback)
+            size = callback()
+            if not level:
+                uncompressed = size
+
+            print("{}.{}: {:,} bytes, {:.1f}% of uncompressed, {:.1f} us per KB saved".format(
+                b.name,
+                label,
+                size,
+                100.0 * size / uncompressed,
+                (b.results[label] - b.results["level_0"]) * 1000000.0 / ((uncompressed - size) / 1024.0) if level else 0.0
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Compare encoding and decoding json response bodies from 10KB to 5MB with every
+installed JSONCodec against json.dumps with JSONEncoder like the interfaces used
+to
+
+    $ python -m benchmarks.jsoncodec
+
+orjson and ujson are only compared if they are installed
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import json
+
+from endpoints.utils import JSONCodec, OrjsonCodec, UjsonCodec, JSONEncoder, ByteString
+from . import Benchmark
+
+
+def create_body(size):
+    """create an api list response that is about size bytes of json"""
+    records = []
+    body = {"total": 0, "page": 1, "records": records}
+    i = 0
+    while len(json.dumps(body)) < size:
+        # adding one at a time would take forever for the big bodies
+        for _ in range(max(1, (size - len(json.dumps(body))) // 400)):
+            records.append({
+                "id": i,
+                "username": "user{}".format(i),
+                "email": "user{}@example.com".format(i),
+                "name": "Üser Nümber {}".format(i),
+                "created": "2021-06-{:02}T12:34:56.789012Z".format(i % 28 + 1),
+                "score": i * 1.5,
+                "active": i % 2 == 0,
+                "tags": ["tag{}".format(i % 10), "tag{}".format(i % 7)],
+                "address": {
+                    "street": "{} Main St".format(i),
+                    "city": "Springfield",
+                    "zip": "{:05}".format(i % 100000),
+                },
+                "bio": None,
+            })
+            i += 1
+        body["total"] = i
+    return body
+
+
+def main():
+    codecs = [c for c in [JSONCodec, UjsonCodec, OrjsonCodec] if c.is_available()]
+
+    for size, count in [(10240, 1000), (512000, 20), (5242880, 2)]:
+        body = create_body(size)
+        name = "{}KB".format(size // 1024)
+
+        b = Benchmark("dumps_{}".format(name), count=count)
+        b.run("legacy", lambda: ByteString(json.dumps(body, cls=JSONEncoder), "UTF-8").raw())
+        for codec in codecs:
+            b.run(codec.name, lambda: codec.dumpb(body, "UTF-8"))
+        for codec in codecs:
+            b.compare("legacy", codec.name)
+
+        s = JSONCodec.dumpb(body, "UTF-8")
+        # request bodies were always decoded with json.loads
+        b = Benchmark("loads_{}".format(name), count=count)
+        for codec in codecs:
+            b.run(codec.name, lambda: codec.loads(s))
+        for codec in codecs[1:]:
+            b.compare(JSONCodec.name, codec.name)
+
+
+if __name__ == "__main__":
+    main()
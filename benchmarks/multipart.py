@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Compare parsing a 100MB multipart/form-data upload with the streaming Multipart
+parser against cgi.FieldStorage and reading the file into the body kwargs like
+the WSGI interface used to, both the time and the peak memory are printed
+
+    $ python -m benchmarks.multipart
+
+cgi was removed in python 3.13, so the legacy run needs an older python
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import cgi
+import io
+import os
+import tempfile
+
+from endpoints.interface.wsgi import Application
+from . import Benchmark
+
+
+class LegacyApplication(Application):
+    """create_request_body the way it worked before Multipart, the upload is
+    parsed with cgi.FieldStorage and then read completely into memory"""
+    def create_request_body(self, request, raw_request, **kwargs):
+        body_kwargs = {}
+        body = raw_request['wsgi.input']
+        body_fields = cgi.FieldStorage(
+            fp=body,
+            headers=request.headers,
+            environ=request.environ,
+            keep_blank_values=True
+        )
+
+        for field_name in body_fields.keys():
+            body_field = body_fields[field_name]
+            if body_field.filename:
+                body_kwargs[field_name] = {
+                    "filename": body_field.filename,
+                    "body": body_field.file.read(),
+                    "content_type": body_field.type
+                }
+
+            else:
+                body_kwargs[field_name] = body_field.value
+
+        request.body_args = []
+        request.body_kwargs = body_kwargs
+        request.body = body
+        return request
+
+
+def create_body(size):
+    """write a multipart body with a couple fields and a size byte file to disk
+
+    :returns: tuple (path, content_type)
+    """
+    boundary = "endpointsbenchmarkboundary"
+    fp = tempfile.NamedTemporaryFile(suffix=".multipart", delete=False)
+    with fp:
+        fp.write("\r\n".join([
+            "--{}".format(boundary),
+            'Content-Disposition: form-data; name="foo"',
+            "",
+            "bar",
+            "--{}".format(boundary),
+            'Content-Disposition: form-data; name="file"; filename="upload.bin"',
+            "Content-Type: application/octet-stream",
+            "",
+            "",
+        ]).encode("utf-8"))
+
+        chunk = os.urandom(1048576)
+        for _ in range(size // len(chunk)):
+            fp.write(chunk)
+
+        fp.write("\r\n--{}--\r\n".format(boundary).encode("utf-8"))
+
+    return fp.name, "multipart/form-data; boundary={}".format(boundary)
+
+
+def main():
+    size = 100 * 1048576
+    path, content_type = create_body(size)
+    print("Uploading {:,} byte file".format(size))
+
+    def create_environ():
+        return {
+            "REQUEST_METHOD": "POST",
+            "PATH_INFO": "/upload",
+            "QUERY_STRING": "",
+            "CONTENT_TYPE": content_type,
+            "CONTENT_LENGTH": str(os.path.getsize(path)),
+            "wsgi.input": io.open(path, "rb"),
+            "wsgi.url_scheme": "http",
+        }
+
+    def parse(a):
+        def callback():
+            environ = create_environ()
+            try:
+                r = a.create_request(environ)
+                f = r.body_kwargs["file"]
+                # make sure the whole file made it
+                assert len(f["body"]) == size
+
+            finally:
+                environ["wsgi.input"].close()
+        return callback
+
+    app = Application(controller_prefixes=["benchmarks"])
+    legacy_app = LegacyApplication(controller_prefixes=["benchmarks"])
+
+    try:
+        b = Benchmark("multipart_100MB", count=1, repeat=3)
+        b.run("legacy", parse(legacy_app))
+        b.run("streaming", parse(app))
+        b.compare("legacy", "streaming")
+
+        def stream(a):
+            # the streaming parser's file is only read in chunks like a
+            # controller writing it somewhere else would
+            def callback():
+                environ = create_environ()
+                try:
+                    r = a.create_request(environ)
+                    f = r.body_kwargs["file"]
+                    if hasattr(f, "read"):
+                        while f.read(65536): pass
+
+                finally:
+                    environ["wsgi.input"].close()
+            return callback
+
+        b.memory("legacy", stream(legacy_app))
+        b.memory("streaming", stream(app))
+
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
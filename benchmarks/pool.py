@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Compare a burst of 200 connections to the WSGI Server when it starts a thread for
+every connection and when it uses a pool of 8 worker threads with a queue of 32
+connections, the controller method takes 20ms, how many of the requests were
+answered with 200 and 503 is printed with the timings
+
+    $ python -m benchmarks.pool
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import threading
+import logging
+import time
+
+import testdata
+
+from endpoints.compat.environ import *
+from endpoints.http import Host
+from endpoints.interface.wsgi import Application, Server, WSGIRequestHandler
+from . import Benchmark
+
+if is_py2:
+    from httplib import HTTPConnection
+else:
+    from http.client import HTTPConnection
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+def main():
+    logging.getLogger("endpoints.interface.wsgi").setLevel(logging.ERROR)
+    controller_prefix = testdata.create_module(contents=[
+        "import time",
+        "from endpoints import Controller",
+        "",
+        "class Default(Controller):",
+        "    def GET(self):",
+        "        time.sleep(0.02)",
+        "        return 'hello world'",
+    ])
+
+    def create_server(**kwargs):
+        s = Server(**kwargs)
+        s.application = Application(controller_prefixes=[controller_prefix])
+        s.backend.RequestHandlerClass = QuietRequestHandler
+        t = threading.Thread(target=s.serve_forever)
+        t.daemon = True
+        t.start()
+        return s
+
+    def burst(s, stats, connections=200):
+        hostloc = Host(s.hostloc).client()
+        def request():
+            try:
+                conn = HTTPConnection(hostloc, timeout=30)
+                conn.request("GET", "/")
+                res = conn.getresponse()
+                res.read()
+                conn.close()
+                stats[res.status] = stats.get(res.status, 0) + 1
+
+            except Exception:
+                stats["errors"] = stats.get("errors", 0) + 1
+
+        def callback():
+            ts = [threading.Thread(target=request) for _ in range(connections)]
+            for t in ts:
+                t.start()
+            for t in ts:
+                t.join()
+        return callback
+
+    b = Benchmark("burst_200", count=1, repeat=3)
+    for label, kwargs in [("threaded", {"pool_size": 0}), ("pool", {"pool_size": 8, "queue_size": 32})]:
+        s = create_server(**kwargs)
+        stats = {}
+        b.run(label, burst(s, stats))
+        print("{}: {}".format(label, stats))
+        s.backend.shutdown()
+        s.backend.server_close()
+
+    b.compare("threaded", "pool")
+
+
+if __name__ == "__main__":
+    main()
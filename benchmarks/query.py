@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Compare parsing a search endpoint's 50 field query string with QueryString
+against building a whole Url just to get its query_kwargs like Request used to
+
+    $ python -m benchmarks.query
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+
+from endpoints.http import Url, Request
+from . import Benchmark
+
+
+class LegacyRequest(Request):
+    """parses the query the way it was parsed before QueryString"""
+    def _parse_query_str(self, query):
+        u = Url(query=query)
+        return u.query_kwargs
+
+
+def create_query(count):
+    fields = []
+    for i in range(count):
+        fields.append("field{}=value+{}%21".format(i, i))
+        if i % 10 == 0:
+            # some fields have more than one value
+            fields.append("field{}=other".format(i))
+    return "&".join(fields)
+
+
+def main():
+    query = create_query(50)
+
+    def parse(request_class):
+        def callback():
+            r = request_class()
+            r.query = query
+            return r.query_kwargs
+        return callback
+
+    assert parse(Request)() == parse(LegacyRequest)()
+
+    b = Benchmark("query_kwargs_50", count=10000)
+    b.run("legacy", parse(LegacyRequest))
+    b.run("querystring", parse(Request))
+    b.compare("legacy", "querystring")
+
+
+if __name__ == "__main__":
+    main()
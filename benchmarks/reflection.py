@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Compare reflecting all the controllers (decorators, params and method
+descriptions) using the process wide ReflectSource cache against parsing the
+class source every time like reflection used to
+
+    $ python -m benchmarks.reflection
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import ast
+import inspect
+import collections
+
+import testdata
+
+from endpoints.reflection import Reflect, ReflectController, ReflectSource
+from . import Benchmark
+
+
+class LegacySource(ReflectSource):
+    """parses the class's source with inspect.getsource() on every call, which
+    is what ReflectClass.get_info() and ReflectMethod.desc used to do"""
+    @classmethod
+    def find_class(cls, klass):
+        instance = cls.__new__(cls)
+        instance.classes = {}
+        instance.class_names = collections.defaultdict(list)
+        instance.visit(ast.parse(inspect.getsource(klass).strip()), [])
+        return instance.class_names[klass.__name__][0]
+
+
+class LegacyReflectController(ReflectController):
+    source_class = LegacySource
+
+
+class LegacyReflect(Reflect):
+    controller_class = LegacyReflectController
+
+
+def create_controllers(count=300):
+    controller_prefix = testdata.get_module_name()
+    modules = {
+        controller_prefix: [
+            "from endpoints import Controller",
+            "from endpoints.decorators import param",
+            "",
+            "class BaseController(Controller):",
+            "    '''the base controller'''",
+            "    @param('page', type=int, default=1)",
+            "    def GET(self, *args, **kwargs):",
+            "        '''list everything'''",
+            "        pass",
+            "",
+        ]
+    }
+    for i in range(count):
+        modules["{}.c{}".format(controller_prefix, i)] = [
+            "from endpoints.decorators import param, version",
+            "from {} import BaseController".format(controller_prefix),
+            "",
+            "class Default(BaseController):",
+            "    '''controller {}'''".format(i),
+            "    @param('foo', type=int, choices=(1, 2))",
+            "    @param('bar', default='che')",
+            "    def POST(self, foo, bar, **kwargs):",
+            "        '''create something'''",
+            "        pass",
+            "",
+            "    @version('v1')",
+            "    def PUT_v1(self, pk, **kwargs):",
+            "        '''update something'''",
+            "        pass",
+            "",
+            "    @version('v2')",
+            "    def PUT_v2(self, pk, **kwargs):",
+            "        super(Default, self).PUT_v1(pk, **kwargs)",
+            "",
+        ]
+
+    testdata.create_modules(modules)
+    return controller_prefix
+
+
+def reflect(r):
+    """do what something generating api docs would do"""
+    def callback():
+        for rc in r.controllers:
+            for http_method, methods in rc.methods.items():
+                for rm in methods:
+                    rm.desc
+                    rm.params
+    return callback
+
+
+def main():
+    controller_prefix = create_controllers()
+    r = Reflect([controller_prefix])
+    r.manifest = None
+    legacy_r = LegacyReflect([controller_prefix])
+    legacy_r.manifest = None
+
+    # import all the modules so that isn't timed
+    print("Reflecting {} controllers".format(len(list(r.controllers))))
+
+    b = Benchmark("Reflect.controllers", count=1, repeat=5)
+    b.run("legacy", reflect(legacy_r))
+    b.run("cached", reflect(r))
+    b.compare("legacy", "cached")
+
+
+if __name__ == "__main__":
+    main()
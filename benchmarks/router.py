@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Compare Router.find using the compiled route trie against the old per request
+module probing
+
+    $ python -m benchmarks.router
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import random
+import itertools
+
+import testdata
+
+from endpoints.call import Router
+from endpoints.http import Request, Response
+from endpoints.reflection import ReflectModule
+from . import Benchmark
+
+
+class LegacyRouter(Router):
+    """Router.find the way it worked before the route trie, every request walks
+    the module names, imports the module and reflects the class"""
+    def find(self, req, res):
+        ret = {}
+        controller_path = []
+
+        module_name, module_path, controller_method_args = self.get_module_name(list(req.path_args))
+        controller_module = ReflectModule(module_name).module
+
+        controller_class = None
+        if controller_method_args:
+            controller_class = self.get_class(controller_module, controller_method_args[0])
+
+        if controller_class:
+            controller_path.append(controller_method_args.pop(0))
+        else:
+            controller_class = self.get_class(controller_module, self.default_class_name)
+
+        ret['module'] = controller_module
+        ret['module_name'] = module_name
+        ret['module_path'] = "/".join(module_path)
+        ret['class'] = controller_class
+        ret['class_name'] = controller_class.__name__
+        ret['class_instance'] = self.get_class_instance(req, res, controller_class)
+        ret['class_path'] = "/".join(controller_path)
+        controller_method_args.extend(req.body_args)
+        ret['method_args'] = controller_method_args
+        ret['method_kwargs'] = req.kwargs
+        req.controller_info = ret
+        return ret
+
+    def get_module_name(self, path_args):
+        """the module probing Router used before the route trie"""
+        module_name = ""
+        module_path = []
+
+        # using the path_args we are going to try and find the best module path
+        # for the request
+        if path_args:
+            cset = self.module_names
+            for controller_prefix in self.controller_prefixes:
+                mod_name = controller_prefix + "." + path_args[0]
+                if mod_name in cset:
+                    module_name = mod_name
+                    module_path.append(path_args.pop(0))
+
+                    while path_args:
+                        mod_name += "." + path_args[0]
+                        if mod_name in cset:
+                            module_name = mod_name
+                            module_path.append(path_args.pop(0))
+                        else:
+                            break
+
+                    break
+
+        if not module_name:
+            # we didn't find the correct module using module paths, so now let's
+            # try class paths, first found class path wins
+            default_module_name = ""
+
+            for controller_prefix in self.controller_prefixes:
+                controller_module = ReflectModule(controller_prefix).module
+                if path_args:
+                    controller_class = self.get_class(controller_module, path_args[0])
+                    if controller_class:
+                        module_name = controller_prefix
+                        break
+
+                if not default_module_name:
+                    # look for the default class just in case
+                    controller_class = self.get_class(controller_module, self.default_class_name)
+                    if controller_class:
+                        default_module_name = controller_prefix
+
+            if not module_name:
+                if default_module_name:
+                    module_name = default_module_name
+
+                else:
+                    raise TypeError(
+                        "Could not find a valid module with path {} and controller_prefixes {}".format(
+                            "/".join(path_args),
+                            self.controller_prefixes
+                        )
+                    )
+                    #module_name = self.controller_prefixes[0]
+
+        return module_name, module_path, path_args
+
+
+def create_controllers(package_count=25, module_count=20):
+    """create package_count * module_count controller modules
+
+    :returns: tuple, (controller_prefix, paths) where paths is a list of request
+        paths that will hit the created controllers
+    """
+    controller_prefix = testdata.get_module_name()
+    contents = [
+        "from endpoints import Controller",
+        "class Default(Controller):",
+        "    def GET(self, *args, **kwargs): pass",
+        "",
+        "class Bar(Controller):",
+        "    def GET(self, *args, **kwargs): pass",
+        "",
+    ]
+
+    modules = {controller_prefix: contents}
+    paths = ["/", "/bar/1"]
+    for i in range(package_count):
+        package_name = "p{}".format(i)
+        modules["{}.{}".format(controller_prefix, package_name)] = contents
+        for j in range(module_count):
+            module_name = "m{}".format(j)
+            modules["{}.{}.{}".format(controller_prefix, package_name, module_name)] = contents
+            paths.append("/{}/{}".format(package_name, module_name))
+            paths.append("/{}/{}/bar/che".format(package_name, module_name))
+
+    testdata.create_modules(modules)
+    return controller_prefix, paths
+
+
+def main():
+    controller_prefix, paths = create_controllers()
+    print("Created {} controller modules".format(len(paths) // 2))
+
+    reqs = []
+    for path in paths:
+        req = Request()
+        req.method = "GET"
+        req.path = path
+        reqs.append(req)
+    random.shuffle(reqs)
+
+    router = Router([controller_prefix])
+    legacy_router = LegacyRouter([controller_prefix])
+
+    # warm up both routers so module scanning and importing aren't timed
+    for req in reqs:
+        assert router.find(req, Response())["module_name"] == legacy_router.find(req, Response())["module_name"]
+
+    def find(r):
+        it = itertools.cycle(reqs)
+        res = Response()
+        return lambda: r.find(next(it), res)
+
+    b = Benchmark("Router.find", count=len(reqs) * 5)
+    b.run("legacy", find(legacy_router))
+    b.run("trie", find(router))
+    b.compare("legacy", "trie")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Compare downloading a 100MB file from the WSGI server, sent with os.sendfile
+through wsgi.file_wrapper, against reading it through python in 8KB chunks that
+are each wrapped in a ByteString like create_response_body used to
+
+    $ python -m benchmarks.sendfile
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import os
+import socket
+import tempfile
+import threading
+
+from endpoints.interface.wsgi import Application, WSGIHTTPServer, WSGIRequestHandler
+from endpoints.http import Response
+from endpoints.utils import ByteString
+from . import Benchmark
+
+
+class FileApplication(Application):
+    """serves the same file for every request without any routing"""
+    path = ""
+
+    def create_call(self, raw_request, **kwargs):
+        app = self
+        class Call(object):
+            def handle(self):
+                res = Response()
+                res.body = open(app.path, "rb")
+                res.set_range(raw_request.get("HTTP_RANGE", ""))
+                return res
+        return Call()
+
+
+class LegacyApplication(FileApplication):
+    """reads the file the way create_response_body used to"""
+    def handle_http_response(self, environ, start_response):
+        res = self.create_call(environ).handle()
+        start_response("{} {}".format(res.code, res.status), list(res.headers.items()))
+        return self.create_response_body(res)
+
+    def create_response_body(self, response, **kwargs):
+        body = response.body
+        while True:
+            chunk = body.read(8192)
+            if not chunk: break
+            yield ByteString(chunk, response.encoding).raw()
+        body.close()
+
+
+def start_server(application_class, path):
+    application_class.path = path
+    s = WSGIHTTPServer(("127.0.0.1", 0), WSGIRequestHandler)
+    s.set_app(application_class(controller_prefixes=["benchmarks"]))
+    # don't print a log line for every download
+    s.RequestHandlerClass.log_message = lambda *args, **kwargs: None
+    t = threading.Thread(target=s.serve_forever)
+    t.daemon = True
+    t.start()
+    return s
+
+
+def download(server, headers=""):
+    """read the whole response off a raw socket so the client isn't the bottleneck"""
+    def callback():
+        sock = socket.create_connection(server.server_address)
+        try:
+            sock.sendall("GET / HTTP/1.0\r\n{}\r\n".format(headers).encode("ascii"))
+            buf = bytearray(1048576)
+            while sock.recv_into(buf): pass
+
+        finally:
+            sock.close()
+    return callback
+
+
+def main():
+    size = 100 * 1048576
+    fp = tempfile.NamedTemporaryFile(suffix=".bin", delete=False)
+    with fp:
+        chunk = os.urandom(1048576)
+        for _ in range(size // len(chunk)):
+            fp.write(chunk)
+
+    try:
+        legacy_server = start_server(LegacyApplication, fp.name)
+        server = start_server(FileApplication, fp.name)
+
+        b = Benchmark("download_100MB", count=5, repeat=3)
+        b.run("legacy", download(legacy_server))
+        b.run("sendfile", download(server))
+        b.compare("legacy", "sendfile")
+
+        headers = "Range: bytes={}-\r\n".format(size // 2)
+        b = Benchmark("range_50MB", count=5, repeat=3)
+        b.run("legacy", download(legacy_server, headers))
+        b.run("sendfile", download(server, headers))
+        b.compare("legacy", "sendfile")
+
+        legacy_server.shutdown()
+        server.shutdown()
+
+    finally:
+        os.unlink(fp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Compare sending a generator response body of a million rows as a streamed json
+array against turning the generator into a list and encoding the whole body
+before the first byte is sent like the interfaces used to, the time to the
+first chunk, the total time, and the peak memory are printed
+
+    $ python -m benchmarks.stream
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import json
+
+from endpoints.interface import BaseServer
+from endpoints.http import Response
+from endpoints.utils import JSONEncoder, ByteString
+from . import Benchmark
+
+
+class LegacyServer(BaseServer):
+    """encodes the generator into one string like create_response_body used to"""
+    def create_response_body(self, response, json_encoder=JSONEncoder, **kwargs):
+        body = json.dumps(response.body, cls=json_encoder)
+        yield ByteString(body, response.encoding).raw()
+
+
+def create_response(count):
+    def rows():
+        for i in range(count):
+            yield {
+                "id": i,
+                "username": "user{}".format(i),
+                "email": "user{}@example.com".format(i),
+                "created": "2021-06-{:02}T12:34:56Z".format(i % 28 + 1),
+                "active": i % 2 == 0,
+            }
+
+    res = Response()
+    res.encoding = "UTF-8"
+    res.set_header("Content-Type", "application/json;charset=UTF-8")
+    res.body = rows()
+    return res
+
+
+def main():
+    count = 1000000
+    server = BaseServer(controller_prefixes=["benchmarks"])
+    legacy_server = LegacyServer(controller_prefixes=["benchmarks"])
+
+    def first(s, count):
+        def callback():
+            next(iter(s.create_response_body(create_response(count))))
+        return callback
+
+    def send(s, count):
+        def callback():
+            for chunk in s.create_response_body(create_response(count)):
+                pass
+        return callback
+
+    b = Benchmark("first_chunk", count=1, repeat=3)
+    b.run("legacy", first(legacy_server, count))
+    b.run("streaming", first(server, count))
+    b.compare("legacy", "streaming")
+
+    b = Benchmark("whole_body", count=1, repeat=3)
+    b.run("legacy", send(legacy_server, count))
+    b.run("streaming", send(server, count))
+    b.compare("legacy", "streaming")
+
+    b.memory("legacy", send(legacy_server, count))
+    b.memory("streaming", send(server, count))
+
+
+if __name__ == "__main__":
+    main()
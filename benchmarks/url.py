@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Compare Request.url and the Url link building helpers (controller, base, host,
+add) against the way they worked before Url kept its parsed parts, when every
+derived Url parsed the root url string again and Request.url built a new Url
+on every access, and compare building links with Url.controller() against
+Request.url_for()
+
+    $ python -m benchmarks.url
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+
+from endpoints.http import Url, Request
+from endpoints.call import Controller
+from endpoints.utils import String
+from . import Benchmark
+
+
+class LegacyUrl(Url):
+    """builds every derived Url from the string like Url used to"""
+    def create_root(self, **kwargs):
+        return self.create(self.root, **kwargs)
+
+    def add(self, **kwargs):
+        if "path" in kwargs:
+            path = kwargs["path"]
+            if not path[0].startswith("/"):
+                paths = self.normalize_paths(self.path, path)
+            else:
+                paths = self.normalize_paths(path)
+            kwargs["path"] = "/".join(paths)
+        return self.create(String(self), **kwargs)
+
+
+class LegacyRequest(Request):
+    """builds a new Url every time .url is accessed"""
+    @property
+    def url(self):
+        host = self.host
+        port = self.port
+        host_domain, host_port = Url.split_hostname_from_port(host)
+        if host_port:
+            port = host_port
+
+        return LegacyUrl(
+            scheme=self.scheme,
+            hostname=host,
+            path=self.path,
+            query=self.query,
+            port=port,
+            class_path=self.controller_info.get("class_path", ""),
+            module_path=self.controller_info.get("module_path", "")
+        )
+
+
+class Users(Controller):
+    pass
+
+
+class FakeRouter(object):
+    """stands in for the Router so the benchmark doesn't need controller modules"""
+    def get_url_path(self, controller_class):
+        return "/users"
+
+
+def create_request(request_class):
+    r = request_class()
+    r.set_header("Host", "api.example.com:8080")
+    r.environ["wsgi.url_scheme"] = "https"
+    r.environ["SERVER_PORT"] = "8080"
+    r.method = "GET"
+    r.path = "/users/1234/posts"
+    r.query = "page=2&per_page=50&sort=-created"
+    r.controller_info = {
+        "class_path": "users",
+        "module_path": "",
+        "router": FakeRouter(),
+    }
+    return r
+
+
+def main():
+    req = create_request(Request)
+    legacy_req = create_request(LegacyRequest)
+
+    b = Benchmark("Request.url", count=10000)
+    b.run("legacy", lambda: legacy_req.url)
+    b.run("cached", lambda: req.url)
+    b.compare("legacy", "cached")
+
+    def links(r):
+        """what a controller building a paginated response would do"""
+        def callback():
+            u = r.url
+            u.controller("1234", "posts", page=3)
+            u.base(page=1)
+            u.host("static", "logo.png")
+            u.add(query_kwargs={"page": 3})
+        return callback
+
+    b = Benchmark("Url_links", count=10000)
+    b.run("legacy", links(legacy_req))
+    b.run("slotted", links(req))
+    b.compare("legacy", "slotted")
+
+    b = Benchmark("url_for", count=10000)
+    b.run("controller", lambda: req.url.controller("1234", "posts", page=3))
+    b.run("url_for", lambda: req.url_for(Users, "1234", "posts", page=3))
+    b.compare("controller", "url_for")
+
+
+if __name__ == "__main__":
+    main()
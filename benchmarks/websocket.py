@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Compare creating the Call for a websocket message with child requests and a
+per connection route cache against deep copying the connection's request and
+routing every message again like the websocket servers used to
+
+    $ python -m benchmarks.websocket
+"""
+from __future__ import unicode_literals, division, print_function, absolute_import
+import json
+
+import testdata
+
+from endpoints.interface import BaseWebsocketServer
+from endpoints.interface.wsgi import Application
+from . import Benchmark
+
+
+class LegacyWebsocketServer(BaseWebsocketServer):
+    """copies the request and routes every message"""
+    def create_websocket_request(self, request, raw_request=None):
+        ws_req = request.copy()
+        ws_req.controller_info = None
+        ws_req.parent = request
+        ws_req.raw_request = raw_request
+
+        if raw_request:
+            kwargs = self.payload_class.loads(raw_request)
+            kwargs.setdefault("body", {})
+            kwargs.setdefault("path", request.path)
+
+            ws_req.environ["REQUEST_METHOD"] = kwargs["method"]
+            ws_req.method = kwargs["method"]
+
+            ws_req.environ["PATH_INFO"] = kwargs["path"]
+            ws_req.path = kwargs["path"]
+
+            ws_req.environ.pop("wsgi.input", None)
+
+            ws_req.body = kwargs["body"]
+            ws_req.body_kwargs = kwargs["body"]
+
+            ws_req.uuid = kwargs.get("uuid", request.uuid)
+
+        return ws_req
+
+    def create_websocket_call(self, request, raw_request=None):
+        req = self.create_websocket_request(request, raw_request)
+        return self.create_call(raw_request, request=req)
+
+
+def create_environ():
+    """a websocket connection environ like a uwsgi server would create"""
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/",
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "8080",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.url_scheme": "http",
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "HTTP_HOST": "localhost:8080",
+        "HTTP_UPGRADE": "websocket",
+        "HTTP_CONNECTION": "Upgrade",
+        "HTTP_SEC_WEBSOCKET_KEY": "dGhlIHNhbXBsZSBub25jZQ==",
+        "HTTP_SEC_WEBSOCKET_VERSION": "13",
+        "HTTP_USER_AGENT": "Mozilla/5.0 (X11; Linux x86_64) Gecko/20100101 Firefox/90.0",
+        "HTTP_ACCEPT": "*/*",
+        "HTTP_ACCEPT_LANGUAGE": "en-US,en;q=0.5",
+        "HTTP_ACCEPT_ENCODING": "gzip, deflate, br",
+        "HTTP_COOKIE": "session=abcdefghijklmnopqrstuvwxyz0123456789",
+    }
+    for i in range(20):
+        environ["uwsgi.var{}".format(i)] = "value {}".format(i)
+    return environ
+
+
+def main():
+    controller_prefix = testdata.get_module_name()
+    testdata.create_modules({
+        "{}.foo".format(controller_prefix): [
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self, *args, **kwargs): pass",
+            "",
+        ],
+    })
+
+    app = Application(controller_prefixes=[controller_prefix])
+    request = app.create_request(create_environ())
+    request.headers.keys() # the connection headers have been looked at by now
+    request.uuid = None
+
+    raw_request = json.dumps({"method": "GET", "path": "/foo/1", "body": {"bar": 1}})
+
+    def message(server_class):
+        s = server_class(controller_prefixes=[controller_prefix])
+        def callback():
+            c = s.create_websocket_call(request, raw_request)
+            c.create_controller()
+        return callback
+
+    b = Benchmark("websocket_message", count=5000)
+    b.run("legacy", message(LegacyWebsocketServer))
+    b.run("child", message(BaseWebsocketServer))
+    b.compare("legacy", "child")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from endpoints import __version__
 #from endpoints.interface.wsgi import Server
 from endpoints import environ
 from endpoints.reflection import ReflectModule
+from endpoints.manifest import Manifest
 
 
 class Console(object):
@@ -45,6 +46,13 @@ class Console(object):
 
         self.environ.set_host(args.host)
         self.environ.set_controller_prefixes(args.prefix)
+        self.environ.set_manifest(os.path.join(args.directory, args.manifest))
+
+        if args.command:
+            if args.command == ["manifest", "build"]:
+                return self.build_manifest(args)
+
+            self.parser.error("unknown command {}".format(" ".join(args.command)))
 
         config = {}
         if args.file:
@@ -57,7 +65,12 @@ class Console(object):
     #         h = "wsgiserver_config_{}".format(uuid.uuid4())
     #         config_module = imp.load_source(h, args.config_script)
 
-        s = args.server()
+        s = args.server(
+            preload=args.preload,
+            warmup=args.warmup,
+            pool_size=args.pool_size,
+            queue_size=args.queue_size,
+        )
         self.environ.set_host(s.hostloc)
 
         if "application" in config:
@@ -77,6 +90,22 @@ class Console(object):
 
         return ret_code
 
+    def build_manifest(self, args):
+        """Scan and reflect all the controllers and save them to the manifest so
+        servers can skip doing that on startup
+
+        :returns: integer, the exit code
+        """
+        logger = self.get_logger()
+        m = Manifest(self.environ.MANIFEST, args.prefix).build()
+        m.save()
+        logger.info("Saved {} modules and {} controllers to manifest {}".format(
+            sum(len(module_names) for module_names in m.data["prefixes"].values()),
+            len(m.data["classes"]),
+            m.path
+        ))
+        return 0
+
     def get_logger(self):
         return logging.getLogger(__name__)
 
@@ -139,6 +168,43 @@ class Console(object):
             default=self.get_default_directory(),
             help='directory to run the server in, usually contains the prefix module path',
         )
+        parser.add_argument(
+            '--preload',
+            action='store_true',
+            dest='preload',
+            help='Import all the controllers and compile the routes before the server starts listening',
+        )
+        parser.add_argument(
+            '--warmup',
+            action="append",
+            default=None,
+            help='A request path (eg, /foo or "POST /foo/bar") to handle after --preload and before the server starts listening, pass it more than once for more paths',
+        )
+        parser.add_argument(
+            '--pool-size',
+            dest="pool_size",
+            type=int,
+            default=self.environ.WSGI_POOL_SIZE,
+            help='How many worker threads handle requests, 0 starts a thread for every connection (WSGI server only)',
+        )
+        parser.add_argument(
+            '--queue-size',
+            dest="queue_size",
+            type=int,
+            default=self.environ.WSGI_QUEUE_SIZE,
+            help='How many connections can wait for a worker before new ones get a 503 response, 0 is no limit (WSGI server only)',
+        )
+        parser.add_argument(
+            '--manifest', "-M",
+            default=self.get_default_manifest(),
+            help='The controller manifest, it is used on startup if it is fresh and written by `manifest build`',
+        )
+        parser.add_argument(
+            'command',
+            nargs="*",
+            default=[],
+            help='Leave empty to start the server, or "manifest build" to save the controller manifest',
+        )
         parser.add_argument(
             '--server', '-s',
             dest="server",
@@ -149,6 +215,9 @@ class Console(object):
 
         return parser
 
+    def get_default_manifest(self):
+        return self.environ.MANIFEST or "endpoints.manifest.json"
+
     def get_default_server(self):
         return "endpoints.interface.wsgi.Server"
 
@@ -11,13 +11,16 @@ import types
 import traceback
 import inspect
 import pkgutil
+import re
+import weakref
 
 from .utils import AcceptHeader
 from .http import Response, Request
 from .exception import CallError, Redirect, CallStop, AccessDenied, RouteError, VersionError
-from .decorators import _property
+from .decorators import _property, version
 from .compat.environ import *
 from .reflection import ReflectModule
+from .manifest import Manifest
 
 
 logger = logging.getLogger(__name__)
@@ -103,8 +106,11 @@ class Call(object):
             # tries to find a handle_HTTP_METHOD method, if it can't find that it
             # will default to the handle method (which is implemented on Controller).
             # method arguments are passed in so child classes can add decorators
-            # just like the HTTP_METHOD that will actually handle the request
-            controller_args, controller_kwargs = con.find_method_params()
+            # just like the HTTP_METHOD that will actually handle the request, only
+            # the path args and query kwargs are passed in so those decorators can
+            # reject the request before its body is read
+            controller_args = req.controller_info["method_args"]
+            controller_kwargs = req.controller_info["method_kwargs"]
             controller_method = getattr(con, "handle_{}".format(req.method), None)
             if not controller_method:
                 controller_method = getattr(con, "handle")
@@ -120,8 +126,12 @@ class Call(object):
             self.handle_error(e) # this will manipulate self.response
 
         finally:
-            if res.code == 204:
+            if res.code == 204 or res.code == 304:
+                # neither of these can have a body
                 res.headers.pop('Content-Type', None)
+                res.headers.pop('Content-Length', None)
+                if res.is_file():
+                    res.body.close()
                 res.body = None # just to be sure since body could've been ""
 
             if con:
@@ -209,6 +219,78 @@ class Call(object):
             error_method(e, **kwargs)
 
 
+class RouteNode(object):
+    """A node in the Router's route trie, each node corresponds to a module under
+    one of the controller prefixes
+
+    the trie is built once and then only read from, so finding a controller is
+    just walking the path segments down through .children
+
+    :example:
+        # controller_prefix "foo" with modules foo.bar and foo.bar.che
+        root.children["bar"].children["che"].module_name # "foo.bar.che"
+    """
+    def __init__(self, module_name, module_path=None):
+        """
+        :param module_name: string, the full module path (eg, foo.bar.che)
+        :param module_path: list, the path segments that were consumed to get to
+            this node from the controller prefix (eg, ["bar", "che"])
+        """
+        self.module_name = module_name
+        self.module_path = list(module_path or [])
+        self.children = {}
+        self.module = None
+        self.classes = {}
+        self.load_time = 0.0
+
+    def load(self, router):
+        """import the module and find all the Controller classes, this is safe to
+        call more than once and will raise whatever error importing the module
+        raises so the caller can decide what to do with it
+
+        :param router: Router, used to validate the found classes
+        """
+        if self.module is None:
+            start = time.time()
+            module = ReflectModule(self.module_name).module
+            classes = {}
+            for class_name, class_object in vars(module).items():
+                if router.is_class(class_object):
+                    classes[class_name] = class_object
+            self.classes = classes
+            self.module = module
+            self.load_time = time.time() - start
+
+        return self
+
+    def get_class(self, class_name):
+        """return the controller class matching class_name, this uses the same
+        name normalization as Router.get_class
+
+        :param class_name: string, usually a path segment (eg, "bar" for class Bar)
+        :returns: type, the Controller child class or None
+        """
+        return self.classes.get(class_name.capitalize(), None)
+
+    def get_class_bit(self, class_name):
+        """the reverse of .get_class(), return the path segment that routes to
+        class_name
+
+        :param class_name: string, the name of a class in .classes
+        :returns: string, the path segment or None if no segment routes to the class
+            (eg, FooBar or _Foo can never be found by .get_class())
+        """
+        bit = class_name.lower()
+        return bit if bit.capitalize() == class_name else None
+
+    def __iter__(self):
+        """iterate this node and all the nodes beneath it"""
+        yield self
+        for bit in sorted(self.children):
+            for node in self.children[bit]:
+                yield node
+
+
 class Router(object):
     """
     Where all the routing magic happens, this takes an incoming URI and gathers
@@ -220,11 +302,28 @@ class Router(object):
     POST /foo/bar -> controller_prefix.foo.Bar.post
     GET /foo/bar/che -> controller_prefix.foo.Bar.get(che)
     POST /foo/bar/che?baz=foo -> controller_prefix.foo.Bar.post(che, baz=foo)
+
+    All the modules under the controller prefixes are compiled into a trie of
+    RouteNode instances the first time they are needed, after that finding the
+    controller for a request is just walking the path segments through the trie
     """
     default_class_name = "Default"
 
+    node_class = RouteNode
+
     _module_name_cache = {}
 
+    _routes_cache = {}
+
+    _url_paths_cache = {}
+
+    route_cache = None
+    """set this to a dict and the routes this router finds will be remembered by
+    path, this is handy for routers that live as long as a websocket connection"""
+
+    route_cache_size = 256
+    """the most paths route_cache will hold"""
+
     @property
     def module_names(self):
         """get all the modules in the controller_prefixes
@@ -240,9 +339,18 @@ class Router(object):
                 ret.update(_module_name_cache[controller_prefix])
 
             else:
-                logger.debug("Populating module cache for controller_prefix {}".format(controller_prefix))
-                rm = ReflectModule(controller_prefix)
-                module_names = rm.module_names
+                manifest = self.manifest
+                module_names = manifest.get_module_names(controller_prefix) if manifest else None
+                if module_names is None:
+                    logger.debug("Populating module cache for controller_prefix {}".format(controller_prefix))
+                    rm = ReflectModule(controller_prefix)
+                    module_names = rm.module_names
+
+                else:
+                    logger.debug("Populating module cache for controller_prefix {} from manifest {}".format(
+                        controller_prefix,
+                        manifest.path
+                    ))
 
                 #_module_name_cache.setdefault(controller_prefix, {})
                 type(self)._module_name_cache[controller_prefix] = module_names
@@ -250,34 +358,238 @@ class Router(object):
 
         return ret
 
+    @_property
+    def manifest(self):
+        """the fresh manifest (see ENDPOINTS_MANIFEST) or None if the controller
+        modules should be found by scanning the controller prefixes"""
+        return Manifest.find()
+
+    @property
+    def routes(self):
+        """the compiled route trie for all the controller_prefixes
+
+        this is cached at the class level, so all Router instances with the same
+        controller prefixes share the same routes
+
+        :returns: list, the root RouteNode of each controller prefix in the
+            order of controller_prefixes
+        """
+        key = tuple(self.controller_prefixes)
+        _routes_cache = type(self)._routes_cache
+        routes = _routes_cache.get(key, None)
+        if routes is None:
+            routes = self.create_routes()
+            _routes_cache[key] = routes
+        return routes
+
+    @property
+    def url_paths(self):
+        """the url path of every controller class in the routes, this is the reverse
+        of the route trie and is used to build links without routing anything
+
+        this is cached at the class level just like .routes
+
+        :returns: dict, {controller_class: path} where path is "" for the default
+            controller of a controller prefix and something like /foo/bar otherwise
+        """
+        key = tuple(self.controller_prefixes)
+        _url_paths_cache = type(self)._url_paths_cache
+        url_paths = _url_paths_cache.get(key, None)
+        if url_paths is None:
+            url_paths = self.create_url_paths()
+            _url_paths_cache[key] = url_paths
+        return url_paths
+
     def __init__(self, controller_prefixes):
         if not controller_prefixes:
             raise ValueError("controller_prefixes is empty")
 
         self.controller_prefixes = controller_prefixes
 
-    def find(self, req, res):
-        ret = {}
-        controller_path = []
+    def create_routes(self):
+        """Build the route trie for all the modules in the controller_prefixes
+
+        every module is imported here so it doesn't have to happen while handling
+        a request, if a module fails to import then its node is still added and
+        the import will be tried again (raising the error) when a request is
+        actually routed to it
+
+        :returns: list, see .routes
+        """
+        routes = []
+        module_names = self.module_names
+        for controller_prefix in self.controller_prefixes:
+            logger.debug("Compiling routes for controller_prefix {}".format(controller_prefix))
+            root = self.node_class(controller_prefix)
+            nodes = [root]
+
+            prefix = controller_prefix + "."
+            for module_name in sorted(module_names):
+                if not module_name.startswith(prefix): continue
+
+                node = root
+                for bit in module_name[len(prefix):].split("."):
+                    if bit not in node.children:
+                        node.children[bit] = self.node_class(
+                            "{}.{}".format(node.module_name, bit),
+                            node.module_path + [bit]
+                        )
+                        nodes.append(node.children[bit])
+                    node = node.children[bit]
+
+            for node in nodes:
+                try:
+                    node.load(self)
+                except Exception as e:
+                    logger.warning("Could not load routes for module {}: {}".format(
+                        node.module_name,
+                        e
+                    ))
+
+            routes.append(root)
+
+        return routes
+
+    def create_url_paths(self):
+        """Build the url paths for all the controller classes in the routes
+
+        a controller module will also have any controller classes it imported, so
+        a class's path comes from the module it was defined in if that module is
+        in the routes, otherwise the first module it was found in. Classes with
+        names no path segment can route to (eg, FooBar) don't get a path
+
+        :returns: dict, see .url_paths
+        """
+        url_paths = {}
+        defined = set()
+        for root in self.routes:
+            for node in root:
+                for class_name, controller_class in node.classes.items():
+                    if controller_class in defined: continue
+
+                    bits = list(node.module_path)
+                    if class_name != self.default_class_name:
+                        bit = node.get_class_bit(class_name)
+                        if not bit: continue
+                        bits.append(bit)
+                    path = "/" + "/".join(bits) if bits else ""
+
+                    if controller_class.__module__ == node.module_name:
+                        url_paths[controller_class] = path
+                        defined.add(controller_class)
+
+                    else:
+                        url_paths.setdefault(controller_class, path)
+
+        return url_paths
+
+    def get_url_path(self, controller_class):
+        """return the url path that routes to controller_class
+
+        :param controller_class: type, a Controller child in the routes
+        :returns: string, see .url_paths
+        """
+        try:
+            return self.url_paths[controller_class]
+
+        except KeyError:
+            raise ValueError("No route to controller {}".format(controller_class.__name__))
+
+    def preload(self):
+        """Import all the controller modules and compile the method tables of all
+        the controller classes so the first request to each endpoint doesn't have
+        to, modules that can't be imported are logged and skipped like they are
+        when the routes are created
+
+        :returns: list, (module_name, seconds) tuples of how long each module
+            took to load, slowest first
+        """
+        ret = []
+        for root in self.routes:
+            for node in root:
+                try:
+                    node.load(self)
+                except Exception as e:
+                    logger.warning("Could not preload module {}: {}".format(
+                        node.module_name,
+                        e
+                    ))
+                    continue
+
+                for controller_class in set(node.classes.values()):
+                    controller_class.method_table_class.get(controller_class)
+                ret.append((node.module_name, node.load_time))
+
+        ret.sort(key=lambda t: t[1], reverse=True)
+        return ret
+
+    def find_route(self, path_args):
+        """find the route node and controller class that should handle path_args
+
+        :param path_args: list, the path segments of the request, this list will
+            be modified, any segments used to find the route are removed
+        :returns: tuple, (node, controller_class, class_path) where node is the
+            RouteNode of the controller's module and class_path is a list
+        """
+        node = None
+        routes = self.routes
+
+        # using the path_args we are going to try and find the best module path
+        # for the request, first prefix that has a module matching the first
+        # path segment wins
+        if path_args:
+            for root in routes:
+                if path_args[0] in root.children:
+                    node = root
+                    while path_args and path_args[0] in node.children:
+                        node = node.children[path_args.pop(0)]
+                    break
+
+        if node is None:
+            # we didn't find the correct module using module paths, so now let's
+            # try class paths, first found class path wins
+            default_node = None
+            for root in routes:
+                root.load(self)
+                if path_args and root.get_class(path_args[0]):
+                    node = root
+                    break
+
+                if not default_node and root.get_class(self.default_class_name):
+                    default_node = root
+
+            if node is None:
+                if default_node is None:
+                    raise TypeError(
+                        "Could not find a valid module with path {} and controller_prefixes {}".format(
+                            "/".join(path_args),
+                            self.controller_prefixes
+                        )
+                    )
+                node = default_node
 
-        module_name, module_path, controller_method_args = self.get_module_name(list(req.path_args))
-        controller_module_name = module_name
-        controller_module = ReflectModule(module_name).module
+        else:
+            node.load(self)
 
+        class_path = []
         controller_class = None
-        if controller_method_args:
-            controller_class = self.get_class(
-                controller_module,
-                controller_method_args[0]
-            )
+        if path_args:
+            controller_class = node.get_class(path_args[0])
 
         if controller_class:
-            controller_path.append(controller_method_args.pop(0))
-            controller_class_name = controller_class.__name__
+            class_path.append(path_args.pop(0))
 
         else:
-            controller_class_name = self.default_class_name
-            controller_class = self.get_class(controller_module, controller_class_name)
+            controller_class = node.get_class(self.default_class_name)
+
+        return node, controller_class, class_path
+
+    def find(self, req, res):
+        ret = {}
+
+        node, controller_class, controller_path, controller_method_args = self.get_route(
+            req.path_args
+        )
 
         if not controller_class:
             raise TypeError(
@@ -286,90 +598,69 @@ class Router(object):
                 )
             )
 
-        ret['module'] = controller_module
-        ret['module_name'] = controller_module_name
-        ret['module_path'] = "/".join(module_path)
+        ret['module'] = node.module
+        ret['module_name'] = node.module_name
+        ret['module_path'] = "/".join(node.module_path)
 
         ret['class'] = controller_class
-        ret['class_name'] = controller_class_name
+        ret['class_name'] = controller_class.__name__
         ret['class_instance'] = self.get_class_instance(req, res, controller_class)
         ret['class_path'] = "/".join(controller_path)
+        ret['router'] = self
 
-        # we merge the leftover path args with the body kwargs
-        controller_method_args.extend(req.body_args)
-
+        # these are just the leftover path args, the body args and kwargs are
+        # merged in by Controller.find_method_params() so the body isn't parsed
+        # until the request has actually been routed
         ret['method_args'] = controller_method_args
-        ret['method_kwargs'] = req.kwargs
+        ret['method_kwargs'] = req.query_kwargs
 
         req.controller_info = ret
         return ret
 
+    def get_route(self, path_args):
+        """find_route() but using the route_cache if there is one
+
+        :param path_args: list, the path segments of the request, this isn't modified
+        :returns: tuple, (node, controller_class, class_path, method_args)
+        """
+        route_cache = self.route_cache
+        if route_cache is None:
+            method_args = list(path_args)
+            node, controller_class, class_path = self.find_route(method_args)
+
+        else:
+            key = tuple(path_args)
+            route = route_cache.get(key, None)
+            if route is None:
+                method_args = list(path_args)
+                node, controller_class, class_path = self.find_route(method_args)
+                route = (node, controller_class, class_path, tuple(method_args))
+                if len(route_cache) < self.route_cache_size:
+                    route_cache[key] = route
+
+            node, controller_class, class_path, method_args = route
+            # the cached route is shared so never hand out its lists
+            class_path = list(class_path)
+            method_args = list(method_args)
+
+        return node, controller_class, class_path, method_args
+
     def get_class_instance(self, req, res, controller_class):
         instance = controller_class(req, res)
         instance.router = self
         return instance
 
     def get_module_name(self, path_args):
-        """returns the module_name and remaining path args.
+        """returns the module_name and remaining path args, this is find_route()
+        for callers that only need the module
 
+        :param path_args: list, the path segments of the request, this list will
+            be modified, the module path segments are removed
         :returns: tuple, (module_name, module_path, path_args)
         """
-        module_name = ""
-        module_path = []
-
-        # using the path_args we are going to try and find the best module path
-        # for the request
-        if path_args:
-            cset = self.module_names
-            for controller_prefix in self.controller_prefixes:
-                mod_name = controller_prefix + "." + path_args[0]
-                if mod_name in cset:
-                    module_name = mod_name
-                    module_path.append(path_args.pop(0))
-
-                    while path_args:
-                        mod_name += "." + path_args[0]
-                        if mod_name in cset:
-                            module_name = mod_name
-                            module_path.append(path_args.pop(0))
-                        else:
-                            break
-
-                    break
-
-        if not module_name:
-            # we didn't find the correct module using module paths, so now let's
-            # try class paths, first found class path wins
-            default_module_name = ""
-
-            for controller_prefix in self.controller_prefixes:
-                controller_module = ReflectModule(controller_prefix).module
-                if path_args:
-                    controller_class = self.get_class(controller_module, path_args[0])
-                    if controller_class:
-                        module_name = controller_prefix
-                        break
-
-                if not default_module_name:
-                    # look for the default class just in case
-                    controller_class = self.get_class(controller_module, self.default_class_name)
-                    if controller_class:
-                        default_module_name = controller_prefix
-
-            if not module_name:
-                if default_module_name:
-                    module_name = default_module_name
-
-                else:
-                    raise TypeError(
-                        "Could not find a valid module with path {} and controller_prefixes {}".format(
-                            "/".join(path_args),
-                            self.controller_prefixes
-                        )
-                    )
-                    #module_name = self.controller_prefixes[0]
-
-        return module_name, module_path, path_args
+        node, controller_class, class_path = self.find_route(path_args)
+        path_args[0:0] = class_path
+        return node.module_name, list(node.module_path), path_args
 
     def get_class(self, module, class_name):
         """try and get the class_name from the module and make sure it is a valid
@@ -378,11 +669,123 @@ class Router(object):
         class_name = class_name.capitalize()
         class_object = getattr(module, class_name, None)
         logger.debug("Getting class {}.{}".format(module.__name__, class_name))
-        if not class_object or not issubclass(class_object, Controller):
+        if not self.is_class(class_object):
             class_object = None
 
         return class_object
 
+    def is_class(self, class_object):
+        """return True if class_object is a valid controller class, the Controller
+        base class is imported into every controller module so it isn't one"""
+        return (
+            inspect.isclass(class_object)
+            and issubclass(class_object, Controller)
+            and class_object is not Controller
+        )
+
+
+class MethodTable(object):
+    """Compiles and caches the http method table and version index of each
+    controller class so Controller.find_methods() doesn't need to inspect the
+    controller on every request
+
+    the tables are compiled the first time a class needs them and then cached
+    until a member is added to or removed from the class or one of its parents,
+    call .clear() if you change the class some other way
+    """
+    tables = weakref.WeakKeyDictionary()
+    """holds the (stamp, method table, version table) tuple of each controller class"""
+
+    method_regex = re.compile(r"^([A-Z][A-Z0-9]+)(_|$)")
+    """members whose name matches this are http methods (eg, GET or GET_1)"""
+
+    @classmethod
+    def get(cls, controller_class):
+        """Return the tables of controller_class
+
+        :param controller_class: type, a Controller child
+        :returns: tuple, (method table, version table), see .create_methods()
+            and .create_versions()
+        """
+        # the number of members of each class in the mro is kept with the tables
+        # so adding or deleting a member compiles them again
+        stamp = tuple(len(vars(klass)) for klass in controller_class.__mro__)
+        tables = cls.tables.get(controller_class, None)
+        if tables is None or tables[0] != stamp:
+            methods = cls.create_methods(controller_class)
+            tables = (stamp, methods, cls.create_versions(methods))
+            cls.tables[controller_class] = tables
+            logger.debug("Compiled method table for {}.{}".format(
+                controller_class.__module__,
+                controller_class.__name__
+            ))
+        return tables[1:]
+
+    @classmethod
+    def create_methods(cls, controller_class):
+        """Compile the http method table of controller_class
+
+        :returns: dict, see .create_table()
+        """
+        members = {}
+        for klass in reversed(inspect.getmro(controller_class)):
+            members.update(vars(klass))
+        return cls.create_table(members)
+
+    @classmethod
+    def create_table(cls, members):
+        """group the members named like an http method (eg, GET) or an http method
+        followed by an underscore (eg, GET_1)
+
+        :param members: dict, member name keys and member values
+        :returns: dict, the keys are http methods (eg GET, POST) and the values
+            are a tuple of (name, member) tuples sorted by name
+        """
+        table = {}
+        for member_name in sorted(members):
+            m = cls.method_regex.match(member_name)
+            if m and members[member_name]:
+                table.setdefault(m.group(1), []).append((member_name, members[member_name]))
+
+        return {k: tuple(v) for k, v in table.items()}
+
+    @classmethod
+    def create_versions(cls, methods):
+        """Compile the version index of the http methods that are completely
+        handled by @version decorated methods
+
+        :param methods: dict, the compiled method table
+        :returns: dict, the keys are http methods (eg GET) and the values are a
+            dict with the version strings as keys and a tuple of (name, member)
+            tuples that handle that version as the value, http methods that have
+            any member without a @version decorator are not in the index
+        """
+        table = {}
+        for http_method, members in methods.items():
+            versions = {}
+            for member_name, member in members:
+                decorators = getattr(member, "controller_decorators", [])
+                decorators = [d for d in decorators if isinstance(d, version)]
+                if not decorators:
+                    versions = {}
+                    break
+
+                for v in decorators[0].versions:
+                    versions.setdefault(v, []).append((member_name, member))
+
+            if versions:
+                table[http_method] = {k: tuple(v) for k, v in versions.items()}
+
+        return table
+
+    @classmethod
+    def clear(cls, controller_class):
+        """Remove the compiled tables of controller_class and all its children so
+        they will be compiled again the next time they are needed"""
+        cls.tables.pop(controller_class, None)
+        for subclass in controller_class.__subclasses__():
+            cls.clear(subclass)
+
 
 class Controller(object):
     """
@@ -446,6 +849,9 @@ class Controller(object):
     encoding = 'UTF-8'
     """the response charset of this controller"""
 
+    method_table_class = MethodTable
+    """compiles the http method tables of the controller classes"""
+
     def __init__(self, request, response, *args, **kwargs):
         self.request = request
         self.response = response
@@ -511,9 +917,11 @@ class Controller(object):
         this method has the same signature as the request handling methods
         (eg, GET, POST) so subclasses can override this method and add decorators
 
-        :param *controller_args: tuple, the path arguments that will be passed to
-            the request handling method (eg, GET, POST)
-        :param **controller_kwargs: dict, the query and body params merged together
+        :param *controller_args: tuple, the path arguments, the body args are
+            added to them before they are passed to the request handling method
+            (eg, GET, POST)
+        :param **controller_kwargs: dict, the query params, the body params are
+            merged into them before they are passed to the request handling method
         """
         req = self.request
         res = self.response
@@ -527,7 +935,12 @@ class Controller(object):
 
         res_error_handler = None
         controller_methods = self.find_methods()
-        #controller_args, controller_kwargs = self.find_method_params()
+
+        # this is where the request body is actually read
+        controller_args, controller_kwargs = self.find_method_params(
+            controller_args,
+            controller_kwargs
+        )
         for controller_method_name, controller_method in controller_methods:
             try:
                 self.logger.debug("Attempting to handle request with {}.{}.{}".format(
@@ -568,6 +981,16 @@ class Controller(object):
         if res_error_handler:
             res_error_handler(self)
 
+        elif res.is_iterator() and res.is_json() and req.accepts_ndjson():
+            # generators are streamed as a json array unless the client asked
+            # for one json document per line
+            res.set_header('Content-Type', "application/x-ndjson;charset={}".format(
+                self.encoding
+            ))
+
+        elif res.is_file() and req.is_method("GET") and res.code == 200:
+            res.set_range(req.get_header("Range"), req.get_header("If-Range", ""))
+
     def handle_error(self, e, **kwargs):
         """if an exception is raised while trying to handle the request it will
         go through this method, this method is called from the Call instance
@@ -580,25 +1003,45 @@ class Controller(object):
     def find_methods(self):
         """Find the methods that could satisfy this request
 
-        This will go through and find any method that starts with the request.method,
-        so if the request was GET /foo then this would find any methods that start
-        with GET
+        This will go through the compiled method table and find any method that
+        is named request.method or starts with request.method_, so if the request
+        was GET /foo then this would find GET and any methods that start with GET_
+
+        If all the found methods are @version decorated then only the methods that
+        handle the requested version are returned
 
         https://www.w3.org/Protocols/rfc2616/rfc2616-sec9.html
 
         :returns: list of tuples (method_name, method), all the found methods
         """
-        methods = []
         req = self.request
         method_name = req.method.upper()
         method_names = set()
 
-        members = inspect.getmembers(self)
+        method_table, version_table = self.method_table_class.get(type(self))
+        members = method_table.get(method_name, ())
+
+        # if all the methods are versioned we can go right to the methods that
+        # handle the requested version, if no method handles the requested
+        # version we still try them all so the version failure is handled
+        # like normal
+        versions = version_table.get(method_name, None)
+        if versions:
+            members = versions.get(req.version(self.content_type), members)
+
+        if not members:
+            # methods set on the instance or found through __getattr__ aren't
+            # in the class's table
+            members = self.method_table_class.create_table(
+                dict(inspect.getmembers(self))
+            ).get(method_name, ())
+
+        methods = []
         for member_name, member in members:
-            if member_name.startswith(method_name):
-                if member:
-                    methods.append((member_name, member))
-                    method_names.add(member_name)
+            # the member is looked up again so methods set on the instance or
+            # replaced on the class are used
+            methods.append((member_name, getattr(self, member_name)))
+            method_names.add(member_name)
 
         if len(methods) == 0:
             # https://www.w3.org/Protocols/rfc2616/rfc2616-sec5.html#sec5.1
@@ -623,14 +1066,39 @@ class Controller(object):
 
         return methods
 
-    def find_method_params(self):
-        """Return the method params
+    def find_method_params(self, controller_args=None, controller_kwargs=None):
+        """Return the method params, this merges the body args and kwargs into
+        the path args and query kwargs so it is where the request body is read
 
+        :param controller_args: list, the path args, defaults to the routed path args
+        :param controller_kwargs: dict, the query kwargs, defaults to the routed
+            query kwargs
         :returns: tuple (args, kwargs) that will be passed as *args, **kwargs
         """
         req = self.request
-        args = req.controller_info["method_args"]
-        kwargs = req.controller_info["method_kwargs"]
+        if controller_args is None:
+            controller_args = req.controller_info["method_args"]
+        if controller_kwargs is None:
+            controller_kwargs = req.controller_info["method_kwargs"]
+
+        try:
+            body_args = req.body_args
+            body_kwargs = req.body_kwargs
+
+        except IOError as e:
+            self.logger.warning(str(e), exc_info=True)
+            raise CallError(
+                408,
+                "The client went away before the request body was retrieved."
+            )
+
+        args = list(controller_args)
+        args.extend(body_args)
+        kwargs = dict(controller_kwargs)
+        kwargs.update(body_kwargs)
+
+        req.controller_info["method_args"] = args
+        req.controller_info["method_kwargs"] = kwargs
         return args, kwargs
 
     def log_start(self, start):
@@ -697,5 +1165,8 @@ class Controller(object):
         get_elapsed = lambda start, stop, multiplier, rnd: round(abs(stop - start) * float(multiplier), rnd)
         elapsed = get_elapsed(start, stop, 1000.00, 1)
         total = "%0.1f ms" % (elapsed)
+        queue_wait = self.request.queue_wait
+        if queue_wait:
+            total += ", queued %0.1f ms" % (queue_wait * 1000.0)
         self.logger.info("RESPONSE {} {} in {}".format(self.response.code, self.response.status, total))
 
@@ -208,11 +208,12 @@ class WebClient(object):
         return res
 
     def is_json(self, headers):
-        """return true if content_type is a json content type"""
+        """return true if content_type is a json content type, ndjson is lines of
+        json documents so it doesn't count"""
         ret = False
         ct = headers.get("content-type", "").lower()
         if ct:
-            ret = ct.lower().rfind("json") >= 0
+            ret = ct.rfind("json") >= 0 and ct.rfind("ndjson") < 0
         return ret
 
     def basic_auth(self, username, password):
@@ -20,9 +20,9 @@ if is_py2:
 
     from urllib import urlencode
     import SocketServer as socketserver
+    import Queue as queue
     #from base64 import encodestring as encodebytes
 
-#     import Queue as queue
 #     import thread as _thread
 #     try:
 #         from cStringIO import StringIO
@@ -44,10 +44,10 @@ elif is_py3:
     from io import StringIO
     from urllib.parse import urlencode
     import socketserver
+    import queue
     #from base64 import encodebytes
 
 
-#     import queue
 #     import _thread
 #     from io import StringIO
 #     from http.server import HTTPServer, SimpleHTTPRequestHandler
@@ -35,6 +35,9 @@ from .call import (
 from .utils import (
     httpcache,
     nohttpcache,
+    cache,
+    coalesce,
+    CacheBackend,
     _property,
     _propertyset,
     param,
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, division, print_function, absolute_import
 import logging
+from functools import wraps
 
 from decorators import FuncDecorator
 
@@ -97,10 +98,14 @@ class ControllerDecorator(FuncDecorator):
         """
         self.handle_definition(*args, **kwargs)
 
+        @wraps(func)
         def decorated(controller, *controller_args, **controller_kwargs):
             self.handle_call(controller, controller_args, controller_kwargs)
             return func(controller, *controller_args, **controller_kwargs)
 
+        # keep track of all the controller decorators wrapping the original
+        # method, the Controller uses this to build its version index
+        decorated.controller_decorators = [self] + list(getattr(func, "controller_decorators", []))
         return decorated
 
     def handle_definition(self, *args, **kwargs):
@@ -193,11 +193,23 @@ class ratelimit_param(RateLimitDecorator):
     login attempts for an email address you would pass in "email" to this decorator"""
     def normalize_key(self, request, controller_args, controller_kwargs):
         try:
-            ret = "{}{}".format(controller_kwargs[self.param_name], request.path)
+            ret = "{}{}".format(self.get_param(request, controller_kwargs), request.path)
         except KeyError:
             ret = ""
         return ret
 
+    def get_param(self, request, controller_kwargs):
+        """return the param value, if the decorator is on Controller.handle() the
+        body params aren't in controller_kwargs yet so they are checked also
+
+        :raises: KeyError if the param isn't found
+        """
+        try:
+            return controller_kwargs[self.param_name]
+
+        except KeyError:
+            return request.body_kwargs[self.param_name]
+
     def handle_definition(self, param_name, *args, **kwargs):
         self.param_name = param_name
         return super(ratelimit_param, self).handle_definition(*args, **kwargs)
@@ -208,7 +220,7 @@ class ratelimit_param_ip(ratelimit_param):
     the param N times on the given unique ip"""
     def normalize_key(self, request, controller_args, controller_kwargs):
         try:
-            ret = "{}.{}{}".format(controller_kwargs[self.param_name], request.ip, request.path)
+            ret = "{}.{}{}".format(self.get_param(request, controller_kwargs), request.ip, request.path)
         except KeyError:
             ret = ""
         return ret
@@ -218,7 +230,7 @@ class ratelimit_param_only(ratelimit_param):
     """Just uses given parameter as rate-limiter. Does not use IP or path."""
     def normalize_key(self, request, controller_args, controller_kwargs):
         try:
-            ret = str(controller_kwargs[self.param_name])
+            ret = str(self.get_param(request, controller_kwargs))
         except KeyError:
             ret = ""
         return ret
@@ -5,33 +5,494 @@ import re
 import cgi
 from functools import wraps
 import logging
+import hashlib
+import datetime
+import calendar
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
 
 from decorators import FuncDecorator
 
 from ..compat.environ import *
 from ..exception import CallError
-from ..utils import String, ByteString
+from .base import BackendDecorator
+from ..utils import String, ByteString, JSONCodec
+from .. import environ
 
 
 logger = logging.getLogger(__name__)
 
 
+def encode_body(response, json_class):
+    """return the bytes the interface will send for the response's body, they are
+    kept on the response so the body is only encoded once
+
+    :param response: Response, its body shouldn't be a file or an iterator
+    :param json_class: JSONCodec, used if the response is json
+    :returns: bytes
+    """
+    b = response._body_bytes
+    if b is None:
+        if response.is_json():
+            b = json_class.dumpb(response.body, response.encoding)
+        else:
+            b = ByteString(response.body, response.encoding).raw()
+        response._body_bytes = b
+    return b
+
+
+def get_request_key(controller, vary):
+    """return a key that is the same for GET requests that should get the same
+    response, used by the cache and coalesce decorators
+
+    the credential headers (Authorization and Cookie) are always part of the key
+    so one client's response is never given to another client
+
+    :param controller: Controller, the controller handling the request
+    :param vary: list, the request headers whose value changes the response
+    :returns: string
+    """
+    req = controller.request
+    res = controller.response
+    bits = [
+        req.method.upper(),
+        req.path,
+        "&".join(
+            "{}={}".format(k, String(v)) for k, v in sorted(req.query_kwargs.items())
+        ),
+        req.version(controller.content_type),
+        res.encoding,
+    ]
+    header_names = ["authorization", "cookie"]
+    for header_name in vary:
+        header_name = header_name.lower()
+        if header_name not in header_names:
+            header_names.append(header_name)
+
+    for header_name in header_names:
+        bits.append("{}={}".format(header_name, req.get_header(header_name, "")))
+
+    return hashlib.sha1(ByteString("\n".join(bits)).raw()).hexdigest()
+
+
+def set_response_value(response, value, request=None):
+    """set a (code, headers, body) value that was saved from another response
+    onto response
+
+    :param response: Response
+    :param value: tuple, (code, headers, body)
+    :param request: Request, if passed then the saved validators (eg, an ETag set
+        by @httpcache) are checked against it and the response is a 304 if the
+        client is current
+    :returns: bytes, the encoded body
+    """
+    code, headers, body = value
+    response.code = code
+    for k, v in headers:
+        response.set_header(k, v)
+    response.body = body
+    response._body_bytes = body
+
+    if request is not None and response.is_not_modified(request):
+        # Call.handle will make sure the body isn't sent
+        response.code = 304
+
+    return body
+
+
 class httpcache(FuncDecorator):
     """
-    sets the cache headers so the response can be cached by the client
+    sets the cache headers so the response can be cached by the client, and
+    optionally the ETag and Last-Modified validators so the client can revalidate
+    its cached copy with If-None-Match or If-Modified-Since and get back an empty
+    304 if it hasn't changed
 
     link -- https://developers.google.com/web/fundamentals/performance/optimizing-content-efficiency/http-caching
+    link -- https://tools.ietf.org/html/rfc7232
+
+    example --
+
+        # hash the json body, the body is still built but not sent again
+        @httpcache(60, etag=True)
+        def GET(self): ...
+
+        # a cheap validator, GET isn't even called if the client is current
+        @httpcache(60, etag=lambda self, pk: Foo.version(pk))
+        def GET(self, pk): ...
 
     ttl -- integer -- how many seconds to have the client cache the request
+    etag -- boolean|callable -- True hashes the encoded body to create the ETag, a
+        callable will be passed the same arguments as the decorated method and is
+        called before it, it should return a string that changes when the body does
+    last_modified -- callable -- passed the same arguments as the decorated method
+        and called before it, it should return a datetime or timestamp of when the
+        body last changed
     """
-    def decorate(self, func, ttl):
-        def decorated(self, *args, **kwargs):
-            self.response.add_headers({
+    json_class = JSONCodec.find(environ.JSON_CODEC)
+    """used to encode json bodies when etag=True, the encoded body is kept so it
+    isn't encoded again when it is sent"""
+
+    def get_etag(self, value):
+        """quote value so it is a valid ETag header, weak values are left alone"""
+        value = String(value)
+        if value.startswith('"') or value.startswith('W/"'):
+            return value
+        return '"{}"'.format(value)
+
+    def get_last_modified(self, value):
+        """return value as an http date"""
+        if isinstance(value, datetime.datetime):
+            value = calendar.timegm(value.utctimetuple())
+        return formatdate(value, usegmt=True)
+
+    def get_body_etag(self, response, body):
+        """hash the encoded body, files and generators aren't hashed since that
+        would mean reading all of them
+
+        :returns: string, the ETag or "" if body can't be hashed
+        """
+        response.body = body
+        if not response.has_body() or response.is_file() or response.is_iterator():
+            return ""
+
+        # the interface will send these bytes instead of encoding the body again
+        b = encode_body(response, self.json_class)
+        return self.get_etag(hashlib.sha1(b).hexdigest())
+
+    def decorate(self, func, ttl, etag=False, last_modified=None):
+        @wraps(func)
+        def decorated(controller, *args, **kwargs):
+            req = controller.request
+            res = controller.response
+            res.add_headers({
                 "Cache-Control": "max-age={}".format(ttl),
             })
-            return func(self, *args, **kwargs)
-            # TODO -- figure out how to set ETag
-            #if not self.response.has_header('ETag')
+
+            if callable(etag):
+                res.set_header("ETag", self.get_etag(etag(controller, *args, **kwargs)))
+
+            if last_modified:
+                res.set_header("Last-Modified", self.get_last_modified(
+                    last_modified(controller, *args, **kwargs)
+                ))
+
+            if res.is_not_modified(req):
+                res.code = 304
+                return None
+
+            body = func(controller, *args, **kwargs)
+
+            if etag is True and not res.has_header("ETag"):
+                v = self.get_body_etag(res, body)
+                if v:
+                    res.set_header("ETag", v)
+
+            if res.is_not_modified(req):
+                # Call.handle will make sure the body isn't sent
+                res.code = 304
+
+            return body
+
+        return decorated
+
+
+class CacheBackend(object):
+    """The default @cache backend, it keeps the responses in a class level LRU
+    dict in memory that is shared by all the threads of the process
+
+    the LRU holds at most max_size bytes, when it is full the least recently
+    used responses are evicted, and responses are removed when they expire
+
+    you can create your own backend (eg, to keep responses in redis) by
+    implementing .get() and .set() and setting it on the decorator:
+
+    :example:
+        from endpoints.decorators import cache
+
+        class MyBackend(object):
+            def get(self, key):
+                # return the (code, headers, body) tuple or None
+
+            def set(self, key, value, ttl):
+                # save the value for ttl seconds
+
+        cache.backend_class = MyBackend
+    """
+    max_size = environ.CACHE_MAX_SIZE
+    """how many bytes the cached responses can take up"""
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _counts = {
+        "hits": 0,
+        "misses": 0,
+        "evictions": 0,
+        "expirations": 0,
+        "size": 0,
+    }
+
+    @classmethod
+    def get_size(cls, key, value):
+        """roughly how much memory the value will take up"""
+        code, headers, body = value
+        size = len(key) + len(body)
+        for k, v in headers:
+            size += len(k) + len(v)
+        return size
+
+    @classmethod
+    def stats(cls):
+        """return the hits, misses, evictions, and expirations along with how many
+        responses are cached and how many bytes they take up
+
+        :returns: dict
+        """
+        with cls._cache_lock:
+            ret = dict(cls._counts)
+            ret["count"] = len(cls._cache)
+        return ret
+
+    @classmethod
+    def clear(cls):
+        """remove all the cached responses and reset the counts"""
+        with cls._cache_lock:
+            cls._cache.clear()
+            for k in cls._counts:
+                cls._counts[k] = 0
+
+    def get(self, key):
+        """return the value set for key or None if it isn't cached or has expired"""
+        cls = type(self)
+        with cls._cache_lock:
+            item = cls._cache.pop(key, None)
+            if item is None:
+                cls._counts["misses"] += 1
+                return None
+
+            expires, size, value = item
+            if expires < time.time():
+                cls._counts["size"] -= size
+                cls._counts["expirations"] += 1
+                cls._counts["misses"] += 1
+                return None
+
+            # put it back at the end so it is the most recently used
+            cls._cache[key] = item
+            cls._counts["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl):
+        """cache value for ttl seconds
+
+        :param key: string
+        :param value: tuple, (code, headers, body)
+        :param ttl: int, how many seconds the value is good for
+        """
+        cls = type(self)
+        size = cls.get_size(key, value)
+        if size > cls.max_size:
+            return
+
+        with cls._cache_lock:
+            item = cls._cache.pop(key, None)
+            if item is not None:
+                cls._counts["size"] -= item[1]
+
+            cls._cache[key] = (time.time() + ttl, size, value)
+            cls._counts["size"] += size
+            while cls._counts["size"] > cls.max_size:
+                _, item = cls._cache.popitem(last=False)
+                cls._counts["size"] -= item[1]
+                cls._counts["evictions"] += 1
+
+
+class cache(BackendDecorator):
+    """
+    keeps the encoded body, status code, and headers of a GET controller method's
+    response on the server so matching requests are answered without calling the
+    method or encoding the body again until ttl runs out
+
+    requests match if they have the same path, query params, api version (see
+    Request.version), credentials (the Authorization and Cookie headers), and
+    values for the vary headers. Only successful responses whose body isn't a
+    file or generator are cached
+
+    put @cache above @httpcache, the ETag and Last-Modified headers httpcache sets
+    are cached with the response and checked against the request on a cache hit
+    so clients that are current still get a 304
+
+    example --
+
+        @cache(60, vary=["Accept-Language"])
+        @httpcache(60, etag=True)
+        def GET(self, pk): ...
+
+    ttl -- integer -- how many seconds to keep the response
+    vary -- list -- the request headers whose value changes the response
+    """
+    backend_class = CacheBackend
+
+    json_class = JSONCodec.find(environ.JSON_CODEC)
+    """used to encode json bodies before they are cached"""
+
+    def handle_definition(self, ttl, vary=None):
+        self.ttl = ttl
+        self.vary = list(vary) if vary else []
+
+    def create_key(self, controller, controller_args, controller_kwargs):
+        """return the key the response of this request is cached with
+
+        :returns: string
+        """
+        return get_request_key(controller, self.vary)
+
+    def decorate(self, func, *args, **kwargs):
+        self.handle_definition(*args, **kwargs)
+
+        @wraps(func)
+        def decorated(controller, *controller_args, **controller_kwargs):
+            req = controller.request
+            if not req.is_method("GET"):
+                return func(controller, *controller_args, **controller_kwargs)
+
+            res = controller.response
+            backend = self.create_backend()
+            key = self.create_key(controller, controller_args, controller_kwargs)
+            value = backend.get(key)
+            if value is not None:
+                return set_response_value(res, value, req)
+
+            # only the headers the method sets are cached, the others (eg, CORS)
+            # depend on the request
+            before = set(res.headers.items())
+            body = func(controller, *controller_args, **controller_kwargs)
+            res.body = body
+            if res.has_body() and res.code == 200 and not res.is_file() and not res.is_iterator():
+                headers = [h for h in res.headers.items() if h not in before]
+                backend.set(key, (res.code, headers, encode_body(res, self.json_class)), self.ttl)
+
+            return body
+
+        return decorated
+
+
+class coalesce(FuncDecorator):
+    """
+    only lets one of the identical GET requests that arrive at the same time call
+    the controller method, the other requests wait for it to finish and get a copy
+    of its encoded body, status code, and headers. This keeps a burst of requests
+    (eg, right after a cached value expires) from all doing the same expensive work
+
+    requests are identical if they have the same key, by default the key is built
+    the same way as the cache decorator's so requests with different credentials
+    are never coalesced. If the method raises an error the waiting requests raise
+    it also, if the method returns a file or generator or a 304 the waiting
+    requests call the method themselves
+
+    example --
+
+        @coalesce(vary=["Accept-Language"])
+        def GET(self, pk): ...
+
+    timeout -- float -- how many seconds a waiting request waits before it calls
+        the method itself, defaults to environ.COALESCE_TIMEOUT
+    vary -- list -- the request headers whose value changes the response
+    key -- callable -- called with (controller, controller_args, controller_kwargs)
+        and returns the key, requests with an empty key aren't coalesced
+    """
+    json_class = JSONCodec.find(environ.JSON_CODEC)
+    """used to encode json bodies before they are shared"""
+
+    _calls = {}
+    """holds the in flight calls, key -> dict with event, value, and error keys"""
+
+    _calls_lock = threading.Lock()
+
+    def handle_definition(self, timeout=None, vary=None, key=None):
+        self.timeout = environ.COALESCE_TIMEOUT if timeout is None else timeout
+        self.vary = list(vary) if vary else []
+        self.key = key
+
+    def normalize_key(self, controller, controller_args, controller_kwargs):
+        """return the key identical requests share, override this or pass key into
+        the decorator to customize the key
+
+        :returns: string
+        """
+        if self.key:
+            return self.key(controller, controller_args, controller_kwargs)
+        return get_request_key(controller, self.vary)
+
+    def lead(self, call, key, func, controller, controller_args, controller_kwargs):
+        """call the method and save its response on call for the waiting requests"""
+        res = controller.response
+        before = set(res.headers.items())
+        try:
+            body = func(controller, *controller_args, **controller_kwargs)
+            res.body = body
+            # a 304 depends on the leader's validators so it isn't shared
+            if res.code != 304 and not res.is_file() and not res.is_iterator():
+                headers = [h for h in res.headers.items() if h not in before]
+                b = encode_body(res, self.json_class) if res.has_body() else None
+                call["value"] = (res.code, headers, b)
+            return body
+
+        except Exception as e:
+            call["error"] = e
+            raise
+
+        finally:
+            with self._calls_lock:
+                self._calls.pop(key, None)
+            call["event"].set()
+
+    def follow(self, call, func, controller, controller_args, controller_kwargs):
+        """wait for the leading request to finish and use its response"""
+        if call["event"].wait(self.timeout):
+            if call["error"] is not None:
+                raise call["error"]
+
+            if call["value"] is not None:
+                return set_response_value(
+                    controller.response,
+                    call["value"],
+                    controller.request
+                )
+
+        else:
+            logger.warning("Waited {} seconds on coalesced request for {}".format(
+                self.timeout,
+                controller.request.path
+            ))
+
+        return func(controller, *controller_args, **controller_kwargs)
+
+    def decorate(self, func, *args, **kwargs):
+        self.handle_definition(*args, **kwargs)
+
+        @wraps(func)
+        def decorated(controller, *controller_args, **controller_kwargs):
+            key = None
+            if controller.request.is_method("GET"):
+                key = self.normalize_key(controller, controller_args, controller_kwargs)
+
+            if not key:
+                return func(controller, *controller_args, **controller_kwargs)
+
+            with self._calls_lock:
+                call = self._calls.get(key)
+                is_leader = call is None
+                if is_leader:
+                    call = {"event": threading.Event(), "value": None, "error": None}
+                    self._calls[key] = call
+
+            if is_leader:
+                return self.lead(call, key, func, controller, controller_args, controller_kwargs)
+
+            else:
+                return self.follow(call, func, controller, controller_args, controller_kwargs)
 
         return decorated
 
@@ -43,6 +504,7 @@ class nohttpcache(FuncDecorator):
     https://devcenter.heroku.com/articles/increasing-application-performance-with-http-cache-headers#cache-prevention
     """
     def decorate(self, func):
+        @wraps(func)
         def decorated(self, *args, **kwargs):
             self.response.add_headers({
                 "Cache-Control": "no-cache, no-store, must-revalidate",
@@ -76,8 +538,12 @@ class _property(object):
         instead of the getter, this will cause a default getter to be created that just returns
         _name (you should set self._name in your setter)
     deleter -- boolean -- same as setter, set to True to have the method act as the deleter
+
+    if the class has a _name slot (see __slots__) the value is stored there instead
+    of in the instance's __dict__
     """
     def __init__(self, *args, **kwargs):
+        self.slots = {}
         self.allow_empty = kwargs.get('allow_empty', True)
         self.has_setter = kwargs.get('setter', False)
         self.has_deleter = kwargs.get('deleter', False)
@@ -127,38 +593,74 @@ class _property(object):
 
         return self
 
+    def get_slot(self, instance):
+        """return the slot descriptor the value is stored in, None if the value is
+        stored in the instance's __dict__"""
+        cls = type(instance)
+        try:
+            return self.slots[cls]
+
+        except KeyError:
+            slot = None
+            for klass in cls.__mro__:
+                if self.name in klass.__dict__:
+                    v = klass.__dict__[self.name]
+                    if isinstance(v, types.MemberDescriptorType):
+                        slot = v
+                    break
+
+            self.slots[cls] = slot
+            return slot
+
     def __get__(self, instance, cls):
+        if instance is None:
+            return self
+
         # return the cached value if it exists
-        val = None
         name = self.name
-        if name in instance.__dict__:
-            val = instance.__dict__[name]
-
-        else:
+        slot = self.get_slot(instance)
+        if slot:
             try:
-                val = self.fget(instance)
-                if val or self.allow_empty:
-                    # We don't do fset here because that causes unexpected bahavior
-                    # if you ever override the setter, causing the setter to be fired
-                    # every time the getter is called, which confused me for about
-                    # an hour before I figured out what was happening
-                    self.default_set(instance, val)
-
-            except Exception:
-                # make sure no value gets set no matter what
-                instance.__dict__.pop(name, None)
-                raise
+                return slot.__get__(instance, cls)
+            except AttributeError:
+                pass
+
+        elif name in instance.__dict__:
+            return instance.__dict__[name]
+
+        try:
+            val = self.fget(instance)
+            if val or self.allow_empty:
+                # We don't do fset here because that causes unexpected bahavior
+                # if you ever override the setter, causing the setter to be fired
+                # every time the getter is called, which confused me for about
+                # an hour before I figured out what was happening
+                self.default_set(instance, val)
+
+        except Exception:
+            # make sure no value gets set no matter what
+            self.default_del(instance)
+            raise
 
         return val
 
     def default_get(self, instance):
         try:
-            return instance.__dict__[self.name]
-        except KeyError:
+            slot = self.get_slot(instance)
+            if slot:
+                return slot.__get__(instance, type(instance))
+            else:
+                return instance.__dict__[self.name]
+
+        except (KeyError, AttributeError):
             raise AttributeError("can't get attribute {}".format(self.__name__))
 
     def default_set(self, instance, val):
-        instance.__dict__[self.name] = val
+        slot = self.get_slot(instance)
+        if slot:
+            slot.__set__(instance, val)
+        else:
+            instance.__dict__[self.name] = val
 
     def __set__(self, instance, val):
         if self.read_only:
@@ -168,7 +670,14 @@ class _property(object):
             self.fset(instance, val)
 
     def default_del(self, instance):
-        instance.__dict__.pop(self.name, None)
+        slot = self.get_slot(instance)
+        if slot:
+            try:
+                slot.__delete__(instance)
+            except AttributeError:
+                pass
+        else:
+            instance.__dict__.pop(self.name, None)
 
     def __delete__(self, instance, *args):
         if self.read_only:
@@ -529,6 +1038,7 @@ class param(FuncDecorator):
         slf.normalize_type(names)
         slf.normalize_flags(flags)
 
+        @wraps(func)
         def decorated(self, *args, **kwargs):
             self, args, kwargs = slf.normalize_param(self, args, kwargs)
             return func(self, *args, **kwargs)
@@ -583,6 +1093,7 @@ class code_error(FuncDecorator):
         against the raised error
     """
     def decorate(self, func, code, *exc_classes):
+        @wraps(func)
         def decorated(self, *args, **kwargs):
             try:
                 return func(self, *args, **kwargs)
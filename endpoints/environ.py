@@ -25,6 +25,86 @@ def set_host(host, environ=None):
     HOST = host
 
 
+MANIFEST = get("MANIFEST", "")
+"""Path to a controller manifest created with `endpoints manifest build`, when this
+is set and the manifest is fresh the controllers are loaded from it instead of
+being scanned and reflected on startup"""
+
+def set_manifest(path):
+    global MANIFEST
+    os.environ["ENDPOINTS_MANIFEST"] = path
+    MANIFEST = path
+
+
+UPLOAD_SPOOL_SIZE = int(get("UPLOAD_SPOOL_SIZE", 1024 * 1024))
+"""Uploaded files bigger than this many bytes are written to a temporary file
+instead of being kept in memory"""
+
+UPLOAD_MAX_FIELD_SIZE = int(get("UPLOAD_MAX_FIELD_SIZE", 1024 * 1024))
+"""The biggest a multipart/form-data field that isn't a file can be, these are
+kept in memory so requests with bigger fields get a 413 response, 0 means no
+limit"""
+
+
+QUERY_MAX_FIELDS = int(get("QUERY_MAX_FIELDS", 1000))
+"""The most fields a request's query string can have, requests with more get a
+400 response, 0 means no limit"""
+
+QUERY_MAX_NAME_SIZE = int(get("QUERY_MAX_NAME_SIZE", 1024))
+"""The longest a query string field name can be, 0 means no limit"""
+
+QUERY_MAX_VALUE_SIZE = int(get("QUERY_MAX_VALUE_SIZE", 65536))
+"""The longest a query string field value can be, 0 means no limit"""
+
+
+JSON_CODEC = get("JSON_CODEC", "")
+"""The json library (orjson, ujson, or json) used for request bodies, responses,
+and websocket payloads, empty uses the standard library json module"""
+
+
+RESPONSE_CHUNK_SIZE = int(get("RESPONSE_CHUNK_SIZE", 65536))
+"""Generator response bodies are encoded and sent to the client in chunks of
+about this many bytes"""
+
+
+COMPRESSION_LEVEL = int(get("COMPRESSION_LEVEL", 0))
+"""The zlib level (1-9) responses are gzip or deflate compressed with when the
+client accepts it, 0 (the default) turns response compression off"""
+
+COMPRESSION_MIN_SIZE = int(get("COMPRESSION_MIN_SIZE", 1024))
+"""Response bodies smaller than this many bytes aren't compressed, streamed
+bodies whose size isn't known are always compressed"""
+
+COMPRESSION_TYPES = get(
+    "COMPRESSION_TYPES",
+    "text/*,application/json,application/x-ndjson,application/javascript,application/xml,image/svg+xml"
+)
+"""Comma separated content types that will be compressed, type/* matches all
+the subtypes"""
+
+
+CACHE_MAX_SIZE = int(get("CACHE_MAX_SIZE", 64 * 1024 * 1024))
+"""The most bytes of responses the @cache decorator's in memory backend will
+hold, the least recently used responses are evicted when it is full"""
+
+COALESCE_TIMEOUT = float(get("COALESCE_TIMEOUT", 30))
+"""How many seconds a request waits on an identical in flight request of a
+@coalesce method before it calls the method itself"""
+
+
+WSGI_POOL_SIZE = int(get("WSGI_POOL_SIZE", 0))
+"""How many worker threads the WSGI Server handles requests with, 0 starts a new
+thread for every connection"""
+
+WSGI_QUEUE_SIZE = int(get("WSGI_QUEUE_SIZE", 64))
+"""How many accepted connections can wait for a WSGI Server pool worker, when the
+queue is full new connections get a 503 response, 0 means no limit"""
+
+WSGI_RETRY_AFTER = int(get("WSGI_RETRY_AFTER", 1))
+"""The Retry-After seconds of the 503 responses the WSGI Server sends when its
+queue is full"""
+
+
 def set_controller_prefixes(prefixes, env_name='ENDPOINTS_PREFIX'):
     """set the controller_prefixes found in env_name to prefixes, this will remove
     any existing found controller prefixes 
@@ -12,8 +12,13 @@ import logging
 import inspect
 import copy
 from socket import gethostname
+import tempfile
+import io
+from email.utils import formatdate, parsedate_tz, mktime_tz
 
 from .compat.environ import *
+from . import environ
+from .exception import CallError
 from .compat.imports import BaseHTTPRequestHandler, parse as urlparse, urlencode
 from .decorators.utils import _property
 from .utils import AcceptHeader, ByteString, MimeType, String, Base64, Deepcopy
@@ -43,10 +48,73 @@ class Headers(BaseHeaders, Mapping):
     actual python3 code:
         https://github.com/python/cpython/blob/master/Lib/wsgiref/headers.py
     """
+    cached_names = frozenset([
+        "Accept", "Accept-Charset", "Accept-Encoding", "Accept-Language",
+        "Accept-Ranges", "Access-Control-Allow-Credentials",
+        "Access-Control-Allow-Headers", "Access-Control-Allow-Methods",
+        "Access-Control-Allow-Origin", "Access-Control-Max-Age",
+        "Access-Control-Request-Headers", "Access-Control-Request-Method", "Age",
+        "Allow", "Authorization", "Cache-Control", "Connection",
+        "Content-Disposition", "Content-Encoding", "Content-Language",
+        "Content-Length", "Content-Range", "Content-Type", "Cookie", "Date",
+        "Etag", "Expect", "Expires", "Forwarded", "From", "Host", "If-Match",
+        "If-Modified-Since", "If-None-Match", "If-Range", "If-Unmodified-Since",
+        "Keep-Alive", "Last-Modified", "Location", "Origin", "Pragma", "Range",
+        "Referer", "Retry-After", "Sec-WebSocket-Accept", "Sec-WebSocket-Extensions",
+        "Sec-WebSocket-Key", "Sec-WebSocket-Protocol", "Sec-WebSocket-Version",
+        "Server", "Set-Cookie", "Te", "Trailer", "Transfer-Encoding", "Upgrade",
+        "User-Agent", "Vary", "Via", "Www-Authenticate", "X-Forwarded-For",
+        "X-Forwarded-Host", "X-Forwarded-Proto", "X-Real-Ip", "X-Requested-With",
+    ])
+    """the standard header names, only these names are remembered by the name
+    conversion methods so clients sending made up headers can't grow the caches"""
+
+    _name_cache = {}
+
+    _shared = False
+    """True if the header list is shared with another instance, see .child()"""
+
     def __init__(self, headers=None, **kwargs):
         super(Headers, self).__init__([])
+        self._index = {}
         self.update(headers, **kwargs)
 
+    def child(self):
+        """return a copy of these headers that shares the header list with this
+        instance until one of them is modified, so creating it doesn't copy
+        anything
+
+        :returns: Headers, the same type as this instance
+        """
+        instance = type(self)()
+        instance._headers = self._headers
+        instance._index = self._index
+        instance._shared = self._shared = True
+        return instance
+
+    def _unshare(self):
+        """give this instance its own header list if it is shared, this is called
+        before the headers are modified"""
+        if self._shared:
+            headers = list(self._headers)
+            index = dict((k, list(v)) for k, v in self._index.items())
+            self._headers = headers
+            self._index = index
+            self._shared = False
+
+    def _create_index(self, headers):
+        """index the positions of every header name in headers so lookups don't
+        have to scan the whole list
+
+        :param headers: list, (name, value) tuples, the names should already be
+            converted with _convert_string_name()
+        :returns: dict, {name: [index, ...]}
+        """
+        index = {}
+        for i, (k, v) in enumerate(headers):
+            index.setdefault(k, []).append(i)
+        return index
+
     def _convert_string_part(self, bit):
         """each part of a header will go through this method, this allows further
         normalization of each part, so a header like FOO_BAR would call this method
@@ -62,10 +130,31 @@ class Headers(BaseHeaders, Mapping):
         return bit
 
     def _convert_string_name(self, k):
-        """converts things like FOO_BAR to Foo-Bar which is the normal form"""
-        k = String(k, "iso-8859-1")
-        bits = k.lower().replace('_', '-').split('-')
-        return "-".join((self._convert_string_part(bit) for bit in bits))
+        """converts things like FOO_BAR to Foo-Bar which is the normal form
+
+        the standard header names (see cached_names) are remembered in their
+        usual forms (eg, Content-Type, content-type, CONTENT_TYPE) so they are
+        only converted once per process"""
+        key = (type(self), k)
+        cache = self._name_cache
+        name = cache.get(key, None)
+        if name is None:
+            k = String(k, "iso-8859-1")
+            bits = k.lower().replace('_', '-').split('-')
+            name = "-".join((self._convert_string_part(bit) for bit in bits))
+            if self._is_cached_name(k, name):
+                cache[key] = name
+        return name
+
+    def _is_cached_name(self, k, name):
+        """return True if k is one of the usual forms of a standard header name
+
+        :param k: string, the header name that was converted
+        :param name: string, k converted with _convert_string_name()
+        :returns: bool
+        """
+        if name not in self.cached_names: return False
+        return k == name or k == name.lower() or k == name.upper().replace("-", "_")
 
     def _convert_string_type(self, v):
         """Override the internal method wsgiref.headers.Headers uses to check values
@@ -81,33 +170,47 @@ class Headers(BaseHeaders, Mapping):
 
     def get_all(self, name):
         name = self._convert_string_name(name)
-        return super(Headers, self).get_all(name)
+        headers = self._headers
+        return [headers[i][1] for i in self._index.get(name, [])]
 
     def get(self, name, default=None):
         name = self._convert_string_name(name)
-        return super(Headers, self).get(name, default)
+        indexes = self._index.get(name, None)
+        return self._headers[indexes[0]][1] if indexes else default
 
     def __delitem__(self, name):
         name = self._convert_string_name(name)
-        return super(Headers, self).__delitem__(name)
+        if name in self._index:
+            self._unshare()
+            headers = [kv for kv in self._headers if kv[0] != name]
+            self._headers[:] = headers
+            self._index = self._create_index(headers)
 
     def __setitem__(self, name, val):
         name = self._convert_string_name(name)
-        if is_py2:
-            val = self._convert_string_type(val)
-        return super(Headers, self).__setitem__(name, val)
+        val = self._convert_string_type(val)
+        del self[name]
+        self._unshare()
+        index = self._index
+        headers = self._headers
+        headers.append((name, val))
+        index[name] = [len(headers) - 1]
 
     def setdefault(self, name, val):
-        name = self._convert_string_name(name)
-        if is_py2:
-            val = self._convert_string_type(val)
-        return super(Headers, self).setdefault(name, val)
+        ret = self.get(name)
+        if ret is None:
+            self[name] = val
+            ret = self.get(name)
+        return ret
 
     def add_header(self, name, val, **params):
         name = self._convert_string_name(name)
         if is_py2:
             val = self._convert_string_type(val)
-        return super(Headers, self).add_header(name, val, **params)
+        self._unshare()
+        index = self._index
+        super(Headers, self).add_header(name, val, **params)
+        index.setdefault(name, []).append(len(self._headers) - 1)
 
     def keys(self):
         return [k for k, v in self._headers]
@@ -188,6 +291,265 @@ class Environ(Headers):
         return v
 
 
+class EnvironHeaders(Headers):
+    """Request headers that are a view over a WSGI environ dict
+
+    WSGI servers pass the request headers in the environ as HTTP_* keys (and
+    CONTENT_TYPE and CONTENT_LENGTH), instead of copying and normalizing all of
+    them when the request is created this works out the environ key of a header
+    when it is actually asked for, so headers that are never read cost nothing
+
+    The headers are only copied out of the environ (into the normal Headers list)
+    if they are iterated or modified, the environ itself is never changed
+
+    :example:
+        headers = EnvironHeaders({"HTTP_X_FOO": "bar", "CONTENT_TYPE": "text/plain"})
+        headers.get("x-foo") # bar
+        headers["Content-Type"] # text/plain
+    """
+    content_names = set(["CONTENT_TYPE", "CONTENT_LENGTH"])
+    """the headers that aren't prefixed with HTTP_ in the environ"""
+
+    _environ_name_cache = {}
+
+    @property
+    def _headers(self):
+        """the list of (name, value) tuples the parent uses for everything, this
+        is built from the environ the first time it is needed"""
+        if self._environ_headers is None:
+            self._environ_headers = self._create_headers()
+            self._environ_index = None
+
+        return self._environ_headers
+
+    @_headers.setter
+    def _headers(self, headers):
+        self._environ_headers = headers
+        self._environ_index = None
+
+    @property
+    def _index(self):
+        if self._environ_index is None:
+            self._environ_index = self._create_index(self._headers)
+        return self._environ_index
+
+    @_index.setter
+    def _index(self, index):
+        self._environ_index = index
+
+    def __init__(self, environ=None):
+        """
+        :param environ: dict, the WSGI environ
+        """
+        # we don't call the parent because that would set ._headers and we only
+        # want that if something actually needs it
+        self.environ = environ if environ is not None else {}
+        self._environ_headers = None
+        self._environ_index = None
+
+    def _create_headers(self):
+        """build the (name, value) list from the environ"""
+        headers = []
+        for k, v in self.environ.items():
+            if k.startswith("HTTP_"):
+                k = k[5:]
+
+            elif k not in self.content_names or not v:
+                continue
+
+            if is_py2:
+                v = self._convert_string_type(v)
+            headers.append((self._convert_string_name(k), v))
+        return headers
+
+    def _convert_environ_name(self, name):
+        """converts things like Foo-Bar to HTTP_FOO_BAR, the name of the header in
+        the WSGI environ"""
+        cache = self._environ_name_cache
+        k = cache.get(name, None)
+        if k is None:
+            k = String(name, "iso-8859-1").upper().replace('-', '_')
+            if k not in self.content_names:
+                k = "HTTP_" + k
+            if self._is_cached_name(name, self._convert_string_name(name)):
+                cache[name] = k
+        return k
+
+    def get_all(self, name):
+        if self._environ_headers is None:
+            v = self.get(name)
+            return [] if v is None else [v]
+        return super(EnvironHeaders, self).get_all(name)
+
+    def get(self, name, default=None):
+        if self._environ_headers is None:
+            k = self._convert_environ_name(name)
+            v = self.environ.get(k, None)
+            if v is None or (not v and k in self.content_names):
+                return default
+
+            if is_py2:
+                v = self._convert_string_type(v)
+            return v
+
+        return super(EnvironHeaders, self).get(name, default)
+
+    def child(self):
+        instance = type(self)(self.environ)
+        if self._environ_headers is not None:
+            instance._headers = self._environ_headers
+            instance._index = self._index
+            instance._shared = self._shared = True
+        return instance
+
+    def __deepcopy__(self, memodict=None):
+        instance = type(self)()
+        instance._headers = list(self._headers)
+        return instance
+
+
+class EnvironView(EnvironHeaders, Environ):
+    """Request environ that is a view over a WSGI environ dict
+
+    this holds the environ values that aren't headers (see EnvironHeaders), they
+    are read straight out of the WSGI environ until something iterates or
+    modifies them, then they are copied into the normal Environ list
+
+    :example:
+        environ = EnvironView({"SERVER_PORT": "80", "HTTP_HOST": "example.com"})
+        environ["SERVER_PORT"] # 80
+        "Host" in environ # False
+    """
+    def _create_headers(self):
+        headers = []
+        for k, v in self.environ.items():
+            if not k.startswith("HTTP_") and k not in self.content_names:
+                headers.append((self._convert_string_name(k), v))
+        return headers
+
+    def get_all(self, name):
+        if self._environ_headers is None:
+            k = self._get_environ_name(name)
+            if k:
+                return [self.environ[k]]
+
+            elif self._is_environ_name(name):
+                return []
+
+        return super(EnvironHeaders, self).get_all(name)
+
+    def get(self, name, default=None):
+        if self._environ_headers is None:
+            k = self._get_environ_name(name)
+            if k:
+                return self.environ[k]
+
+            elif self._is_environ_name(name):
+                return default
+
+        return super(EnvironHeaders, self).get(name, default)
+
+    def _get_environ_name(self, name):
+        """return name if it is a key of the WSGI environ this view can see, names
+        in any other form (eg, Server-Port instead of SERVER_PORT) return None and
+        are found by building the full list"""
+        if name in self.environ:
+            if not name.startswith("HTTP_") and name not in self.content_names:
+                return name
+
+    def _is_environ_name(self, name):
+        """return True if name is already in the form of a WSGI environ key (eg,
+        SERVER_PORT or wsgi.input), if _get_environ_name() didn't find a name in
+        this form then building the full list wouldn't find it either"""
+        return "." in name or ("-" not in name and name == name.upper())
+
+
+class QueryString(object):
+    """Parses a query string (eg, foo=1&bar=2&bar=3) into a dict in one pass
+
+    names that appear more than once have a list of values, names without a value
+    (eg, foo&bar=1) have an empty value
+
+    the limits protect the server from query strings that are built to be
+    expensive to parse, they are checked against the raw (still quoted) names
+    and values and 0 means no limit
+
+    :example:
+        QueryString.parse("foo=1&bar=2&bar=3") # {"foo": "1", "bar": ["2", "3"]}
+    """
+    max_fields = environ.QUERY_MAX_FIELDS
+    """the most name=value fields a query string can have"""
+
+    max_name_size = environ.QUERY_MAX_NAME_SIZE
+    """the longest a field name can be"""
+
+    max_value_size = environ.QUERY_MAX_VALUE_SIZE
+    """the longest a field value can be"""
+
+    @classmethod
+    def unquote(cls, s):
+        if "+" in s:
+            s = s.replace("+", " ")
+        if "%" in s:
+            s = urlparse.unquote(s)
+        return s
+
+    @classmethod
+    def parse(cls, query, max_fields=None, max_name_size=None, max_value_size=None):
+        """return name=val&name2=val2 strings into {name: val} dict
+
+        :param query: string, the query string, without the leading ?
+        :param max_fields: int, defaults to .max_fields
+        :param max_name_size: int, defaults to .max_name_size
+        :param max_value_size: int, defaults to .max_value_size
+        :returns: dict
+        """
+        if not query: return {}
+
+        if isinstance(query, bytes):
+            query = String(query)
+
+        if max_fields is None: max_fields = cls.max_fields
+        if max_name_size is None: max_name_size = cls.max_name_size
+        if max_value_size is None: max_value_size = cls.max_value_size
+
+        unquote = cls.unquote
+        d = {}
+        count = 0
+        for field in query.split("&"):
+            if not field: continue
+
+            count += 1
+            if max_fields and count > max_fields:
+                raise ValueError("Query has more than {} fields".format(max_fields))
+
+            k, _, v = field.partition("=")
+            if max_name_size and len(k) > max_name_size:
+                raise ValueError("Query field name is longer than {} characters".format(
+                    max_name_size
+                ))
+
+            if max_value_size and len(v) > max_value_size:
+                raise ValueError("Query field {} is longer than {} characters".format(
+                    k,
+                    max_value_size
+                ))
+
+            k = unquote(k)
+            v = unquote(v)
+            if k in d:
+                kv = d[k]
+                if isinstance(kv, list):
+                    kv.append(v)
+                else:
+                    d[k] = [kv, v]
+
+            else:
+                d[k] = v
+
+        return d
+
+
 class Url(String):
     """a url object on steroids, this is here to make it easy to manipulate urls
     we try to map the supported fields to their urlparse equivalents, with some additions
@@ -211,27 +573,42 @@ class Url(String):
     .base(...) = httop://foo.com/bar/che/...
     .controller(...) = httop://foo.com/bar/...
     """
-    scheme = "http"
-
-    username = None
-
-    password = None
-
-    hostname = ""
-
-    port = None
-
-    netloc = ""
-
-    path = ""
-
-    query_kwargs = {}
-
-    fragment = ""
-
-    class_path = ""
-
-    module_path = ""
+    __slots__ = (
+        "scheme",
+        "username",
+        "password",
+        "hostname",
+        "port",
+        "netloc",
+        "hostloc",
+        "path",
+        "query",
+        "query_kwargs",
+        "fragment",
+        "class_path",
+        "module_path",
+    )
+
+    defaults = {
+        "scheme": "http",
+        "username": None,
+        "password": None,
+        "hostname": "",
+        "port": None,
+        "netloc": "",
+        "path": "",
+        "query_kwargs": {},
+        "fragment": "",
+        "class_path": "",
+        "module_path": "",
+    }
+    """the value of each part when it isn't in the url string or passed in"""
+
+    ports = {
+        "http": 80,
+        "https": 443,
+    }
+    """the standard ports, these are left out of the url string"""
 
     @property
     def root(self):
@@ -262,18 +639,14 @@ class Url(String):
 
     def __new__(cls, urlstring=None, **kwargs):
         parts = cls.merge(urlstring, **kwargs)
-        urlstring = parts.pop("urlstring")
-        instance = super(Url, cls).__new__(cls, urlstring)
-        for k, v in parts.items():
-            setattr(instance, k, v)
+        instance = super(Url, cls).__new__(cls, parts["urlstring"])
+        for k in Url.__slots__:
+            setattr(instance, k, parts[k])
         return instance
 
     @classmethod
     def keys(cls):
-        # we need to ignore property objects also
-        is_valid = lambda k, v: not k.startswith("__") and not callable(v) and not isinstance(v, property)
-        keys = set(k for k, v in inspect.getmembers(cls) if is_valid(k, v))
-        return keys
+        return set(cls.defaults.keys())
 
     @classmethod
     def merge(cls, urlstring="", **kwargs):
@@ -283,21 +656,15 @@ class Url(String):
         # being proxied to 9000 on the machine, but we want to automatically account
         # for things like that and then if custom behavior is needed then this method
         # can be overridden
-        parts = {
-            "hostname": cls.hostname,
-            "port": cls.port,
-            "query_kwargs": dict(cls.query_kwargs),
-            "class_path": cls.class_path,
-            "module_path": cls.module_path,
-            "scheme": cls.scheme,
-            "netloc": cls.netloc,
-            "path": cls.path,
-            "fragment": cls.fragment,
-            "username": cls.username,
-            "password": cls.password,
-        }
+        parts = dict(cls.defaults)
+        parts["query_kwargs"] = dict(parts["query_kwargs"])
+
+        if isinstance(urlstring, Url):
+            # a Url has already been parsed so we can use its parts as they are
+            parts.update(urlstring.string_parts())
+            parts["query_kwargs"].update(urlstring.query_kwargs)
 
-        if urlstring:
+        elif urlstring:
             properties = [
                 "scheme", # 0
                 "netloc", # 1
@@ -341,12 +708,9 @@ class Url(String):
             parts["query"] = cls.unparse_query(parts["query_kwargs"])
 
         for k, v in kwargs.items():
-            parts[k] = v
+            parts[k] = String(v) if isinstance(v, bytes) else v
 
-        ports = {
-            "http": 80,
-            "https": 443,
-        }
+        ports = cls.ports
         domain, port = cls.split_hostname_from_port(parts["hostname"])
         parts["hostname"] = domain
         if port:
@@ -366,7 +730,7 @@ class Url(String):
         port = parts["port"]
         # we don't want common ports to be a part of a .geturl() call, but we do
         # want .port to return them
-        if port and port not in set(ports.values()):
+        if port and port not in ports.values():
             hostloc = '{}:{}'.format(hostloc, port)
         parts["hostloc"] = hostloc
 
@@ -389,24 +753,36 @@ class Url(String):
             parts["query"],
             parts["fragment"],
         ))
+        return parts
 
-        for k in parts:
-            if isinstance(parts[k], bytes):
-                parts[k] = String(parts[k])
+    def string_parts(self, root=False):
+        """return the parts that parsing this url's string would find, this lets a
+        new Url be built from this one without parsing the string again
+
+        :param root: bool, True to only return the scheme and netloc parts
+        :returns: dict
+        """
+        port = self.port
+        if port in self.ports.values():
+            # standard ports aren't in the string
+            port = None
 
+        parts = {
+            "scheme": self.scheme,
+            "hostname": self.hostname,
+            "port": port,
+            "username": self.username,
+            "password": self.password,
+        }
+        if not root:
+            parts["path"] = self.path
+            parts["fragment"] = self.fragment
         return parts
 
     @classmethod
     def parse_query(cls, query):
         """return name=val&name2=val2 strings into {name: val} dict"""
-        if not query: return {}
-
-        if isinstance(query, bytes):
-            query = String(query)
-
-        # https://docs.python.org/2/library/urlparse.html
-        query_kwargs = urlparse.parse_qs(query, True, strict_parsing=True)
-        return cls.normalize_query_kwargs(query_kwargs)
+        return QueryString.parse(query, 0, 0, 0)
 
     @classmethod
     def normalize_query_kwargs(cls, query):
@@ -471,6 +847,12 @@ class Url(String):
     def create(self, *args, **kwargs):
         return type(self)(*args, **kwargs)
 
+    def create_root(self, **kwargs):
+        """create a new instance with this url's scheme and netloc, this is the
+        same as self.create(self.root, **kwargs) but root isn't parsed again"""
+        kwargs.update(self.string_parts(root=True))
+        return self.create(**kwargs)
+
     def add(self, **kwargs):
         """Just a shortcut to change the current url, equivalent to Url(self, **kwargs)"""
         if "path" in kwargs:
@@ -543,7 +925,7 @@ class Url(String):
                 kwargs["path"] = "/".join(paths)
             else:
                 kwargs["path"] = self.module_path
-        return self.create(self.root, **kwargs)
+        return self.create_root(**kwargs)
 
     def controller(self, *paths, **query_kwargs):
         """create a new url object using the controller path as a base
@@ -571,7 +953,7 @@ class Url(String):
                 kwargs["path"] = "/".join(paths)
             else:
                 kwargs["path"] = self.class_path
-        return self.create(self.root, **kwargs)
+        return self.create_root(**kwargs)
 
     def base(self, *paths, **query_kwargs):
         """create a new url object using the current base path as a base
@@ -597,7 +979,7 @@ class Url(String):
                 kwargs["path"] = "/".join(paths)
             else:
                 kwargs["path"] = self.path
-        return self.create(self.root, **kwargs)
+        return self.create_root(**kwargs)
 
     def host(self, *paths, **query_kwargs):
         """create a new url object using the host as a base
@@ -617,7 +999,7 @@ class Url(String):
         :param **query_kwargs: dict, any query string params to add
         """
         kwargs = self._normalize_params(*paths, **query_kwargs)
-        return self.create(self.root, **kwargs)
+        return self.create_root(**kwargs)
 
     def copy(self):
         return self.__deepcopy__()
@@ -767,13 +1149,407 @@ class Host(tuple):
         return netloc
 
 
+class UploadedFile(object):
+    """A file from a multipart/form-data request body
+
+    small files are kept in memory and bigger ones are spooled to a temporary
+    file, either way this acts like a file object that starts at the beginning
+    of the uploaded contents
+
+    for backwards compatibility this can also be used like the dict that file
+    fields used to be (eg, f["filename"], f["content_type"], f["body"])
+    """
+    def __init__(self, fp, filename="", content_type="", size=0):
+        self.fp = fp
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+
+    def read(self, size=-1):
+        return self.fp.read(size)
+
+    def readline(self, size=-1):
+        return self.fp.readline(size)
+
+    def seek(self, offset, whence=0):
+        return self.fp.seek(offset, whence)
+
+    def tell(self):
+        return self.fp.tell()
+
+    def close(self):
+        self.fp.close()
+
+    def __iter__(self):
+        return iter(self.fp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getitem__(self, k):
+        if k == "body":
+            pos = self.tell()
+            self.seek(0)
+            body = self.read()
+            self.seek(pos)
+            return body
+
+        elif k in set(["filename", "content_type", "size"]):
+            return getattr(self, k)
+
+        raise KeyError(k)
+
+    def __deepcopy__(self, memodict=None):
+        # like other streams, uploaded files are passed through instead of copied
+        return self
+
+
+class Multipart(object):
+    """Streaming multipart/form-data parser
+
+    the body is read chunk_size bytes at a time so memory stays bounded no matter
+    how big the uploads are. Form fields are kept in memory, up to max_field_size
+    bytes, and file parts are written to a SpooledTemporaryFile that moves to disk
+    once it is bigger than spool_size bytes
+
+    https://tools.ietf.org/html/rfc7578
+
+    :example:
+        m = Multipart(environ["wsgi.input"], content_type, content_length)
+        for name, value in m:
+            # value is a String for fields and an UploadedFile for files
+            pass
+    """
+    chunk_size = 65536
+    """how many bytes are read from the body at a time"""
+
+    spool_size = 1024 * 1024
+    """file parts bigger than this are written to disk"""
+
+    max_header_size = 65536
+    """the biggest the headers of a part can be"""
+
+    max_field_size = environ.UPLOAD_MAX_FIELD_SIZE
+    """the biggest a form field (a part without a filename) can be, 0 means no
+    limit"""
+
+    file_class = UploadedFile
+
+    param_regex = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:\\.|[^"])*"|[^;]*)')
+
+    @classmethod
+    def parse_header(cls, header):
+        """split a header value like Content-Type or Content-Disposition into its
+        value and params
+
+        :param header: string, eg, 'form-data; name="foo"; filename="bar.txt"'
+        :returns: tuple (value, params)
+        """
+        header = String(header)
+        index = header.find(";")
+        if index < 0:
+            return header.strip().lower(), {}
+
+        params = {}
+        for name, val in cls.param_regex.findall(header[index:]):
+            val = val.strip()
+            if len(val) > 1 and val[0] == val[-1] == '"':
+                val = val[1:-1].replace('\\\\', '\\').replace('\\"', '"')
+            params[name.lower()] = val
+
+        return header[:index].strip().lower(), params
+
+    def __init__(self, fp, content_type, content_length=-1, encoding="", spool_size=None, max_field_size=None):
+        """
+        :param fp: io, the request body stream
+        :param content_type: string, the Content-Type header, this needs to have the
+            boundary param
+        :param content_length: int, how many bytes to read from fp, -1 to read until
+            fp is exhausted
+        :param encoding: string, the encoding of the form fields
+        :param spool_size: int, override the class's spool_size
+        :param max_field_size: int, override the class's max_field_size
+        """
+        self.fp = fp
+        self.content_length = content_length
+        self.encoding = encoding
+        if spool_size is not None:
+            self.spool_size = spool_size
+        if max_field_size is not None:
+            self.max_field_size = max_field_size
+
+        mt, params = self.parse_header(content_type)
+        boundary = params.get("boundary", "")
+        if not mt.startswith("multipart/") or not boundary:
+            raise ValueError("Content-Type {} has no multipart boundary".format(content_type))
+        self.boundary = ByteString(boundary, "latin-1").raw()
+
+    def read_chunks(self):
+        """yield the body chunk_size bytes at a time"""
+        remaining = self.content_length
+        while remaining != 0:
+            size = self.chunk_size if remaining < 0 else min(self.chunk_size, remaining)
+            chunk = self.fp.read(size)
+            if not chunk:
+                break
+
+            if remaining > 0:
+                remaining -= len(chunk)
+            yield chunk
+
+    def read_until(self, buf, chunks, delimiter, write=None):
+        """read from the body until delimiter is found, buf is left holding
+        everything after the delimiter
+
+        :param buf: bytearray, the bytes that have been read but not consumed
+        :param chunks: generator, the read_chunks() generator
+        :param delimiter: bytes, what to look for
+        :param write: callable, the bytes before delimiter are passed to this as
+            they are read, if None they are held in buf and returned instead, this
+            is only for small things like headers since it is capped at
+            max_header_size
+        :returns: bytes, everything before delimiter if write was None
+        """
+        keep = len(delimiter) - 1
+        while True:
+            index = buf.find(delimiter)
+            if index >= 0:
+                ret = bytes(buf[:index])
+                del buf[:index + len(delimiter)]
+                if write:
+                    write(ret)
+                    ret = b""
+                return ret
+
+            if write:
+                if len(buf) > keep:
+                    # the end of buf could be the start of the delimiter
+                    write(bytes(buf[:len(buf) - keep]))
+                    del buf[:len(buf) - keep]
+
+            elif len(buf) > self.max_header_size:
+                raise ValueError("Multipart headers bigger than {} bytes".format(
+                    self.max_header_size
+                ))
+
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError("Multipart body ended before {} was found".format(
+                    String(delimiter, "latin-1")
+                ))
+            buf.extend(chunk)
+
+    def read_headers(self, buf, chunks):
+        """read the headers of a part
+
+        :returns: dict, the lowercase header names with their values
+        """
+        headers = {}
+        line = self.read_until(buf, chunks, b"\r\n")
+        while line:
+            name, _, val = String(line, "latin-1").partition(":")
+            headers[name.strip().lower()] = val.strip()
+            line = self.read_until(buf, chunks, b"\r\n")
+        return headers
+
+    def get_field_write(self, name, parts):
+        """return a write callable for read_until() that appends to parts until
+        the field is bigger than max_field_size
+
+        :param name: string, the field name
+        :param parts: list, the bytes of the field are appended to this
+        :returns: callable
+        """
+        max_field_size = self.max_field_size
+        if not max_field_size:
+            return parts.append
+
+        size = [0]
+        def write(b):
+            size[0] += len(b)
+            if size[0] > max_field_size:
+                raise CallError(413, "Multipart field {} is bigger than {} bytes".format(
+                    name,
+                    max_field_size
+                ))
+            parts.append(b)
+        return write
+
+    def __iter__(self):
+        """yield (name, value) for every part of the body, value is a String for
+        form fields and an UploadedFile for files"""
+        chunks = self.read_chunks()
+        buf = bytearray()
+        delimiter = b"\r\n--" + self.boundary
+
+        # everything before the first boundary is preamble and ignored
+        discard = lambda b: None
+        self.read_until(buf, chunks, delimiter[2:], discard)
+
+        while True:
+            while len(buf) < 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    raise ValueError("Multipart body ended before the closing boundary")
+                buf.extend(chunk)
+
+            if buf[:2] == b"--":
+                # this was the closing boundary, so we're done
+                break
+
+            # get rid of the rest of the boundary line
+            self.read_until(buf, chunks, b"\r\n", discard)
+
+            headers = self.read_headers(buf, chunks)
+            disposition, params = self.parse_header(headers.get("content-disposition", ""))
+            name = params.get("name", "")
+            content_type = headers.get("content-type", "")
+
+            if "filename" in params:
+                fp = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+                self.read_until(buf, chunks, delimiter, fp.write)
+                size = fp.tell()
+                fp.seek(0)
+                value = self.file_class(
+                    fp,
+                    filename=params["filename"],
+                    content_type=content_type,
+                    size=size
+                )
+
+            else:
+                parts = []
+                self.read_until(buf, chunks, delimiter, self.get_field_write(name, parts))
+                ct, ct_params = self.parse_header(content_type)
+                value = String(b"".join(parts), ct_params.get("charset", self.encoding))
+
+            yield name, value
+
+
+class LimitedStream(io.RawIOBase):
+    """Reads at most size bytes from a stream, this makes sure the request body
+    of a keep alive connection can be read until it is exhausted without reading
+    into the next request
+
+    this is raw so wrap it in an io.BufferedReader to read lines
+    """
+    def __init__(self, fp, size):
+        self.fp = fp
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.remaining <= 0:
+            return 0
+
+        data = self.fp.read(min(len(b), self.remaining))
+        if not data:
+            raise IOError("Request body ended with {} bytes left to read".format(
+                self.remaining
+            ))
+
+        n = len(data)
+        b[:n] = data
+        self.remaining -= n
+        return n
+
+
+class ChunkedStream(io.RawIOBase):
+    """Decodes a Transfer-Encoding: chunked request body as it is read
+
+    https://tools.ietf.org/html/rfc7230#section-4.1
+
+    this is raw so wrap it in an io.BufferedReader to read lines
+    """
+    max_line_size = 65536
+    """the biggest a chunk size or trailer line can be"""
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.remaining = 0
+        self.done = False
+
+    def readable(self):
+        return True
+
+    def readline_raw(self):
+        line = self.fp.readline(self.max_line_size + 1)
+        if not line:
+            raise IOError("Chunked request body ended before the last chunk")
+
+        if len(line) > self.max_line_size:
+            raise ValueError("Chunked request body line bigger than {} bytes".format(
+                self.max_line_size
+            ))
+        return line
+
+    def readinto(self, b):
+        if self.done:
+            return 0
+
+        if self.remaining == 0:
+            line = self.readline_raw()
+            try:
+                # chunk extensions (anything after a semi-colon) are ignored
+                self.remaining = int(line.split(b";", 1)[0].strip(), 16)
+
+            except ValueError:
+                raise ValueError("Invalid chunk size {}".format(String(line, "latin-1")))
+
+            if self.remaining == 0:
+                # the last chunk, skip any trailers until the blank line
+                while self.readline_raw().strip():
+                    pass
+                self.done = True
+                return 0
+
+        data = self.fp.read(min(len(b), self.remaining))
+        if not data:
+            raise IOError("Chunked request body ended with {} bytes left in chunk".format(
+                self.remaining
+            ))
+
+        n = len(data)
+        b[:n] = data
+        self.remaining -= n
+        if self.remaining == 0:
+            # every chunk's data is followed by a CRLF
+            self.readline_raw()
+        return n
+
+
 class Http(object):
+    """The parts Request and Response share
+
+    the fixed attributes are kept in __slots__ and the headers aren't created
+    until something needs them, the instances still have a __dict__ so any other
+    attribute can be set on them
+    """
+    __slots__ = ("_headers", "__dict__", "__weakref__")
+
     def __init__(self):
-        self.headers = Headers()
+        self._headers = None
+
+    @property
+    def headers(self):
+        headers = self._headers
+        if headers is None:
+            headers = self._headers = Headers()
+        return headers
+
+    @headers.setter
+    def headers(self, headers):
+        self._headers = headers
 
     def has_header(self, header_name):
         """return true if the header is set"""
-        return header_name in self.headers
+        headers = self._headers
+        return header_name in headers if headers is not None else False
 
     def set_headers(self, headers):
         """replace all headers with passed in headers"""
@@ -791,7 +1567,8 @@ class Http(object):
     def get_header(self, header_name, default_val=None):
         """try as hard as possible to get a a response header of header_name,
         rreturn default_val if it can't be found"""
-        return self.headers.get(header_name, default_val)
+        headers = self._headers
+        return headers.get(header_name, default_val) if headers is not None else default_val
 
     def find_header(self, header_names, default_val=None):
         """given a list of headers return the first one you can, default_val if you
@@ -810,8 +1587,11 @@ class Http(object):
 
     def _parse_query_str(self, query):
         """return name=val&name2=val2 strings into {name: val} dict"""
-        u = Url(query=query)
-        return u.query_kwargs
+        try:
+            return QueryString.parse(query)
+
+        except ValueError as e:
+            raise CallError(400, String(e))
 
     def _build_body_str(self, b):
         # we are returning the body, let's try and be smart about it and match content type
@@ -841,11 +1621,27 @@ class Http(object):
             memodict.setdefault("controller_info", self.controller_info)
 
         instance = type(self)()
-        return Deepcopy.copy(self, memodict, instance)
+        instance = Deepcopy.copy(self, memodict, instance)
+        if self._headers is not None:
+            instance.headers = Deepcopy.copy(self._headers, memodict)
+        return instance
 
     def is_json(self):
+        """True if the body is a json document, streaming formats like ndjson are
+        lines of json documents so they don't count"""
+        ct = self.get_header('Content-Type')
+        if ct:
+            ct = ct.lower()
+            return ct.rfind("json") >= 0 and ct.rfind("ndjson") < 0
+        return False
+
+    def is_ndjson(self):
+        """True if the body is newline delimited json, one json document per line"""
         ct = self.get_header('Content-Type')
-        return ct.lower().rfind("json") >= 0 if ct else False
+        if ct:
+            ct = ct.lower()
+            return ct.rfind("ndjson") >= 0
+        return False
 
 
 class Request(Http):
@@ -866,17 +1662,47 @@ class Request(Http):
     query_kwargs -- tied to query, the values in query but converted to a dict {name: val}
     '''
 
-    environ = None
-    """holds all the values that aren't considered headers but usually get passed with the request"""
-
-    raw_request = None
-    """the original raw request that was filtered through one of the interfaces"""
+    __slots__ = (
+        "_environ",
+        "raw_request", # the original raw request that was filtered through one of the interfaces
+        "method", # the http method (GET, POST)
+        "controller_info", # the controller information for the request, populated from the Call
+        "_body",
+        "_body_args",
+        "_body_kwargs",
+        "_body_stream",
+        "_body_loader",
+        "_body_error",
+        "_url",
+        "_url_root",
+        # the memoized _property values
+        "_encoding",
+        "_ips",
+        "_ip",
+        "_host",
+        "_scheme",
+        "_port",
+        "_path",
+        "_path_args",
+        "_query",
+        "_query_kwargs",
+    )
+
+    ndjson_subtypes = set(["x-ndjson", "ndjson"])
+    """the Accept subtypes that mean the client wants newline delimited json"""
 
-    method = None
-    """the http method (GET, POST)"""
-
-    controller_info = None
-    """will hold the controller information for the request, populated from the Call"""
+    @property
+    def environ(self):
+        """holds all the values that aren't considered headers but usually get
+        passed with the request"""
+        environ = self._environ
+        if environ is None:
+            environ = self._environ = Environ()
+        return environ
+
+    @environ.setter
+    def environ(self, environ):
+        self._environ = environ
 
     @property
     def accept_encoding(self):
@@ -896,7 +1722,7 @@ class Request(Http):
         encoding = None
         ct = self.get_header('content-type')
         if ct:
-            ah = AcceptHeader(ct)
+            ah = AcceptHeader.parse(ct)
             if ah.media_types:
                 encoding = ah.media_types[0][2].get("charset", None)
 
@@ -988,6 +1814,12 @@ class Request(Http):
 
         return r
 
+    @property
+    def queue_wait(self):
+        """return how many seconds the request waited for a server worker before
+        it was handled, 0.0 if the server doesn't keep track of it"""
+        return float(self.environ.get("endpoints.queue_wait", 0.0))
+
     @_property
     def host(self):
         """return the request host"""
@@ -1007,28 +1839,36 @@ class Request(Http):
     @property
     def host_url(self):
         """return the request host as a Url instance"""
-        return self.url.host_url()
+        return self.url.host()
 
     @property
     def url(self):
-        """return the full request url as an Url() instance"""
+        """return the full request url as an Url() instance
+
+        the Url is cached until one of the request values it was built from changes
+        """
         scheme = self.scheme
         host = self.host
         path = self.path
         query = self.query
         port = self.port
 
-        # normalize the port
-        host_domain, host_port = Url.split_hostname_from_port(host)
-        if host_port:
-            port = host_port
-
         class_path = ""
         module_path = ""
         if self.controller_info:
             class_path = self.controller_info.get("class_path", "")
             module_path = self.controller_info.get("module_path", "")
 
+        key = (scheme, host, path, query, port, class_path, module_path)
+        cached = getattr(self, "_url", None)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        # normalize the port
+        host_domain, host_port = Url.split_hostname_from_port(host)
+        if host_port:
+            port = host_port
+
         u = Url(
             scheme=scheme,
             hostname=host,
@@ -1038,8 +1878,46 @@ class Request(Http):
             class_path=class_path,
             module_path=module_path
         )
+        self._url = (key, u)
         return u
 
+    def url_for(self, controller_class, *paths, **query_kwargs):
+        """return a link to controller_class
+
+        this is a lot faster than .url.controller() because the controller's path
+        comes from the router's cached reverse routes and the link is just joined
+        onto the cached scheme://netloc of the request, no Url is created
+
+        :example:
+            # http://example.com/users/1234/posts?page=2
+            request.url_for(Users, 1234, "posts", page=2)
+
+        :param controller_class: type, a Controller child the router can route to
+        :param *paths: path segments that will be added after the controller's path
+        :param **query_kwargs: the query string of the link
+        :returns: string, the full url
+        """
+        router = self.controller_info.get("router", None) if self.controller_info else None
+        if not router:
+            raise ValueError("Links can only be built for requests that have been routed")
+
+        u = self.url
+        root = getattr(self, "_url_root", None)
+        if not root or root[0] is not u:
+            root = (u, u.root)
+            self._url_root = root
+
+        link = root[1] + router.get_url_path(controller_class)
+        if paths:
+            link += "/" + "/".join(Url.normalize_paths(*(
+                p if isinstance(p, (list, tuple)) else String(p) for p in paths
+            )))
+
+        if query_kwargs:
+            link += "?" + Url.unparse_query(query_kwargs)
+
+        return link
+
     @_property
     def path(self):
         """path part of a url (eg, http://host.com/path?query=string)"""
@@ -1080,13 +1958,148 @@ class Request(Http):
         kwargs.update(self.body_kwargs)
         return kwargs
 
+    @property
+    def body(self):
+        """the raw request body, usually a stream or a string depending on the
+        interface, this will load the body if it hasn't been loaded yet"""
+        self.load_body()
+        return self._body
+
+    @body.setter
+    def body(self, v):
+        self.clear_body_loader()
+        self._body = v
+
+    @property
+    def body_args(self):
+        """the positional arguments found in the body (eg, a json list), these
+        are parsed on first access"""
+        self.load_body()
+        body_args = self._body_args
+        if body_args is None:
+            body_args = self._body_args = []
+        return body_args
+
+    @body_args.setter
+    def body_args(self, v):
+        self.clear_body_loader()
+        self._body_args = v
+
+    @property
+    def body_kwargs(self):
+        """the keyword arguments found in the body (eg, form fields or a json
+        dict), these are parsed on first access"""
+        self.load_body()
+        body_kwargs = self._body_kwargs
+        if body_kwargs is None:
+            body_kwargs = self._body_kwargs = {}
+        return body_kwargs
+
+    @body_kwargs.setter
+    def body_kwargs(self, v):
+        self.clear_body_loader()
+        self._body_kwargs = v
+
+    @property
+    def body_stream(self):
+        """a file like object the body can be read from as it arrives, iterating it
+        yields lines. This is only useful when the body hasn't been parsed into
+        body_args and body_kwargs (eg, text/csv or application/x-ndjson bodies)"""
+        self.load_body()
+        return self._body_stream
+
+    @body_stream.setter
+    def body_stream(self, v):
+        self.clear_body_loader()
+        self._body_stream = v
+
     def __init__(self):
-        self.environ = Environ()
-        self.body = None
-        self.body_args = []
-        self.body_kwargs = {}
+        # the environ and body containers are created when they are first used
+        self._environ = None
+        self.raw_request = None
+        self.method = None
+        self.controller_info = None
+        self._body = None
+        self._body_args = None
+        self._body_kwargs = None
+        self._body_stream = None
+        self._body_loader = None
+        self._body_error = None
         super(Request, self).__init__()
 
+    def __deepcopy__(self, memodict=None):
+        instance = super(Request, self).__deepcopy__(memodict)
+        if self._environ is not None:
+            instance.environ = Deepcopy.copy(self._environ, memodict)
+
+        # the body values are private so Deepcopy won't copy them on its own
+        instance.body = self.body
+        instance.body_stream = self.body_stream
+        instance.body_args = Deepcopy.copy(self.body_args)
+        instance.body_kwargs = Deepcopy.copy(self.body_kwargs)
+        return instance
+
+    def child(self):
+        """return a lightweight copy of this request
+
+        unlike .copy() nothing is deep copied, the headers and environ are shared
+        with this request until the child modifies them, the other public
+        attributes are shared references, and the body is only taken from this
+        request if the child asks for it. The memoized values (eg, path, query)
+        aren't carried over, just like .copy()
+
+        :returns: Request, the same type as this instance
+        """
+        instance = type(self)()
+        for k, v in Deepcopy.attrs(self).items():
+            setattr(instance, k, v)
+
+        if self._headers is not None:
+            instance.headers = self._headers.child()
+        if self._environ is not None:
+            instance.environ = self._environ.child()
+        instance.controller_info = None
+
+        def loader(request):
+            request._body = self.body
+            request._body_stream = self.body_stream
+            request._body_args = list(self.body_args)
+            request._body_kwargs = dict(self.body_kwargs)
+        instance.set_body_loader(loader)
+        return instance
+
+    def set_body_loader(self, loader):
+        """defer reading and decoding the body until .body, .body_args, or
+        .body_kwargs is first accessed, this way a request that fails before it
+        needs its body (eg, a 404) never has to pay for parsing it
+
+        :param loader: callable, loader(request) should set the body properties
+        """
+        self._body_loader = loader
+
+    def clear_body_loader(self):
+        """throw away the body loader, this is called when a body property is
+        set so the body that is being replaced is never loaded"""
+        self._body_loader = None
+        self._body_error = None
+
+    def load_body(self):
+        """run the body loader set with .set_body_loader() if it hasn't ran yet"""
+        if self._body_error:
+            # a body that failed to load shouldn't look like an empty body
+            raise self._body_error
+
+        loader = self._body_loader
+        if loader:
+            # clear it first, the loader will set the body properties
+            self._body_loader = None
+            try:
+                loader(self)
+
+            except Exception as e:
+                self._body_error = e
+                raise
+
     def version(self, content_type="*/*"):
         """
         versioning is based off of this post 
@@ -1095,13 +2108,28 @@ class Request(Http):
         v = ""
         accept_header = self.get_header('accept', "")
         if accept_header:
-            a = AcceptHeader(accept_header)
+            a = AcceptHeader.parse(accept_header)
             for mt in a.filter(content_type):
                 v = mt[2].get("version", "")
                 if v: break
 
         return v
 
+    def accepts_ndjson(self):
+        """True if the client's Accept header prefers newline delimited json over
+        json, this is used to decide how to stream generator responses"""
+        accept_header = self.get_header('accept', "")
+        if accept_header:
+            for mt in AcceptHeader.parse(accept_header):
+                subtype = mt[0][-1].lower()
+                if subtype in self.ndjson_subtypes:
+                    return True
+
+                elif subtype == "json" or subtype == "*":
+                    break
+
+        return False
+
     def is_method(self, method):
         """return True if the request method matches the passed in method"""
         return self.method.upper() == method.upper()
@@ -1200,8 +2228,20 @@ class Response(Http):
     to a string. The reason _body isn't name body_kwargs is because _body can be
     almost anything (not just a dict)
     """
+    __slots__ = (
+        "encoding",
+        "compression", # the Content-Encoding the body will be compressed with
+        "_code",
+        "_status",
+        "_body",
+        "_body_bytes", # the encoded body if it was needed before it was sent
+    )
 
-    encoding = ""
+    def __init__(self):
+        self.encoding = ""
+        self.compression = ""
+        self._body_bytes = None
+        super(Response, self).__init__()
 
     @property
     def code(self):
@@ -1249,6 +2289,8 @@ class Response(Http):
 
     @body.setter
     def body(self, v):
+        if v is not getattr(self, "_body", None):
+            self._body_bytes = None
         self._body = v
         if self.is_file():
             filepath = getattr(v, "name", "")
@@ -1257,6 +2299,13 @@ class Response(Http):
                 filesize = os.path.getsize(filepath)
                 self.set_header("Content-Type", mt)
                 self.set_header("Content-Length", filesize)
+                self.set_header("Accept-Ranges", "bytes")
+                if not self.has_header("Last-Modified"):
+                    # If-Range requests compare against this
+                    self.set_header(
+                        "Last-Modified",
+                        formatdate(os.path.getmtime(filepath), usegmt=True)
+                    )
                 logger.debug(
                     "Response body set to file: \"{}\" with mimetype: \"{}\" and size: {}".format(
                         filepath,
@@ -1277,6 +2326,125 @@ class Response(Http):
         # http://stackoverflow.com/questions/1661262/check-if-object-is-file-like-in-python
         return hasattr(self._body, "read") if self.has_body() else False
 
+    def is_not_modified(self, request):
+        """return True if the request's If-None-Match or If-Modified-Since header
+        says the client already has this response, so it can be sent a 304
+
+        https://tools.ietf.org/html/rfc7232#section-6
+
+        :param request: Request, a GET or HEAD request
+        :returns: bool
+        """
+        if not request.is_method("GET") and not request.is_method("HEAD"):
+            return False
+
+        if_none_match = request.get_header("If-None-Match")
+        if if_none_match:
+            # If-Modified-Since is ignored when If-None-Match is sent
+            etag = self.get_header("ETag")
+            if not etag: return False
+            if if_none_match.strip() == "*": return True
+
+            # If-None-Match uses the weak comparison
+            if etag.startswith("W/"): etag = etag[2:]
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"): tag = tag[2:]
+                if tag == etag: return True
+
+            return False
+
+        if_modified_since = request.get_header("If-Modified-Since")
+        if if_modified_since:
+            last_modified = self.get_header("Last-Modified")
+            if last_modified:
+                ims = parsedate_tz(if_modified_since)
+                lm = parsedate_tz(last_modified)
+                if ims and lm:
+                    return mktime_tz(lm) <= mktime_tz(ims)
+
+        return False
+
+    def set_range(self, range_header, if_range=""):
+        """turn a file body into a 206 partial response if range_header asks for
+        a single byte range of it, the file is moved to the start of the range
+        and Content-Length becomes the size of the range
+
+        multiple ranges and malformed headers are ignored so the whole file is
+        sent, which the spec allows, and a range that starts past the end of the
+        file makes this a 416 response
+
+        https://tools.ietf.org/html/rfc7233
+
+        :param range_header: string, the request's Range header (eg, bytes=0-499)
+        :param if_range: string, the request's If-Range header, if it doesn't
+            match the ETag or Last-Modified header the whole file is sent
+        :returns: bool, True if the code was changed to 206 or 416
+        """
+        if not range_header or not self.is_file(): return False
+
+        size = self.get_header("Content-Length")
+        if size is None: return False
+        size = int(size)
+
+        if if_range:
+            if if_range != self.get_header("ETag") and if_range != self.get_header("Last-Modified"):
+                return False
+
+        body = self._body
+        if not isinstance(body.read(0), bytes):
+            # a text file can't seek to byte offsets
+            return False
+
+        units, _, byte_range = range_header.partition("=")
+        if units.strip().lower() != "bytes" or "," in byte_range:
+            return False
+
+        start, sep, end = byte_range.strip().partition("-")
+        if not sep: return False
+
+        try:
+            if start:
+                start = int(start)
+                end = min(int(end), size - 1) if end else size - 1
+                if end < start and start < size: return False
+
+            else:
+                # a suffix range is the last end bytes of the file
+                end = int(end)
+                if end > 0:
+                    start = max(0, size - end)
+                    end = size - 1
+
+                else:
+                    start = size
+
+        except ValueError:
+            return False
+
+        if start >= size:
+            self.code = 416
+            self.set_header("Content-Range", "bytes */{}".format(size))
+            self.headers.pop("Content-Length", None)
+            body.close()
+            self._body = None
+
+        else:
+            body.seek(start)
+            self.code = 206
+            self.set_header("Content-Range", "bytes {}-{}/{}".format(start, end, size))
+            self.set_header("Content-Length", end - start + 1)
+
+        return True
+
+    def is_iterator(self):
+        """return True if the response body is a generator or iterator whose values
+        should be streamed to the client as they are produced"""
+        if not self.has_body(): return False
+        body = self._body
+        if hasattr(body, "read"): return False
+        return hasattr(body, "__next__") or hasattr(body, "next")
+
     def set_cors_headers(self, request_headers, custom_response_headers=None):
         allow_headers = request_headers['Access-Control-Request-Headers']
         allow_method = request_headers['Access-Control-Request-Method']
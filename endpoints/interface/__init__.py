@@ -4,14 +4,16 @@ import os
 import logging
 import json
 import sys
-from functools import partial
+import time
+import zlib
 
-from ..http import Request, Response
+from ..http import Request, Response, Url, Multipart
 from .. import environ
 from ..call import Router, Call
 from ..decorators import _property
 from ..exception import CallError, Redirect, CallStop, AccessDenied
-from ..utils import ByteString, JSONEncoder
+from ..utils import ByteString, String, JSONEncoder, JSONCodec
+from ..compat.imports import parse as urlparse
 
 
 logger = logging.getLogger(__name__)
@@ -33,13 +35,16 @@ class Payload(object):
     still be great to have a class like this that all the other interfaces wrap
     in order to send/receive data via websockets
     """
+    json_class = JSONCodec.find(environ.JSON_CODEC)
+    """the endpoints.utils.JSONCodec compatible class the payloads are encoded with"""
+
     @classmethod
     def loads(cls, raw):
-        return json.loads(raw)
+        return cls.json_class.loads(raw)
 
     @classmethod
     def dumps(cls, kwargs):
-        return json.dumps(kwargs, cls=JSONEncoder)
+        return cls.json_class.dumps(kwargs)
 
 
 # TODO -- I don't think this is needed
@@ -117,10 +122,36 @@ class BaseServer(object):
     """the endpoints.call.Call compatible class that should be used to make a
     Call() instance"""
 
+    multipart_class = Multipart
+    """the endpoints.http.Multipart compatible class that is used to parse
+    multipart/form-data request bodies"""
+
     connection_class = None
     """the endpoints.interface.BaseConnection compatible class that is used for long
     running connections like websockets"""
 
+    json_class = JSONCodec.find(environ.JSON_CODEC)
+    """the endpoints.utils.JSONCodec compatible class that decodes json request
+    bodies and encodes json responses"""
+
+    compression_level = environ.COMPRESSION_LEVEL
+    """the zlib level responses are compressed with, 0 turns compression off"""
+
+    compression_min_size = environ.COMPRESSION_MIN_SIZE
+    """bodies smaller than this many bytes aren't compressed"""
+
+    compression_types = set(t.strip().lower() for t in environ.COMPRESSION_TYPES.split(",") if t.strip())
+    """the content types that will be compressed, type/* matches every subtype"""
+
+    compression_encodings = ["gzip", "deflate"]
+    """the supported Content-Encodings, in the order the server prefers them"""
+
+    compression_wbits = {
+        "gzip": zlib.MAX_WBITS | 16,
+        "deflate": zlib.MAX_WBITS,
+    }
+    """the zlib wbits that produce each Content-Encoding's format"""
+
     @property
     def hostloc(self):
         """Return host:port string that the server is using to answer requests"""
@@ -144,6 +175,64 @@ class BaseServer(object):
             if k.endswith("_class"):
                 setattr(self, k, v)
 
+        if kwargs.get("preload", False) or kwargs.get("warmup", None):
+            self.preload(warmup=kwargs.get("warmup", None))
+
+    def preload(self, warmup=None):
+        """Import every controller module and compile all the routing tables, this
+        is called before the server starts listening when the preload flag is
+        passed in, so the first request to each endpoint isn't slower than the rest
+
+        :param warmup: list, request paths (eg, "/foo" or "POST /foo/bar?che=1")
+            that will be handled after everything is loaded, the responses are
+            thrown away
+        """
+        start = time.time()
+        router = self.create_router()
+        timings = router.preload()
+        for module_name, seconds in timings:
+            logger.info("Preloaded {} in {:.1f} ms".format(module_name, seconds * 1000.0))
+
+        logger.info("Preloaded {} controller modules in {:.1f} ms".format(
+            len(timings),
+            (time.time() - start) * 1000.0
+        ))
+
+        for path in (warmup or []):
+            self.warmup(path)
+
+    def warmup(self, path):
+        """Handle a synthetic request for path so everything needed to answer it is
+        loaded before a real request comes in
+
+        :param path: string, the request path optionally prefixed by the http
+            method, GET is the default method (eg, "POST /foo?bar=1")
+        :returns: Response
+        """
+        method = "GET"
+        bits = path.split(None, 1)
+        if len(bits) > 1:
+            method, path = bits
+
+        req = self.request_class()
+        req.method = method.upper()
+        if "?" in path:
+            req.path, req.query = path.split("?", 1)
+        else:
+            req.path = path
+
+        start = time.time()
+        c = self.create_call(None, request=req)
+        c.quiet = True
+        res = c.handle()
+        logger.info("Warmed up {} {} with {} in {:.1f} ms".format(
+            req.method,
+            path,
+            res.code,
+            (time.time() - start) * 1000.0
+        ))
+        return res
+
     def create_connection(self, **kwargs):
         return self.connection_class(self, **kwargs)
 
@@ -179,7 +268,12 @@ class BaseServer(object):
         """
         body_args = []
         body_kwargs = {}
-        b = json.loads(body)
+        try:
+            b = self.json_class.loads(body)
+
+        except ValueError as e:
+            raise CallError(400, "Could not decode json body: {}".format(e))
+
         if isinstance(b, list):
             body_args = b
 
@@ -191,6 +285,46 @@ class BaseServer(object):
 
         return body_args, body_kwargs
 
+    def get_request_body_form(self, body, **kwargs):
+        """Returns the body kwargs from a x-www-form-urlencoded body
+
+        :param body: string, the urlencoded body
+        :param **kwargs:
+        :returns: dict, the kwargs ready to be set into Request
+        """
+        if isinstance(body, bytes):
+            body = String(body)
+        return Url.normalize_query_kwargs(urlparse.parse_qs(body, True))
+
+    def get_request_body_multipart(self, body, content_type, content_length=-1, **kwargs):
+        """Returns the body kwargs from a multipart/form-data body
+
+        the body is streamed so uploaded files are never completely in memory, they
+        are set into the kwargs as http.UploadedFile instances
+
+        :param body: io, the body stream
+        :param content_type: string, the Content-Type header with the boundary
+        :param content_length: int, how much of body to read, -1 for all of it
+        :param **kwargs:
+        :returns: dict, the kwargs ready to be set into Request
+        """
+        body_kwargs = {}
+        try:
+            parts = self.multipart_class(
+                body,
+                content_type,
+                content_length,
+                spool_size=environ.UPLOAD_SPOOL_SIZE,
+                max_field_size=environ.UPLOAD_MAX_FIELD_SIZE,
+            )
+            for name, value in parts:
+                body_kwargs.setdefault(name, []).append(value)
+
+        except ValueError as e:
+            raise CallError(400, "Could not parse multipart body: {}".format(e))
+
+        return Url.normalize_query_kwargs(body_kwargs)
+
     def create_response(self, **kwargs):
         """create the endpoints understandable response instance that is used to
         return output to the client"""
@@ -201,6 +335,9 @@ class BaseServer(object):
         of a wsgi request, so this will iterate the body and make sure it is a bytes
         string because wsgiref requires an actual bytes instance, a child class won't work
 
+        if set_response_compression() picked a Content-Encoding the body is
+        compressed as it is sent
+
         :returns: a generator that yields bytes strings
         """
         if not response.has_body(): return
@@ -211,14 +348,32 @@ class BaseServer(object):
             if body.closed:
                 raise IOError("cannot read streaming body because pointer is closed")
 
-            # http://stackoverflow.com/questions/15599639/whats-perfect-counterpart-in-python-for-while-not-eof
-            for chunk in iter(partial(body.read, 8192), ''):
-                yield ByteString(chunk, response.encoding).raw()
+            chunks = self.create_response_body_file(response)
 
-            # close the pointer since we've consumed it
-            body.close()
+        elif response.is_iterator():
+            chunks = self.create_response_body_stream(response, json_encoder=json_encoder, **kwargs)
 
-        elif response.is_json():
+        else:
+            chunks = [self.create_response_body_bytes(response, json_encoder=json_encoder, **kwargs)]
+
+        if response.compression:
+            chunks = self.create_response_body_compressed(response, chunks)
+
+        for chunk in chunks:
+            yield chunk
+
+    def create_response_body_bytes(self, response, json_encoder=JSONEncoder, **kwargs):
+        """encode a body that isn't a file or iterator
+
+        :param response: Response
+        :param json_encoder: JSONEncoder, a custom encoder is passed to json.dumps
+        :returns: bytes, the encoded body
+        """
+        if response._body_bytes is not None:
+            return response._body_bytes
+
+        body = response.body
+        if response.is_json():
             # TODO ???
             # I don't like this, if we have a content type but it isn't one
             # of the supported ones we were returning the exception, which threw
@@ -226,12 +381,211 @@ class BaseServer(object):
             # my thought is we could have a body_type_subtype method that would 
             # make it possible to easily handle custom types
             # eg, "application/json" would become: self.body_application_json(b, is_error)
-            body = json.dumps(body, cls=json_encoder)
-            yield ByteString(body, response.encoding).raw()
+            if json_encoder is JSONEncoder:
+                return self.json_class.dumpb(body, response.encoding)
+
+            else:
+                body = json.dumps(body, cls=json_encoder)
+                return ByteString(body, response.encoding).raw()
 
         else:
             # just return a string representation of body if no content type
-            yield ByteString(body, response.encoding).raw()
+            return ByteString(body, response.encoding).raw()
+
+    def create_response_body_compressed(self, response, chunks, **kwargs):
+        """compress chunks with response.compression as they are produced
+
+        streamed bodies are flushed after every chunk so the client gets each
+        chunk when it is sent instead of when the compressor's buffer fills up
+
+        :param response: Response
+        :param chunks: iterable, the bytes chunks of the body
+        :returns: a generator that yields compressed bytes strings
+        """
+        wbits = self.compression_wbits[response.compression]
+        compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, wbits)
+        flush = response.is_iterator()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if flush:
+                data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    def get_response_compression(self, accept_encoding):
+        """find the supported content coding the client prefers
+
+        :param accept_encoding: string, the request's Accept-Encoding header
+            (eg, "gzip, deflate;q=0.5")
+        :returns: string, one of .compression_wbits keys or "" for no compression
+        """
+        qs = {}
+        for coding in accept_encoding.split(","):
+            name, _, params = coding.partition(";")
+            name = name.strip().lower()
+            if not name: continue
+
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    continue
+
+            qs[name] = q
+
+        ret = ""
+        best = 0.0
+        for name in self.compression_encodings:
+            q = qs.get(name, qs.get("*", 0.0))
+            if q > best:
+                ret = name
+                best = q
+
+        return ret
+
+    def set_response_compression(self, request, response, **kwargs):
+        """decide if the response body should be compressed and set the headers,
+        this has to be called before the headers are sent to the client
+
+        compression is only used for .compression_types bodies of at least
+        .compression_min_size bytes, and never for responses that already have a
+        Content-Encoding or are a Range response
+
+        :param request: Request, its Accept-Encoding header is negotiated
+        :param response: Response, .compression will be set if it is compressed
+        :returns: string, the Content-Encoding that will be used or ""
+        """
+        response.compression = ""
+        if not self.compression_level or not response.has_body(): return ""
+        if response.code in (204, 304) or response.has_header("Content-Encoding"): return ""
+        if response.has_header("Content-Range"): return ""
+
+        content_type = response.get_header("Content-Type", "")
+        content_type = content_type.partition(";")[0].strip().lower()
+        if not content_type: return ""
+        if content_type not in self.compression_types:
+            if "{}/*".format(content_type.partition("/")[0]) not in self.compression_types:
+                return ""
+
+        if not response.is_iterator():
+            size = response.get_header("Content-Length")
+            if size is None and not response.is_file():
+                # the body has to be encoded to know its size, so it is kept
+                # on the response and doesn't need to be encoded again
+                response._body_bytes = self.create_response_body_bytes(response)
+                size = len(response._body_bytes)
+
+            if size is not None and int(size) < self.compression_min_size:
+                return ""
+
+        compression = self.get_response_compression(request.get_header("Accept-Encoding", ""))
+
+        # whether this is compressed depends on the client so caches need to
+        # know the response varies by Accept-Encoding
+        vary = response.get_header("Vary", "")
+        if "accept-encoding" not in vary.lower():
+            response.set_header("Vary", "{}, Accept-Encoding".format(vary) if vary else "Accept-Encoding")
+
+        if compression:
+            response.compression = compression
+            response.set_header("Content-Encoding", compression)
+            response.headers.pop("Content-Length", None)
+
+            # the compressed bytes are different so a strong ETag would be wrong
+            etag = response.get_header("ETag")
+            if etag and not etag.startswith("W/"):
+                response.set_header("ETag", "W/{}".format(etag))
+
+        return compression
+
+    def create_response_body_file(self, response, **kwargs):
+        """read a file body in chunks of environ.RESPONSE_CHUNK_SIZE, if the file
+        has a Content-Length (eg, a Range response) only that many bytes are sent
+
+        the file is closed once it has been read
+
+        :param response: Response, the response with a file body
+        :returns: a generator that yields bytes strings
+        """
+        body = response.body
+        chunk_size = environ.RESPONSE_CHUNK_SIZE
+        length = response.get_header("Content-Length")
+        length = int(length) if length is not None else -1
+        try:
+            while length:
+                chunk = body.read(chunk_size if length < 0 else min(chunk_size, length))
+                if not chunk: break
+
+                if not isinstance(chunk, bytes):
+                    chunk = ByteString(chunk, response.encoding).raw()
+
+                elif length > 0:
+                    length -= len(chunk)
+
+                yield chunk
+
+        finally:
+            # close the pointer since we've consumed it
+            body.close()
+
+    def create_response_body_stream(self, response, json_encoder=JSONEncoder, **kwargs):
+        """stream a generator or iterator body to the client as its values are
+        produced instead of building the whole body first
+
+        json bodies are encoded one value at a time into a json array, or into
+        newline delimited json if the response is ndjson, and the encoded values
+        are sent in chunks of about environ.RESPONSE_CHUNK_SIZE bytes
+
+        :param response: Response, the response with an iterator body
+        :param json_encoder: JSONEncoder, a custom encoder is passed to json.dumps
+        :returns: a generator that yields bytes strings
+        """
+        encoding = response.encoding
+        if json_encoder is JSONEncoder:
+            dumpb = self.json_class.dumpb
+        else:
+            dumpb = lambda v, encoding: ByteString(json.dumps(v, cls=json_encoder), encoding).raw()
+
+        if response.is_ndjson():
+            start, separator, end = b"", b"\n", b"\n"
+
+        elif response.is_json():
+            start, separator, end = b"[", b",", b"]"
+
+        else:
+            # anything else is sent the way it was yielded
+            start, separator, end = b"", b"", b""
+            dumpb = lambda v, encoding: ByteString(v, encoding).raw()
+
+        chunk_size = environ.RESPONSE_CHUNK_SIZE
+        chunk = [start]
+        size = len(start)
+        count = 0
+        for value in response.body:
+            if count:
+                chunk.append(separator)
+                size += len(separator)
+
+            b = dumpb(value, encoding)
+            chunk.append(b)
+            size += len(b)
+            count += 1
+            if size >= chunk_size:
+                yield b"".join(chunk)
+                chunk = []
+                size = 0
+
+        if count or start:
+            # an empty json array is still [] but empty ndjson has no lines
+            chunk.append(end)
+
+        chunk = b"".join(chunk)
+        if chunk:
+            yield chunk
 
     def create_call(self, raw_request, request=None, response=None, router=None, **kwargs):
         """create a call object that has endpoints understandable request and response
@@ -285,8 +639,9 @@ class BaseWebsocketServer(BaseServer):
             interpretted
         :returns: a new Request instance to be used for this specific call
         """
-        ws_req = request.copy()
-        ws_req.controller_info = None
+        # the child shares the headers and environ of the connection's request
+        # instead of copying them for every message
+        ws_req = request.child()
 
         # just in case we need access to the original request object or the raw info
         ws_req.parent = request
@@ -299,14 +654,14 @@ class BaseWebsocketServer(BaseServer):
             kwargs.setdefault("body", {})
             kwargs.setdefault("path", request.path)
 
-            ws_req.environ["REQUEST_METHOD"] = kwargs["method"]
+            # these are only set on the request, writing them into the shared
+            # environ would make the child copy the whole thing
             ws_req.method = kwargs["method"]
-
-            ws_req.environ["PATH_INFO"] = kwargs["path"]
             ws_req.path = kwargs["path"]
 
-            ws_req.environ.pop("wsgi.input", None)
-
+            # the body comes from the payload so the connection request's body
+            # is never loaded
+            ws_req.clear_body_loader()
             ws_req.body = kwargs["body"]
             ws_req.body_kwargs = kwargs["body"]
 
@@ -331,7 +686,12 @@ class BaseWebsocketServer(BaseServer):
             raw_response["uuid"] = request.uuid
 
         raw_response["code"] = response.code
-        raw_response["body"] = response.body
+        body = response.body
+        if body is not None and body is response._body_bytes and response.is_json():
+            # the body was already encoded (eg, by @cache) and it needs to be
+            # a value in the payload
+            body = self.json_class.loads(body)
+        raw_response["body"] = body
 
         body = self.payload_class.dumps(raw_response)
         yield ByteString(body, response.encoding).raw()
@@ -379,9 +739,25 @@ class BaseWebsocketServer(BaseServer):
         :returns: Call instance
         """
         req = self.create_websocket_request(request, raw_request)
-        c = self.create_call(raw_request, request=req)
+        rou = self.create_websocket_router(request)
+        c = self.create_call(raw_request, request=req, router=rou)
         return c
 
+    def create_websocket_router(self, request):
+        """return the Router for the websocket connection of request, the router
+        lives as long as the connection and remembers the routes it has found so
+        repeated messages to the same path aren't routed again
+
+        :param request: Request, the main request from the initial ws connection
+        :returns: Router
+        """
+        rou = getattr(request, "_websocket_router", None)
+        if rou is None:
+            rou = self.create_router()
+            rou.route_cache = {}
+            request._websocket_router = rou
+        return rou
+
     def disconnect_websocket_call(self, request):
         """This handles a websocket disconnection
 
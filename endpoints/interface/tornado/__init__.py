@@ -5,8 +5,10 @@
 from __future__ import unicode_literals, division, print_function, absolute_import
 import json
 import logging
+import io
 
 import tornado.web
+import tornado.gen
 import tornado.websocket
 import tornado.routing
 import tornado.ioloop
@@ -16,7 +18,7 @@ import tornado.httputil
 
 from .. import BaseServer, BaseWebsocketServer, Payload
 from ...reflection import Reflect
-from ...http import Url, Host
+from ...http import Url, Host, UploadedFile
 from ...utils import String, ByteString, JSONEncoder
 from ... import environ
 
@@ -58,6 +60,7 @@ class WebsocketHandler(tornado.websocket.WebSocketHandler):
 
 class Handler(tornado.web.RequestHandler):
     """All requests will go through this handler, specifically the handle method"""
+    @tornado.gen.coroutine
     def handle(self, *args, **kwargs):
         """all the magic happens here, this will take the tornado request, create
         an endpoints request and then create the call instance and let endpoints
@@ -78,6 +81,7 @@ class Handler(tornado.web.RequestHandler):
 
         c.handle()
         res = c.response
+        self.request.application.server.set_response_compression(c.request, res)
 
         self.set_status(res.code)
 
@@ -86,8 +90,16 @@ class Handler(tornado.web.RequestHandler):
             #self.set_header(ByteString(h[0]), ByteString(h[1]))
             self.set_header(h[0], h[1])
 
-        for s in self.request.application.server.create_response_body(res):
-            self.write(s)
+        if res.is_iterator() or res.is_file():
+            # send each chunk as it is read and wait for it to be written so a
+            # big file or generator body never has to be buffered in memory
+            for s in self.request.application.server.create_response_body(res):
+                self.write(s)
+                yield self.flush()
+
+        else:
+            for s in self.request.application.server.create_response_body(res):
+                self.write(s)
 
     def head(self, *args, **kwargs): return self.handle(*args, **kwargs)
     def get(self, *args, **kwargs): return self.handle(*args, **kwargs)
@@ -167,10 +179,13 @@ class Server(BaseServer):
 
         r.method = raw_request.method
         r.path = raw_request.path
-        #r.query = raw_request.query
-        r.query_kwargs = Url.normalize_query_kwargs(raw_request.query_arguments)
+        # query_kwargs will be parsed from the raw query when they are needed
+        r.query = raw_request.query
 
-        self.create_request_body(r, raw_request, **kwargs)
+        # the body isn't read and decoded until something asks for it
+        r.set_body_loader(
+            lambda request: self.create_request_body(request, raw_request, **kwargs)
+        )
         r.raw_request = raw_request
         return r
 
@@ -182,7 +197,20 @@ class Server(BaseServer):
             body_kwargs = Url.normalize_query_kwargs(raw_request.body_arguments)
 
         if raw_request.files:
-            for k, vs in Url.normalize_query_kwargs(raw_request.files).items():
+            # tornado has already read the files into memory, but they should look
+            # the same as the files the other interfaces stream
+            files = {}
+            for k, vs in raw_request.files.items():
+                files[k] = [
+                    UploadedFile(
+                        io.BytesIO(v["body"]),
+                        filename=v["filename"],
+                        content_type=v["content_type"],
+                        size=len(v["body"])
+                    ) for v in vs
+                ]
+
+            for k, vs in Url.normalize_query_kwargs(files).items():
                 body_kwargs[k] = vs
 
         if raw_request.body:
@@ -201,6 +229,8 @@ class Server(BaseServer):
         request.body_args = body_args
         request.body_kwargs = body_kwargs
         request.body = body
+        # tornado has already read and decoded the whole body
+        request.body_stream = io.BytesIO(raw_request.body or b"")
         return request
 
     def serve_forever(self):
@@ -1,19 +1,30 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, division, print_function, absolute_import
 import os
-from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
-import cgi
+import io
+import socket
+import threading
+import time
+import logging
+from wsgiref.simple_server import (
+    WSGIServer,
+    WSGIRequestHandler as BaseWSGIRequestHandler,
+    ServerHandler,
+)
 import json
 
 from ...compat.environ import *
-from ...compat.imports import socketserver
+from ...compat.imports import socketserver, queue
 from .. import BaseServer
-from ...http import Url, Host
+from ...http import Url, Host, EnvironHeaders, EnvironView, LimitedStream, ChunkedStream
 from ...decorators import _property
 from ...utils import ByteString, String
 from ... import environ
 
 
+logger = logging.getLogger(__name__)
+
+
 class Application(BaseServer):
     """The Application that a WSGI server needs
 
@@ -32,6 +43,7 @@ class Application(BaseServer):
     def handle_http_response(self, environ, start_response):
         c = self.create_call(environ)
         res = c.handle()
+        self.set_response_compression(c.request, res)
 
         if is_py2:
             start_response(
@@ -45,12 +57,44 @@ class Application(BaseServer):
                 list(res.headers.items())
             )
 
+        if res.is_file() and not res.compression:
+            body = self.create_response_body_file_wrapper(res, environ)
+            if body is not None:
+                return body
+
         return self.create_response_body(res)
 
         # returning the Response, it needs to have an __iter__ for internal wsgi 
         # methods to know how to handle the Response
         return res
 
+    def create_response_body_file_wrapper(self, response, raw_request, **kwargs):
+        """hand a binary file body to the server's wsgi.file_wrapper so the server
+        can send it with something like sendfile instead of it being read through
+        python
+
+        https://www.python.org/dev/peps/pep-3333/#optional-platform-specific-file-handling
+
+        :param response: Response, the response with a file body
+        :param raw_request: dict, the wsgi environ
+        :returns: the file wrapper or None if create_response_body should send it
+        """
+        file_wrapper = raw_request.get("wsgi.file_wrapper", None)
+        if not file_wrapper: return None
+
+        body = response.body
+        if not isinstance(body.read(0), bytes): return None
+
+        content_range = response.get_header("Content-Range")
+        if content_range:
+            # file wrappers aren't required to stop at Content-Length, so only
+            # ranges that go to the end of the file can use them
+            byte_range, _, size = content_range.rpartition("/")
+            if int(byte_range.rpartition("-")[2]) != int(size) - 1:
+                return None
+
+        return file_wrapper(body, environ.RESPONSE_CHUNK_SIZE)
+
     def create_request(self, raw_request, **kwargs):
         """
         create instance of request
@@ -58,64 +102,76 @@ class Application(BaseServer):
         raw_request -- the raw request object retrieved from a WSGI server
         """
         r = self.request_class()
-        for k, v in raw_request.items():
-            if k.startswith('HTTP_'):
-                r.set_header(k[5:], v)
-            else:
-                r.environ[k] = v
+
+        # the headers and environ are read straight out of raw_request when they
+        # are needed
+        r.headers = EnvironHeaders(raw_request)
+        r.environ = EnvironView(raw_request)
 
         r.method = raw_request['REQUEST_METHOD']
         r.path = raw_request['PATH_INFO']
         r.query = raw_request['QUERY_STRING']
 
-        # handle headers not prefixed with http
-        for k in ['CONTENT_TYPE', 'CONTENT_LENGTH']:
-            v = r.environ.pop(k, None)
-            if v:
-                r.set_header(k, v)
-
-        self.create_request_body(r, raw_request, **kwargs)
+        # the body isn't read and decoded until something asks for it
+        r.set_body_loader(
+            lambda request: self.create_request_body(request, raw_request, **kwargs)
+        )
         r.raw_request = raw_request
         return r
 
+    def create_request_body_stream(self, request, raw_request, **kwargs):
+        """Returns a file like object that reads the decoded request body
+
+        :param request: Request
+        :param raw_request: dict, the WSGI environ
+        :returns: io.BufferedReader, or None if there is no wsgi.input
+        """
+        body = raw_request.get('wsgi.input', None)
+        if body is not None:
+            if request.get_header('transfer-encoding', "").lower().startswith('chunked'):
+                if raw_request.get('wsgi.input_terminated', False):
+                    # the server has already decoded the chunks
+                    # https://gist.github.com/mitsuhiko/5721547
+                    return body
+
+                body = io.BufferedReader(ChunkedStream(body))
+
+            else:
+                content_length = int(request.get_header("CONTENT_LENGTH", 0) or 0)
+                body = LimitedStream(body, content_length)
+                if content_length > 0:
+                    # an empty body doesn't need the buffer's memory
+                    body = io.BufferedReader(body)
+
+        return body
+
     def create_request_body(self, request, raw_request, **kwargs):
         body_args = []
         body_kwargs = {}
-        body = None
-        if 'wsgi.input' in raw_request:
-            body = raw_request['wsgi.input']
-
-            content_length = int(request.get_header("CONTENT_LENGTH", -1))
-
-            if content_length > 0:
-                if request.get_header('transfer-encoding', "").lower().startswith('chunked'):
-                    raise IOError("Server does not support chunked requests")
-
-                else:
-                    if request.is_json():
-                        body = body.read(content_length)
-                        if body:
-                            body_args, body_kwargs = self.get_request_body_json(body, **kwargs)
-
-                    else:
-                        body_fields = cgi.FieldStorage(
-                            fp=body,
-                            headers=request.headers,
-                            environ=request.environ,
-                            keep_blank_values=True
-                        )
-
-                        for field_name in body_fields.keys():
-                            body_field = body_fields[field_name]
-                            if body_field.filename:
-                                body_kwargs[field_name] = {
-                                    "filename": body_field.filename,
-                                    "body": body_field.file.read(),
-                                    "content_type": body_field.type
-                                }
-
-                            else:
-                                body_kwargs[field_name] = body_field.value
+        body = self.create_request_body_stream(request, raw_request, **kwargs)
+        request.body_stream = body
+
+        if body is not None:
+            chunked = request.get_header('transfer-encoding', "").lower().startswith('chunked')
+            content_length = int(request.get_header("CONTENT_LENGTH", -1) or -1)
+
+            if chunked or content_length > 0:
+                content_type = request.get_header("content-type", "")
+                if request.is_json():
+                    body = body.read()
+                    if body:
+                        body_args, body_kwargs = self.get_request_body_json(body, **kwargs)
+
+                elif content_type.lower().startswith("multipart/"):
+                    body_kwargs = self.get_request_body_multipart(
+                        body,
+                        content_type,
+                        **kwargs
+                    )
+
+                elif not content_type or "x-www-form-urlencoded" in content_type.lower():
+                    body = body.read()
+                    body_kwargs = self.get_request_body_form(body, **kwargs)
 
         request.body_args = body_args
         request.body_kwargs = body_kwargs
@@ -135,6 +191,86 @@ class Application(BaseServer):
         raise NotImplementedError()
 
 
+class WSGIHandler(ServerHandler):
+    """Sends wsgi.file_wrapper bodies with os.sendfile when the platform has it"""
+    def sendfile(self):
+        """send the file straight from the kernel instead of reading it through
+        python, Content-Length is respected so Range responses can use this
+
+        https://docs.python.org/3/library/wsgiref.html#wsgiref.handlers.BaseHandler.sendfile
+
+        :returns: bool, True if the file was sent
+        """
+        sendfile = getattr(os, "sendfile", None)
+        filelike = getattr(self.result, "filelike", None)
+        if not sendfile or filelike is None: return False
+
+        try:
+            in_fd = filelike.fileno()
+            out_fd = self.request_handler.connection.fileno()
+            offset = filelike.tell()
+
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            return False
+
+        length = self.headers.get("Content-Length", None)
+        if length is None:
+            length = os.fstat(in_fd).st_size - offset
+        else:
+            length = int(length)
+
+        if not self.headers_sent:
+            self.send_headers()
+        self._flush()
+
+        while length > 0:
+            sent = sendfile(out_fd, in_fd, offset, length)
+            if not sent: break
+            offset += sent
+            length -= sent
+            self.bytes_sent += sent
+
+        return True
+
+
+class WSGIRequestHandler(BaseWSGIRequestHandler):
+    """The stdlib request handler but using handler_class so file bodies can be
+    sent with sendfile"""
+    handler_class = WSGIHandler
+
+    def handle(self):
+        """Handle a single HTTP request, this is the stdlib's handle() with the
+        ServerHandler swapped for handler_class"""
+        self.raw_requestline = self.rfile.readline(65537)
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            return
+
+        if not self.parse_request(): # An error code has been sent, just exit
+            return
+
+        handler = self.handler_class(
+            self.rfile,
+            self.wfile,
+            self.get_stderr(),
+            self.get_environ()
+        )
+        handler.request_handler = self # backpointer for logging
+        handler.run(self.server.get_app())
+
+    def get_environ(self):
+        """adds endpoints.queue_wait, the seconds the connection waited for a
+        worker thread, if the server keeps track of it"""
+        env = BaseWSGIRequestHandler.get_environ(self)
+        get_queue_wait = getattr(self.server, "get_queue_wait", None)
+        if get_queue_wait:
+            env["endpoints.queue_wait"] = get_queue_wait()
+        return env
+
+
 # http://stackoverflow.com/questions/20745352/creating-a-multithreaded-server
 class WSGIHTTPServer(socketserver.ThreadingMixIn, WSGIServer):
 #class WSGIHTTPServer(socketserver.ForkingMixIn, WSGIServer):
@@ -142,6 +278,119 @@ class WSGIHTTPServer(socketserver.ThreadingMixIn, WSGIServer):
     pass
 
 
+class WSGIHTTPPoolServer(WSGIServer):
+    """The standard wsgi server but the connections are handled by a fixed number
+    of worker threads instead of a new thread for each connection
+
+    accepted connections wait in a queue for a free worker, when the queue is full
+    the connection gets a 503 response with a Retry-After header right away so
+    the server stays responsive when it gets more requests than it can handle
+    """
+    reject_read_size = 65536
+    """how many bytes of a rejected connection's request are read and thrown
+    away before it is closed"""
+
+    def __init__(self, server_address, RequestHandlerClass, pool_size=0, queue_size=None, retry_after=None, **kwargs):
+        """
+        :param pool_size: int, how many worker threads handle the connections
+        :param queue_size: int, how many connections can wait for a worker, 0
+            means no limit
+        :param retry_after: int, the Retry-After seconds of the 503 responses
+        """
+        self.pool_size = max(1, pool_size or environ.WSGI_POOL_SIZE)
+        self.queue_size = environ.WSGI_QUEUE_SIZE if queue_size is None else queue_size
+        self.retry_after = environ.WSGI_RETRY_AFTER if retry_after is None else retry_after
+
+        # the listen backlog should hold a burst of connections until they are
+        # accepted and either queued or rejected
+        self.request_queue_size = max(self.request_queue_size, self.queue_size)
+
+        self.queue = queue.Queue(self.queue_size)
+        self.local = threading.local()
+        WSGIServer.__init__(self, server_address, RequestHandlerClass, **kwargs)
+
+        self.workers = []
+        for i in range(self.pool_size):
+            t = threading.Thread(target=self.process_queue, name="endpoints-worker-{}".format(i))
+            t.daemon = True
+            t.start()
+            self.workers.append(t)
+
+    def process_request(self, request, client_address):
+        """queue the connection for a worker, this is called by the thread that
+        accepts the connections"""
+        try:
+            self.queue.put_nowait((request, client_address, time.time()))
+
+        except queue.Full:
+            self.reject_request(request, client_address)
+
+    def reject_request(self, request, client_address):
+        """send a 503 response and close the connection without reading the request"""
+        logger.warning("Rejected connection from {}, {} connections are waiting".format(
+            client_address[0],
+            self.queue.qsize()
+        ))
+        try:
+            request.sendall(ByteString("\r\n".join([
+                "HTTP/1.1 503 Service Unavailable",
+                "Retry-After: {}".format(self.retry_after),
+                "Content-Length: 0",
+                "Connection: close",
+                "",
+                "",
+            ])).raw())
+
+            # closing a socket that has unread data resets the connection, which
+            # could lose the response before the client reads it, so the response
+            # is finished and one read of what has already arrived is thrown away.
+            # This is only one read so a client that keeps sending can't hold up
+            # the thread that accepts the connections
+            request.shutdown(socket.SHUT_WR)
+            request.setblocking(False)
+            request.recv(self.reject_read_size)
+
+        except (socket.error, ValueError):
+            pass
+
+        self.shutdown_request(request)
+
+    def process_queue(self):
+        """the worker threads run this until server_close() is called, every
+        item is marked done so queue.join() waits for the queued connections"""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+
+            request, client_address, queued = item
+            self.local.queue_wait = time.time() - queued
+            try:
+                self.finish_request(request, client_address)
+
+            except Exception:
+                self.handle_error(request, client_address)
+
+            finally:
+                self.shutdown_request(request)
+                self.queue.task_done()
+
+    def get_queue_wait(self):
+        """return how many seconds the connection the current worker is handling
+        waited in the queue"""
+        return getattr(self.local, "queue_wait", 0.0)
+
+    def server_close(self):
+        """stop accepting connections and wait for the workers to finish the
+        connections that were already queued"""
+        WSGIServer.server_close(self)
+        for t in self.workers:
+            self.queue.put(None)
+        for t in self.workers:
+            t.join()
+
+
 class Server(BaseServer):
     """A simple python WSGI Server
 
@@ -152,6 +401,26 @@ class Server(BaseServer):
 
     backend_class = WSGIHTTPServer
 
+    pool_backend_class = WSGIHTTPPoolServer
+    """used instead of backend_class when pool_size is set"""
+
+    pool_size = environ.WSGI_POOL_SIZE
+    """how many worker threads handle the requests, 0 uses backend_class which
+    starts a thread for every connection"""
+
+    queue_size = environ.WSGI_QUEUE_SIZE
+    """how many connections can wait for a worker thread"""
+
+    retry_after = environ.WSGI_RETRY_AFTER
+    """the Retry-After seconds of the 503 responses when the queue is full"""
+
+    def __init__(self, *args, **kwargs):
+        for k in ["pool_size", "queue_size", "retry_after"]:
+            v = kwargs.pop(k, None)
+            if v is not None:
+                setattr(self, k, v)
+        super(Server, self).__init__(*args, **kwargs)
+
     @property
     def hostloc(self):
         return ":".join(map(String, self.backend.server_address))
@@ -174,7 +443,19 @@ class Server(BaseServer):
         server_address = Host(kwargs.pop('host', environ.HOST))
         #hostname, port = Url.split_hostname_from_port(kwargs.pop('host', environ.HOST))
         #server_address = (hostname, port if port else 0)
-        s = self.backend_class(server_address, WSGIRequestHandler, **kwargs)
+        if self.pool_size > 0:
+            s = self.pool_backend_class(
+                server_address,
+                WSGIRequestHandler,
+                pool_size=self.pool_size,
+                queue_size=self.queue_size,
+                retry_after=self.retry_after,
+                **kwargs
+            )
+
+        else:
+            s = self.backend_class(server_address, WSGIRequestHandler, **kwargs)
+
         s.set_app(self.application)
         return s
 
@@ -186,3 +467,12 @@ class Server(BaseServer):
         #self.prepare()
         return self.backend.serve_forever()
 
+    def serve_count(self, count):
+        try:
+            return super(Server, self).serve_count(count)
+
+        finally:
+            if self.pool_size > 0:
+                # handle_request() returns once the connection is queued, so wait
+                # for the workers to answer the last requests
+                self.backend.queue.join()
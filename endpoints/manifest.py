@@ -0,0 +1,306 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division, print_function, absolute_import
+import os
+import json
+import hashlib
+import inspect
+import logging
+import collections
+
+from .compat.environ import *
+from .compat.imports import builtins
+from . import environ
+from .reflection import Reflect, ReflectModule
+
+
+logger = logging.getLogger(__name__)
+
+
+class Manifest(object):
+    """A snapshot of the reflection of all the controllers in the controller
+    prefixes, saved to disk so a server doesn't have to scan the controller
+    packages and parse the controller source code every time it starts
+
+    Every source file and package directory that went into the manifest is
+    recorded with its mtime and a hash, if any of them have changed then the
+    manifest is stale and is ignored, so everything falls back to live reflection
+
+    :example:
+        m = Manifest("/path/to/endpoints.manifest.json", ["foo.controllers"])
+        m.build()
+        m.save()
+
+        # later, usually in another process
+        m = Manifest.find("/path/to/endpoints.manifest.json")
+        if m:
+            m.get_module_names("foo.controllers")
+    """
+    version = 1
+    """bump this when the format of the saved data changes, a manifest with a
+    different version is always stale"""
+
+    _cache = {}
+
+    @classmethod
+    def find(cls, path=""):
+        """return the fresh manifest saved at path
+
+        the result is cached so the freshness check only happens once per process
+
+        :param path: string, the manifest path, defaults to environ.MANIFEST
+        :returns: Manifest, None if there is no manifest or it is stale
+        """
+        if not path:
+            path = environ.MANIFEST
+        if not path: return None
+
+        path = os.path.abspath(path)
+        _cache = cls._cache
+        if path not in _cache:
+            instance = None
+            if os.path.isfile(path):
+                instance = cls.load(path)
+                if not instance.is_fresh():
+                    logger.warning(
+                        "Ignoring stale manifest {}, run `endpoints manifest build` to refresh it".format(path)
+                    )
+                    instance = None
+
+            _cache[path] = instance
+
+        return _cache[path]
+
+    @classmethod
+    def load(cls, path):
+        """load the manifest saved at path, this doesn't check freshness
+
+        :param path: string, the manifest path
+        :returns: Manifest
+        """
+        with open(path) as fp:
+            data = json.load(fp, object_hook=cls.decode_value)
+
+        return cls(path, list(data.get("prefixes", {}).keys()), data)
+
+    def __init__(self, path, controller_prefixes=None, data=None):
+        """
+        :param path: string, where the manifest is saved
+        :param controller_prefixes: list, the controller prefixes the manifest covers
+        :param data: dict, the manifest's data, usually set by .build() or .load()
+        """
+        self.path = os.path.abspath(path)
+        self.controller_prefixes = list(controller_prefixes or [])
+        self.data = data or {}
+
+    def build(self):
+        """scan and reflect all the controllers in the controller prefixes using
+        live reflection and set .data
+
+        :returns: Manifest, self for chaining
+        """
+        data = {
+            "version": self.version,
+            "prefixes": {},
+            "files": {},
+            "dirs": {},
+            "classes": {},
+        }
+
+        for controller_prefix in self.controller_prefixes:
+            module_names = ReflectModule(controller_prefix).module_names
+            data["prefixes"][controller_prefix] = sorted(module_names)
+            for module_name in module_names:
+                module = ReflectModule(module_name).module
+                self.add_file(data, module)
+                for path in getattr(module, "__path__", []):
+                    data["dirs"][path] = [os.stat(path).st_mtime, self.hash_dir(path)]
+
+        reflect = Reflect(self.controller_prefixes)
+        reflect.manifest = None # we always want live reflection when building
+        for rc in reflect.controllers:
+            for cls in inspect.getmro(rc.cls):
+                if cls is object: continue
+                self.add_file(data, cls)
+
+            info = {}
+            for http_method, methods in rc.methods.items():
+                info[http_method] = {}
+                for method in methods:
+                    method_info = method.get_info()
+                    info[http_method][method.method_name] = {
+                        "decorators": [
+                            {"name": d.name, "args": d.args, "kwargs": d.kwargs} for d in method_info["decorators"]
+                        ],
+                        "positionals": method_info["positionals"],
+                        "keywords": method_info["keywords"],
+                        "params": method_info["params"],
+                        "desc": method.desc,
+                    }
+
+            data["classes"][rc.classpath] = info
+
+        self.data = data
+        return self
+
+    def save(self):
+        """write .data to .path, the file is written to a temp file first and moved
+        into place so a running server never sees a half written manifest"""
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, "w") as fp:
+            json.dump(self.encode_value(self.data), fp, separators=(",", ":"), sort_keys=True)
+
+        os.rename(tmp_path, self.path)
+        type(self)._cache[self.path] = self
+
+    def is_fresh(self):
+        """return True if none of the files or directories recorded in the manifest
+        have changed since it was built
+
+        an mtime change is not enough to make the manifest stale (eg, a fresh checkout),
+        the contents are hashed and compared when the mtime doesn't match
+        """
+        if self.data.get("version", None) != self.version:
+            return False
+
+        try:
+            for path, (mtime, size, digest) in self.data["files"].items():
+                st = os.stat(path)
+                if st.st_size != size:
+                    return False
+
+                if st.st_mtime != mtime and self.hash_file(path) != digest:
+                    return False
+
+            for path, (mtime, digest) in self.data["dirs"].items():
+                if os.stat(path).st_mtime != mtime and self.hash_dir(path) != digest:
+                    return False
+
+        except (OSError, IOError, KeyError, ValueError):
+            return False
+
+        return True
+
+    def get_module_names(self, controller_prefix):
+        """return all the module names in controller_prefix
+
+        :param controller_prefix: string, the controller prefix
+        :returns: set, the module names or None if controller_prefix isn't in the manifest
+        """
+        module_names = self.data.get("prefixes", {}).get(controller_prefix, None)
+        return None if module_names is None else set(module_names)
+
+    def get_info(self, reflect_class):
+        """return the same thing ReflectClass.get_info() would return for reflect_class
+        but from the manifest data instead of parsing the source code
+
+        :param reflect_class: ReflectClass
+        :returns: dict, None if the class isn't in the manifest
+        """
+        class_info = self.data.get("classes", {}).get(reflect_class.classpath, None)
+        if class_info is None: return None
+
+        ret = collections.defaultdict(dict)
+        module = reflect_class.reflect_module.module
+        for http_method, methods in class_info.items():
+            for method_name, method_info in methods.items():
+                d = dict(method_info)
+                d["method"] = getattr(reflect_class.cls, method_name)
+                d["decorators"] = []
+                for decorator_info in method_info["decorators"]:
+                    d["decorators"].append(reflect_class.decorator_class(
+                        decorator=getattr(module, decorator_info["name"], None),
+                        **decorator_info
+                    ))
+
+                ret[http_method][method_name] = d
+
+        return ret
+
+    def add_file(self, data, obj):
+        """record the source file of obj in data so changes to it make the manifest
+        stale
+
+        :param data: dict, the manifest data being built
+        :param obj: module|type, anything inspect.getsourcefile() accepts
+        """
+        try:
+            path = inspect.getsourcefile(obj)
+
+        except TypeError:
+            # builtin modules and classes don't have a source file
+            path = None
+
+        if path:
+            path = os.path.abspath(path)
+            if path in data["files"]: return
+            st = os.stat(path)
+            data["files"][path] = [st.st_mtime, st.st_size, self.hash_file(path)]
+
+    def hash_file(self, path):
+        h = hashlib.md5()
+        with open(path, "rb") as fp:
+            for chunk in iter(lambda: fp.read(65536), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def hash_dir(self, path):
+        """hash the names of everything in the path directory that could be a module,
+        adding or removing a module in a package changes this hash"""
+        names = []
+        for name in os.listdir(path):
+            if name.endswith(".py"):
+                names.append(name)
+
+            elif name != "__pycache__" and os.path.isdir(os.path.join(path, name)):
+                names.append(name + os.sep)
+
+        h = hashlib.md5()
+        h.update("\n".join(sorted(names)).encode("utf-8"))
+        return h.hexdigest()
+
+    @classmethod
+    def encode_value(cls, val):
+        """convert val into something json can save without losing the python types
+        that reflection finds in decorator arguments (eg, tuples, builtins like int)
+
+        :param val: mixed, any value
+        :returns: mixed, a json serializable value, see .decode_value()
+        """
+        if isinstance(val, dict):
+            if all(isinstance(k, basestring) for k in val):
+                ret = {k: cls.encode_value(v) for k, v in val.items()}
+            else:
+                ret = {"__dict__": [[cls.encode_value(k), cls.encode_value(v)] for k, v in val.items()]}
+
+        elif isinstance(val, tuple):
+            ret = {"__tuple__": [cls.encode_value(v) for v in val]}
+
+        elif isinstance(val, list):
+            ret = [cls.encode_value(v) for v in val]
+
+        elif val is None or isinstance(val, (basestring, bool, int, float)):
+            ret = val
+
+        else:
+            name = getattr(val, "__name__", "")
+            if not name or getattr(builtins, name, None) is not val:
+                raise ValueError("Cannot save {!r} in the manifest".format(val))
+            ret = {"__builtin__": name}
+
+        return ret
+
+    @classmethod
+    def decode_value(cls, d):
+        """json object_hook that reverses .encode_value()"""
+        if len(d) == 1:
+            if "__tuple__" in d:
+                d = tuple(d["__tuple__"])
+
+            elif "__dict__" in d:
+                d = {k: v for k, v in d["__dict__"]}
+
+            elif "__builtin__" in d:
+                d = getattr(builtins, d["__builtin__"])
+
+        return d
+
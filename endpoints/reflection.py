@@ -17,6 +17,262 @@ from .decorators import _property, version, param
 from .utils import String
 
 
+class ReflectSource(object):
+    """Parses a python source file and, in one pass, pulls out the docblocks,
+    decorators and signatures of the methods of every class defined in it
+
+    parsed files are cached for the whole process by path and mtime, so every
+    Reflect* instance shares them and a file is only parsed again if it changes
+
+    :example:
+        info = ReflectSource.find_class(FooController)
+        info["methods"]["GET"]["desc"] # the docblock of FooController.GET
+    """
+    _cache = {}
+
+    @classmethod
+    def get_instance(cls, path):
+        """return the parsed source of path, parsing it if it hasn't been parsed
+        yet or has been modified since
+
+        :param path: string, the path to a python source file
+        :returns: ReflectSource
+        """
+        mtime = os.path.getmtime(path)
+        instance = cls._cache.get(path, None)
+        if instance is None or instance.mtime != mtime:
+            instance = cls(path, mtime)
+            cls._cache[path] = instance
+        return instance
+
+    @classmethod
+    def find_class(cls, klass):
+        """return the parsed info of the class definition of klass
+
+        :param klass: type, the class
+        :returns: dict, see .create_class_info()
+        """
+        path = inspect.getsourcefile(klass)
+        if not path:
+            raise IOError("could not find source code for {}".format(klass))
+        return cls.get_instance(path).get_class(klass)
+
+    def __init__(self, path, mtime):
+        """
+        :param path: string, the path to a python source file
+        :param mtime: float, the modified time of path when it was read
+        """
+        self.path = path
+        self.mtime = mtime
+        self.classes = {}
+        self.class_names = collections.defaultdict(list)
+
+        with open(path, "rb") as fp:
+            tree = ast.parse(fp.read(), path)
+        self.visit(tree, [])
+
+    def get_class(self, klass):
+        """return the info of klass's definition in this source
+
+        this matches klass.__qualname__ and, if that isn't available (eg, py2),
+        falls back to the class name the way inspect.getsource() does, preferring
+        a top level class and then the first one defined
+
+        :param klass: type, the class
+        :returns: dict, see .create_class_info()
+        """
+        info = self.classes.get(getattr(klass, "__qualname__", ""), None)
+        if info is None:
+            infos = self.class_names.get(klass.__name__, [])
+            if not infos:
+                raise IOError("could not find class definition for {} in {}".format(klass, self.path))
+
+            info = infos[0]
+            for i in infos:
+                if i["toplevel"]:
+                    info = i
+                    break
+
+        return info
+
+    def visit(self, node, scope):
+        """walk the tree below node finding all the class definitions
+
+        :param node: ast.AST
+        :param scope: list, the qualname parts of where node is defined, this
+            uses the same rules as __qualname__ so they can be matched
+        """
+        function_types = (ast.FunctionDef, getattr(ast, "AsyncFunctionDef", ast.FunctionDef))
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                info = self.create_class_info(child, scope)
+                self.classes[info["qualname"]] = info
+                self.class_names[child.name].append(info)
+                self.visit(child, scope + [child.name])
+
+            elif isinstance(child, function_types):
+                self.visit(child, scope + [child.name, "<locals>"])
+
+            else:
+                self.visit(child, scope)
+
+    def create_class_info(self, node, scope):
+        """
+        :param node: ast.ClassDef
+        :param scope: list, see .visit()
+        :returns: dict, with keys name, qualname, toplevel and methods, methods is
+            a dict of method name to .create_method_info() dicts
+        """
+        methods = {}
+        for n in node.body:
+            if isinstance(n, ast.FunctionDef):
+                methods[n.name] = self.create_method_info(n)
+
+        return {
+            "name": node.name,
+            "qualname": ".".join(scope + [node.name]),
+            "toplevel": not scope,
+            "methods": methods,
+        }
+
+    def create_method_info(self, node):
+        """
+        :param node: ast.FunctionDef
+        :returns: dict, with keys:
+            desc -- string, the method's docblock
+            decorators -- list, dicts with the name, args and kwargs of each decorator
+            super -- boolean, True if the method calls the parent's method using super()
+            positionals -- boolean, True if the method has *args
+            keywords -- boolean, True if the method has **kwargs
+            params -- list, dicts with the name, required and default of every argument
+        """
+        decorators = []
+        for n in node.decorator_list:
+            name = ''
+            args = []
+            kwargs = {}
+
+            # is this a call like @decorator or like @decorator(...)
+            if isinstance(n, ast.Call):
+                name = n.func.attr if isinstance(n.func, ast.Attribute) else n.func.id
+                for an in n.args:
+                    args.append(self.get_value(an))
+
+                for an in n.keywords:
+                    kwargs[an.arg] = self.get_value(an.value)
+
+            else:
+                name = n.attr if isinstance(n, ast.Attribute) else n.id
+
+            decorators.append({
+                "name": name,
+                "args": args,
+                "kwargs": kwargs
+            })
+
+        # we build a mapping of the defaults to where they would sit in
+        # the actual argument string (the defaults list starts at 0 but
+        # would correspond to the arguments after the required
+        # arguments, so we need to compensate for that
+        defaults = [None] * (len(node.args.args) - len(node.args.defaults))
+        defaults.extend(node.args.defaults)
+
+        # if we ever just switch to py3 we can use inpsect.Parameter
+        # here https://docs.python.org/3/library/inspect.html#inspect.Parameter
+        params = []
+        for i in range(1, len(node.args.args)):
+            an = node.args.args[i]
+            dp = {
+                "name": an.id if is_py2 else an.arg,
+                "required": True,
+            }
+
+            dan = defaults[i]
+            if dan:
+                dp["required"] = False
+                dp["default"] = self.get_value(dan)
+
+            params.append(dp)
+
+        return {
+            "desc": ast.get_docstring(node) or "",
+            "decorators": decorators,
+            "super": self.is_super(node),
+            # does the method have *args?
+            "positionals": True if node.args.vararg else False,
+            # does the method have **kwargs?
+            "keywords": True if node.args.kwarg else False,
+            "params": params,
+        }
+
+    def is_super(self, node):
+        """returns true if node has a super() call to the parent's method of the
+        same name"""
+        ret = False
+        for n in node.body:
+            if not isinstance(n, ast.Expr): continue
+
+            try:
+                func = n.value.func
+                func_name = func.attr
+                if func_name == node.name:
+                    ret = isinstance(func.value, ast.Call)
+                    break
+
+            except AttributeError as e:
+                ret = False
+
+        return ret
+
+    def get_value(self, na, default=None):
+        """given an inspect type argument figure out the actual real python
+        value and return that
+
+        :param na: ast.expr instanct
+        :param default: sets the default value for na if it can't be resolved
+        :returns: type, the found value as a valid python type
+        """
+        ret = None
+        if isinstance(na, ast.Num):
+            repr_n = repr(na.n)
+            val = na.n
+            vtype = float if '.' in repr_n else int
+            ret = vtype(val)
+
+        elif isinstance(na, ast.Str):
+            ret = str(na.s)
+
+        elif isinstance(na, ast.Name):
+            # http://stackoverflow.com/questions/12700893/
+            ret = getattr(builtins, na.id, None)
+            if not ret:
+                ret = na.id
+                if ret == 'True':
+                    ret = True
+                elif ret == 'False':
+                    ret = False
+
+        elif isinstance(na, ast.Dict):
+            if na.keys:
+                ret = {self.get_value(na_[0]): self.get_value(na_[1]) for na_ in zip(na.keys, na.values)}
+            else:
+                ret = {}
+
+        elif isinstance(na, (ast.List, ast.Tuple)):
+            if na.elts:
+                ret = [self.get_value(na_) for na_ in na.elts]
+            else:
+                ret = []
+
+            if isinstance(na, ast.Tuple):
+                ret = tuple(ret)
+
+        else:
+            ret = default
+
+        return ret
+
+
 class ReflectDecorator(object):
     """The information of each individual decorator on a given ReflectMethod will
     be wrapped in this class"""
@@ -119,25 +375,15 @@ class ReflectMethod(object):
     @_property
     def desc(self):
         """return the description of this method"""
-        doc = None
-        def visit_FunctionDef(node):
-            """ https://docs.python.org/2/library/ast.html#ast.NodeVisitor.visit """
-            if node.name != self.method_name:
-                return
-
-            doc = ast.get_docstring(node)
-            raise StopIteration(doc if doc else "")
-
-        target = self.reflect_class.cls
-        try:
-            node_iter = ast.NodeVisitor()
-            node_iter.visit_FunctionDef = visit_FunctionDef
-            node_iter.visit(ast.parse(inspect.getsource(target)))
+        if self.reflect_class.manifest:
+            doc = self.get_info().get("desc", None)
+            if doc is not None:
+                return doc
 
-        except StopIteration as e:
-            doc = String(e)
-
-        return doc or ""
+        # only methods actually defined on the class have a description
+        info = self.reflect_class.source_class.find_class(self.reflect_class.cls)
+        method_info = info["methods"].get(self.method_name, None)
+        return method_info["desc"] if method_info else ""
 
     def __init__(self, method_name, method, reflect_class):
         self.method_name = method_name
@@ -193,6 +439,8 @@ class ReflectClass(object):
 
     decorator_class = ReflectDecorator
 
+    source_class = ReflectSource
+
     @_property
     def methods(self):
         """
@@ -253,9 +501,16 @@ class ReflectClass(object):
         doc = inspect.getdoc(self.cls) or ""
         return doc
 
-    def __init__(self, reflect_module, cls):
+    def __init__(self, reflect_module, cls, manifest=None):
+        """
+        :param reflect_module: ReflectModule, the module cls is in
+        :param cls: type, the actual python class
+        :param manifest: Manifest, if the class is in the manifest then its info
+            will come from there instead of parsing the source code
+        """
         self.reflect_module = reflect_module
         self.cls = cls
+        self.manifest = manifest
         self._cache = {} # cache of get_info methods return values
 
     def is_private(self):
@@ -271,188 +526,49 @@ class ReflectClass(object):
         cached = self._cache.get("info_cache", None)
         if cached is not None: return cached
 
+        if self.manifest:
+            ret = self.manifest.get_info(self)
+            if ret is not None:
+                self._cache["info_cache"] = ret
+                return ret
+
         ret = collections.defaultdict(dict)
         res = collections.defaultdict(list)
         mmap = {}
 
-        def get_val(na, default=None):
-            """given an inspect type argument figure out the actual real python
-            value and return that
-
-            :param na: ast.expr instanct
-            :param default: sets the default value for na if it can't be resolved
-            :returns: type, the found value as a valid python type
-            """
-            ret = None
-            if isinstance(na, ast.Num):
-                repr_n = repr(na.n)
-                val = na.n
-                vtype = float if '.' in repr_n else int
-                ret = vtype(val)
-
-            elif isinstance(na, ast.Str):
-                ret = str(na.s)
-
-            elif isinstance(na, ast.Name):
-                # http://stackoverflow.com/questions/12700893/
-                ret = getattr(builtins, na.id, None)
-                if not ret:
-                    ret = na.id
-                    if ret == 'True':
-                        ret = True
-                    elif ret == 'False':
-                        ret = False
-
-            elif isinstance(na, ast.Dict):
-                if na.keys:
-                    ret = {get_val(na_[0]): get_val(na_[1]) for na_ in zip(na.keys, na.values)}
-                else:
-                    ret = {}
-
-            elif isinstance(na, (ast.List, ast.Tuple)):
-                if na.elts:
-                    ret = [get_val(na_) for na_ in na.elts]
-                else:
-                    ret = []
-
-                if isinstance(na, ast.Tuple):
-                    ret = tuple(ret)
-
-            else:
-                ret = default
-
-            return ret
-
-        def is_super(childnode, parentnode):
-            """returns true if child node has a super() call to parent node"""
-            ret = False
-            for n in childnode.body:
-                if not isinstance(n, ast.Expr): continue
+        for target_cls in inspect.getmro(self.cls):
+            if target_cls == object: break
 
-                try:
-                    func = n.value.func
-                    func_name = func.attr
-                    if func_name == parentnode.name:
-                        ret = isinstance(func.value, ast.Call)
-                        break
+            for method_name, method_info in self.source_class.find_class(target_cls)["methods"].items():
+                # if there is a super call in the child's method body we want to
+                # add the decorators from this parent method also
+                add_decs = True
+                if method_name in res:
+                    add_decs = mmap[method_name]["super"]
 
-                except AttributeError as e:
-                    ret = False
+                mmap[method_name] = method_info
 
-            return ret
-
-        def visit_FunctionDef(node):
-            """as the code is parsed any found methods will call this function
-            https://docs.python.org/2/library/ast.html#ast.NodeVisitor.visit
-            """
-
-            # if there is a super call in the method body we want to add the
-            # decorators from that super call also
-            add_decs = True
-            if node.name in res:
-                add_decs = is_super(mmap[node.name], node)
-
-            mmap[node.name] = node
-
-            if add_decs:
-                for n in node.decorator_list:
-                    d = {}
-                    name = ''
-                    args = []
-                    kwargs = {}
-
-                    # is this a call like @decorator or like @decorator(...)
-                    if isinstance(n, ast.Call):
-                        name = n.func.attr if isinstance(n.func, ast.Attribute) else n.func.id
-                        for an in n.args:
-                            args.append(get_val(an))
-
-                        for an in n.keywords:
-                            kwargs[an.arg] = get_val(an.value)
-
-                    else:
-                        name = n.attr if isinstance(n, ast.Attribute) else n.id
-
-                    d = {
-                        "name": name,
-                        "args": args,
-                        "kwargs": kwargs
-                    }
-                    m = self.reflect_module.module
-                    decor = getattr(m, name, None)
-                    if decor:
-                        d["decorator"] = decor
-
-                    #res[node.name].append((name, args, kwargs))
-                    res[node.name].append(self.decorator_class(**d))
-
-        node_iter = ast.NodeVisitor()
-        node_iter.visit_FunctionDef = visit_FunctionDef
-        for target_cls in inspect.getmro(self.cls):
-            if target_cls == object: break
-            node_iter.visit(ast.parse(inspect.getsource(target_cls).strip()))
+                if add_decs:
+                    for decorator_info in method_info["decorators"]:
+                        res[method_name].append(self.decorator_class(
+                            decorator=getattr(self.module, decorator_info["name"], None),
+                            **decorator_info
+                        ))
 
         http_methods = self._get_methods_info()
         for http_method, method_names in http_methods.items():
             for method_name in method_names:
                 m = mmap[method_name]
-                d = {
+                ret[http_method][method_name] = {
                     "decorators": res.get(method_name, []),
                     "method": getattr(self.cls, method_name),
+                    "positionals": m["positionals"],
+                    "keywords": m["keywords"],
+                    "params": [dict(dp) for dp in m["params"]],
                 }
 
-                # does the method have *args?
-                d["positionals"] = True if m.args.vararg else False
-                # does the method have **kwargs?
-                d["keywords"] = True if m.args.kwarg else False
-
-                args = []
-                kwargs = {}
-                #pout.v(m.args)
-
-                # we build a mapping of the defaults to where they would sit in
-                # the actual argument string (the defaults list starts at 0 but
-                # would correspond to the arguments after the required
-                # arguments, so we need to compensate for that
-                defaults = [None] * (len(m.args.args) - len(m.args.defaults))
-                defaults.extend(m.args.defaults)
-
-                # if we ever just switch to py3 we can use inpsect.Parameter
-                # here https://docs.python.org/3/library/inspect.html#inspect.Parameter
-                d["params"] = []
-                for i in range(1, len(m.args.args)):
-                    an = m.args.args[i]
-                    dp = {
-                        "name": an.id if is_py2 else an.arg,
-                        "required": True,
-                    }
-
-                    dan = defaults[i]
-                    if dan:
-                        dp["required"] = False
-                        dp["default"] = get_val(dan)
-
-                    #pout.v(an)
-                    d["params"].append(dp)
-
-                    #args.append(get_val(an))
-# 
-#     #             for an in m.keywords:
-#     #                 kwargs[an.arg] = get_val(an.value)
-# 
-#                 pout.v(m.name, args, kwargs)
-
-                ret[http_method][method_name] = d
-
-#         pout.x()
-#         pout.v(mmap.keys())
-#         pout.x()
-#         pout.v(mmap["POST"].args)
-#         pout.v(getattr(self.controller_class, "POST"))
-        #pout.v(ret)
         self._cache["info_cache"] = ret
         return ret
-        #return res
 
     def _get_methods_info(self):
         """
@@ -493,7 +609,7 @@ class ReflectController(ReflectClass):
     def uri(self):
         return "/" + "/".join(self.bits)
 
-    def __init__(self, reflect_module, controller_class, controller_prefix):
+    def __init__(self, reflect_module, controller_class, controller_prefix, manifest=None):
         """reflect a controller
 
         :param controller_prefix: the base controller prefix that this controller
@@ -502,9 +618,10 @@ class ReflectController(ReflectClass):
             in the module foo.controllers.bar.che then the module path can be worked
             out to bar/che using controller_prefix
         :param controller_class: type, the actual python class
+        :param manifest: Manifest, see ReflectClass
         """
         self.controller_prefix = controller_prefix
-        super(ReflectController, self).__init__(reflect_module, controller_class)
+        super(ReflectController, self).__init__(reflect_module, controller_class, manifest)
 
     def is_private(self):
         """return True if this endpoint is considered private"""
@@ -694,13 +811,28 @@ class Reflect(object):
     """
     controller_class = ReflectController
 
+    @_property
+    def manifest(self):
+        """the fresh manifest (see ENDPOINTS_MANIFEST) or None, set this to None to
+        always use live reflection"""
+        # avoid circular dependencies
+        from .manifest import Manifest
+        return Manifest.find()
+
     @property
     def controllers(self):
         # avoid circular dependencies
         from .call import Controller
 
+        manifest = self.manifest
         for controller_prefix in self.controller_prefixes:
-            for rm in ReflectModule(controller_prefix):
+            module_names = manifest.get_module_names(controller_prefix) if manifest else None
+            if module_names is None:
+                rms = ReflectModule(controller_prefix)
+            else:
+                rms = (ReflectModule(module_name) for module_name in module_names)
+
+            for rm in rms:
                 for rc in rm.classes():
                     if not issubclass(rc.cls, Controller): continue
                     if rc.cls == Controller: continue
@@ -709,6 +841,7 @@ class Reflect(object):
                         reflect_module=rm,
                         controller_class=rc.cls,
                         controller_prefix=controller_prefix,
+                        manifest=manifest,
                     )
 
                     # filter out controllers that can't handle any requests
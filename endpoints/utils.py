@@ -7,13 +7,32 @@ import base64
 import json
 import types
 import copy
-from collections import Mapping
+import codecs
+import logging
+from collections import Mapping, OrderedDict
 from io import IOBase
+from functools import cmp_to_key
+import threading
 
 
 from .compat.environ import *
 from . import environ
 
+try:
+    # https://github.com/ijl/orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # https://github.com/ultrajson/ultrajson
+    import ujson
+except ImportError:
+    ujson = None
+
+
+logger = logging.getLogger(__name__)
+
 
 class ByteString(Bytes):
     """Wrapper around a byte string b"" to make sure we have a byte string that
@@ -86,6 +105,8 @@ class String(Str):
         unicode(s) # calls __unicode__ and returns String
         bytes(s) # calls __str__ and returns ByteString
     """
+    __slots__ = ("encoding",)
+
     def __new__(cls, val="", encoding=""):
         if isinstance(val, type(None)): return None
 
@@ -182,10 +203,50 @@ class AcceptHeader(object):
     wraps the Accept header to allow easier versioning
 
     provides methods to return the accept media types in the correct order
+
+    clients send the same few headers over and over, so use .parse() to get a
+    shared, already sorted instance from a bounded LRU cache instead of parsing
+    the header on every request. Shared instances should be treated as read only
     """
+    cache_size = 256
+    """how many parsed headers .parse() will keep"""
+
+    cache_max_header_size = 1024
+    """headers longer than this are parsed every time instead of being cached"""
+
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, header):
+        """return the AcceptHeader instance for header, this is thread safe
+
+        :param header: string, the raw header value
+        :returns: AcceptHeader, this instance might be shared with other requests
+        """
+        if not header or len(header) > cls.cache_max_header_size:
+            return cls(header)
+
+        key = (cls, header)
+        cache = cls._cache
+        with cls._cache_lock:
+            instance = cache.pop(key, None)
+            if instance is not None:
+                # put it back at the end so it is the most recently used
+                cache[key] = instance
+                return instance
+
+        instance = cls(header)
+        with cls._cache_lock:
+            cache[key] = instance
+            while len(cache) > cls.cache_size:
+                cache.popitem(last=False)
+        return instance
+
     def __init__(self, header):
         self.header = header
         self.media_types = []
+        self._filters = {}
 
         if header:
             accepts = header.split(',')
@@ -209,6 +270,8 @@ class AcceptHeader(object):
                 #pout.v(media_type, q, params)
                 self.media_types.append((media_type, q, params, accept))
 
+        self.sorted_media_types = self._sorted(self.media_types)
+
     def _split_media_type(self, media_type):
         """return type, subtype from media type: type/subtype"""
         media_type_bits = media_type.split('/')
@@ -249,30 +312,41 @@ class AcceptHeader(object):
 
         return ret
 
-    def __iter__(self):
+    def _sorted(self, media_types):
+        """sort the media types once so iterating doesn't have to"""
         if is_py2:
-            sorted_media_types = sorted(self.media_types, self._sort, reverse=True)
+            return sorted(media_types, self._sort, reverse=True)
         else:
-            from functools import cmp_to_key
-            sorted_media_types = sorted(
-                self.media_types,
-                key=cmp_to_key(self._sort),
-                reverse=True
-            )
-        for x in sorted_media_types:
+            return sorted(media_types, key=cmp_to_key(self._sort), reverse=True)
+
+    def __iter__(self):
+        for x in self.sorted_media_types:
             yield x
 
     def filter(self, media_type, **params):
         """
         iterate all the accept media types that match media_type
 
+        the matches are cached so filtering the same media type again is just
+        a dict lookup
+
         media_type -- string -- the media type to filter by
         **params -- dict -- further filter by key: val
 
         return -- generator -- yields all matching media type info things
         """
+        key = (media_type, tuple(sorted(params.items()))) if params else media_type
+        matches = self._filters.get(key, None)
+        if matches is None:
+            matches = tuple(self._filter(media_type, params))
+            self._filters[key] = matches
+
+        for x in matches:
+            yield x
+
+    def _filter(self, media_type, params):
         mtype, msubtype = self._split_media_type(media_type)
-        for x in self.__iter__():
+        for x in self.sorted_media_types:
             # all the params have to match to make the media type valid
             matched = True
             for k, v in params.items():
@@ -309,6 +383,59 @@ class AcceptHeader(object):
 class JSONEncoder(json.JSONEncoder):
     """Smooths out some rough edges with the default encoder"""
     def default(self, obj):
+        try:
+            return JSONCodec.default(obj)
+
+        except TypeError:
+            return json.JSONEncoder.default(self, obj)
+
+
+class JSONCodec(object):
+    """Encodes and decodes json using python's json module
+
+    the child classes use faster json libraries if they are installed, use
+    .find() to get the best one, they all handle generators, exceptions, and
+    bytes the same way
+
+    :example:
+        codec = JSONCodec.find()
+        s = codec.dumps({"foo": (x for x in range(3))}) # '{"foo": [0, 1, 2]}'
+        codec.loads(s) # {"foo": [0, 1, 2]}
+    """
+    name = "json"
+
+    @classmethod
+    def find(cls, name=""):
+        """return the codec class named name, the faster codecs are opt in so
+        this is the standard library json codec if name is empty or that codec
+        isn't installed
+
+        :param name: string, orjson, ujson, or json
+        :returns: JSONCodec class
+        """
+        if name:
+            for codec in [OrjsonCodec, UjsonCodec, JSONCodec]:
+                if codec.name == name:
+                    if codec.is_available():
+                        return codec
+                    break
+
+            logger.warning("JSON codec {} is not available".format(name))
+
+        return JSONCodec
+
+    @classmethod
+    def is_available(cls):
+        """return True if the json library this codec uses is installed"""
+        return True
+
+    @classmethod
+    def default(cls, obj):
+        """convert obj into something that can be encoded, the json libraries call
+        this for any value they don't know how to encode
+
+        :raises: TypeError if obj can't be converted
+        """
         if isinstance(obj, types.GeneratorType):
             return [x for x in obj]
 
@@ -323,8 +450,77 @@ class JSONEncoder(json.JSONEncoder):
             # https://stackoverflow.com/questions/43913256/understanding-subclassing-of-jsonencoder
             return String(obj)
 
-        else:
-            return json.JSONEncoder.default(self, obj)
+        raise TypeError("Object of type {} is not JSON serializable".format(
+            type(obj).__name__
+        ))
+
+    @classmethod
+    def loads(cls, s):
+        """decode the json string or bytes s"""
+        return json.loads(s)
+
+    @classmethod
+    def dumps(cls, obj):
+        """return obj encoded as a json string"""
+        return json.dumps(obj, cls=JSONEncoder)
+
+    @classmethod
+    def dumpb(cls, obj, encoding=""):
+        """return obj encoded as json bytes in encoding"""
+        return ByteString(cls.dumps(obj), encoding).raw()
+
+
+class OrjsonCodec(JSONCodec):
+    """Encodes and decodes json using orjson, orjson always encodes to utf-8"""
+    name = "orjson"
+
+    @classmethod
+    def is_available(cls):
+        return orjson is not None
+
+    @classmethod
+    def loads(cls, s):
+        return orjson.loads(s)
+
+    @classmethod
+    def dumps(cls, obj):
+        return cls._dumpb(obj).decode("utf-8")
+
+    @classmethod
+    def dumpb(cls, obj, encoding=""):
+        if not encoding:
+            encoding = environ.ENCODING
+
+        if codecs.lookup(encoding).name == "utf-8":
+            return cls._dumpb(obj)
+
+        return super(OrjsonCodec, cls).dumpb(obj, encoding)
+
+    @classmethod
+    def _dumpb(cls, obj):
+        return orjson.dumps(obj, default=cls.default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class UjsonCodec(JSONCodec):
+    """Encodes and decodes json using ujson"""
+    name = "ujson"
+
+    @classmethod
+    def is_available(cls):
+        return ujson is not None
+
+    @classmethod
+    def loads(cls, s):
+        return ujson.loads(s)
+
+    @classmethod
+    def dumps(cls, obj):
+        return ujson.dumps(
+            obj,
+            default=cls.default,
+            escape_forward_slashes=False,
+            reject_bytes=False,
+        )
 
 
 class Deepcopy(object):
@@ -347,17 +543,16 @@ class Deepcopy(object):
         elif hasattr(val, "__dict__"):
             if shell_instance:
                 ret = shell_instance
-                for k, v in val.__dict__.items():
-                    if not k.startswith("_"):
-                        if v is None:
-                            setattr(ret, k, v)
+                for k, v in cls.attrs(val).items():
+                    if v is None:
+                        setattr(ret, k, v)
 
-                        else:
-                            if k in memodict and v is memodict[k]:
-                                continue
+                    else:
+                        if k in memodict and v is memodict[k]:
+                            continue
 
-                            else:
-                                setattr(ret, k, cls.copy(v, memodict))
+                        else:
+                            setattr(ret, k, cls.copy(v, memodict))
 
             else:
                 ret = cls._copy(val, memodict)
@@ -367,6 +562,33 @@ class Deepcopy(object):
 
         return ret
 
+    @classmethod
+    def attrs(cls, val):
+        """return the public attributes of val, this includes the ones held in
+        __slots__ that have been set
+
+        :param val: object
+        :returns: dict, {name: value}
+        """
+        ret = {}
+        for klass in type(val).__mro__:
+            slots = klass.__dict__.get("__slots__", ())
+            if isinstance(slots, basestring):
+                slots = (slots,)
+
+            for k in slots:
+                if not k.startswith("_") and k not in ret:
+                    try:
+                        ret[k] = getattr(val, k)
+                    except AttributeError:
+                        pass
+
+        for k, v in getattr(val, "__dict__", {}).items():
+            if not k.startswith("_"):
+                ret[k] = v
+
+        return ret
+
     @classmethod
     def _copy(cls, val, memodict):
         ret = val
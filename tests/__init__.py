@@ -4,6 +4,7 @@ from unittest import skipIf, SkipTest
 import os
 import sys
 import logging
+import importlib
 
 import testdata
 
@@ -19,6 +20,12 @@ testdata.basic_logging()
 
 class Server(BaseServer):
     """This is just a wrapper to get access to the Interface handling code"""
+    @property
+    def module(self):
+        """the controller prefix module, this is imported instead of using the
+        testdata module's properties since those change between testdata versions"""
+        return importlib.import_module(self.controller_prefixes[0])
+
     def __init__(self, controller_prefix="", contents=""):
         if not controller_prefix:
             controller_prefix = testdata.get_module_name()
@@ -48,6 +55,10 @@ class Server(BaseServer):
             req.set_header('Accept', '*/*;version={}'.format(version))
 
         d = dict(self.kwargs)
+        headers = d.pop("headers", None)
+        if headers:
+            req.add_headers(headers)
+
         d.setdefault("host", "endpoints.fake")
         for k, v in d.items():
             setattr(req, k, v)
@@ -2,15 +2,19 @@
 from __future__ import unicode_literals, division, print_function, absolute_import
 from . import TestCase, skipIf, SkipTest, Server
 import os
+import abc
+import json
+import zlib
 
 import testdata
 
 import endpoints
 from endpoints.environ import *
 from endpoints.utils import ByteString
-from endpoints.http import Request, Response
-from endpoints.call import Controller, Router
+from endpoints.http import Request, Response, EnvironView
+from endpoints.call import Controller, Router, MethodTable
 from endpoints.exception import CallError
+from endpoints.interface import BaseWebsocketServer
 
 
 class ControllerTest(TestCase):
@@ -40,6 +44,62 @@ class ControllerTest(TestCase):
         c.POST()
         self.assertEqual(req.get_header('Origin'), c.response.get_header('Access-Control-Allow-Origin')) 
 
+    def test_method_table(self):
+        class Mt(Controller):
+            def GET_1(self): return 1
+            def GET_2(self): return 2
+            def POST(self): pass
+            def helper(self): pass
+
+        table = MethodTable.get(Mt)[0]
+        self.assertEqual(["GET_1", "GET_2"], [t[0] for t in table["GET"]])
+        self.assertTrue("POST" in table)
+        self.assertTrue("OPTIONS" in table)
+        self.assertFalse("helper" in table)
+        self.assertTrue(table is MethodTable.get(Mt)[0])
+
+        class Mt2(Mt):
+            def GET_3(self): return 3
+
+        self.assertEqual(3, len(MethodTable.get(Mt2)[0]["GET"]))
+
+        # modifying the class should invalidate the tables of it and its children
+        Mt.GET_4 = lambda self: 4
+        self.assertEqual(3, len(MethodTable.get(Mt)[0]["GET"]))
+        self.assertEqual(4, len(MethodTable.get(Mt2)[0]["GET"]))
+
+        del Mt.GET_4
+        self.assertEqual(2, len(MethodTable.get(Mt)[0]["GET"]))
+
+        req = Request()
+        req.method = "GET"
+        c = Mt2(req, Response())
+        methods = c.find_methods()
+        self.assertEqual(3, len(methods))
+        self.assertEqual(3, methods[-1][1]())
+
+        # replacing a method is seen without the table being compiled again
+        table = MethodTable.get(Mt2)[0]
+        Mt2.GET_3 = lambda self: 5
+        self.assertTrue(table is MethodTable.get(Mt2)[0])
+        self.assertEqual(5, c.find_methods()[-1][1]())
+
+    def test_method_table_instance(self):
+        # a controller can have its own metaclass
+        Mti = abc.ABCMeta(str("Mti"), (Controller,), {"POST": lambda self: 1})
+
+        req = Request()
+        req.method = "POST"
+        c = Mti(req, Response())
+        self.assertEqual(1, c.find_methods()[0][1]())
+
+        # methods only on the instance are still found
+        req.method = "GET"
+        c.GET = lambda: 2
+        methods = c.find_methods()
+        self.assertEqual("GET", methods[0][0])
+        self.assertEqual(2, methods[0][1]())
+
     def test_bad_typeerror(self):
         """There is a bug that is making the controller method is throw a 404 when it should throw a 500"""
         controller_prefix = "badtyperr"
@@ -175,6 +235,243 @@ class RouterTest(TestCase):
         res = c.handle('/')
         self.assertEqual(404, res.code)
 
+    def test_routes(self):
+        controller_prefix = "routes_trie"
+        testdata.create_modules({
+            controller_prefix: [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+            "{}.foo".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Bar(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+            "{}.foo.che".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+        })
+
+        r = Router([controller_prefix])
+        routes = r.routes
+        self.assertEqual(1, len(routes))
+        self.assertTrue(routes is Router([controller_prefix]).routes)
+
+        node = routes[0].children["foo"].children["che"]
+        self.assertEqual("{}.foo.che".format(controller_prefix), node.module_name)
+        self.assertEqual(["foo", "che"], node.module_path)
+        self.assertTrue("Default" in node.classes)
+        self.assertIsNotNone(node.module)
+
+        info = r.find(*self.get_http_instances("/foo/che/1"))
+        self.assertEqual("{}.foo.che".format(controller_prefix), info["module_name"])
+        self.assertEqual("foo/che", info["module_path"])
+        self.assertEqual(["1"], info["method_args"])
+
+        info = r.find(*self.get_http_instances("/foo/bar/1"))
+        self.assertEqual("Bar", info["class_name"])
+        self.assertEqual("bar", info["class_path"])
+
+        # get_module_name() uses the same routes, the class path is left in the args
+        module_name, module_path, path_args = r.get_module_name(["foo", "bar", "1"])
+        self.assertEqual("{}.foo".format(controller_prefix), module_name)
+        self.assertEqual(["foo"], module_path)
+        self.assertEqual(["bar", "1"], path_args)
+
+    def test_url_paths(self):
+        controller_prefix = "routes_urlpaths"
+        c = Server(controller_prefix, {
+            "": [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(self, *args, **kwargs):",
+                "        return self.request.url_for(Default, *args, **kwargs)",
+                ""
+            ],
+            "foo": [
+                "from endpoints import Controller",
+                "from {} import Default as Root".format(controller_prefix),
+                "class Default(Controller):",
+                "    def GET(self): pass",
+                "class Bar(Controller):",
+                "    def GET(self): pass",
+                "class FooBar(Controller):",
+                "    def GET(self): pass",
+                "class _Che(Controller):",
+                "    def GET(self): pass",
+                ""
+            ],
+            "foo.che": [
+                "from endpoints import Controller",
+                "from {}.foo import Bar".format(controller_prefix),
+                "class Baz(Controller):",
+                "    def GET(self):",
+                "        return [",
+                "            self.request.url_for(Bar, 1, 'two'),",
+                "            self.request.url_for(Baz, ['1/2'], a=1),",
+                "        ]",
+                ""
+            ],
+        })
+
+        r = Router([controller_prefix])
+        url_paths = r.url_paths
+        self.assertTrue(url_paths is Router([controller_prefix]).url_paths)
+        m = r.routes[0].children["foo"].module
+        self.assertEqual("", url_paths[m.Root])
+        self.assertEqual("/foo", url_paths[m.Default])
+        self.assertEqual("/foo/bar", url_paths[m.Bar])
+
+        class Unrouted(Controller): pass
+        with self.assertRaises(ValueError):
+            r.get_url_path(Unrouted)
+
+        # classes no path can route to don't get a url path
+        for controller_class in [m.FooBar, m._Che, Controller]:
+            self.assertFalse(controller_class in url_paths)
+            with self.assertRaises(ValueError):
+                r.get_url_path(controller_class)
+        self.assertIsNone(r.routes[0].children["foo"].get_class("controller"))
+
+        res = c.handle("/foo/che/baz")
+        self.assertEqual("http://endpoints.fake/foo/bar/1/two", res._body[0])
+        self.assertEqual("http://endpoints.fake/foo/che/baz/1/2?a=1", res._body[1])
+
+        res = c.handle("/1", query="b=2")
+        self.assertEqual("http://endpoints.fake/1?b=2", res._body)
+
+        with self.assertRaises(ValueError):
+            Request().url_for(m.Bar)
+
+    def test_route_cache(self):
+        controller_prefix = "routes_cache"
+        c = Server(controller_prefix, {
+            "foo": [
+                "from endpoints import Controller",
+                "class Bar(Controller):",
+                "    def GET(self, *args): return list(args)",
+                ""
+            ],
+        })
+
+        r = Router([controller_prefix])
+        r.route_cache = {}
+        info = r.find(*self.get_http_instances("/foo/bar/1"))
+        info["method_args"].append("2")
+        self.assertEqual(1, len(r.route_cache))
+
+        r.find_route = None # the cached route should be used
+        info = r.find(*self.get_http_instances("/foo/bar/1"))
+        self.assertEqual("Bar", info["class_name"])
+        self.assertEqual(["1"], info["method_args"])
+
+    def test_websocket_call(self):
+        c = Server("routes_websocket", {
+            "foo": [
+                "from endpoints import Controller",
+                "class Bar(Controller):",
+                "    def GET(self, *args, **kwargs):",
+                "        return [list(args), kwargs, self.request.get_header('X-Foo')]",
+                ""
+            ],
+        })
+        c.method = "CONNECT"
+        c.kwargs = {}
+        req = c.create_request("/foo/bar")
+        req.environ = EnvironView({"REQUEST_METHOD": "CONNECT", "SERVER_PORT": "80"})
+        req.set_header("X-Foo", "1")
+        req.uuid = "uuid"
+
+        calls = []
+        def loader(request):
+            calls.append(1)
+        req.set_body_loader(loader)
+
+        ws = BaseWebsocketServer(controller_prefixes=c.controller_prefixes)
+        for i in range(2):
+            call = ws.create_websocket_call(req, json.dumps({
+                "method": "GET",
+                "path": "/foo/bar/{}".format(i),
+                "body": {"che": i},
+            }))
+            call.handle()
+            self.assertEqual([["{}".format(i)], {"che": i}, "1"], call.response.body)
+            self.assertEqual("GET", call.request.method)
+
+            # the child doesn't copy the connection's environ or load its body
+            self.assertIsNone(call.request.environ._environ_headers)
+            self.assertEqual("CONNECT", call.request.environ["REQUEST_METHOD"])
+
+        self.assertEqual(2, len(req._websocket_router.route_cache))
+        self.assertEqual("CONNECT", req.method)
+        self.assertEqual([], calls)
+
+    def test_routes_import_error(self):
+        """a module that fails to import should only break its own routes"""
+        controller_prefix = "routes_importerror"
+        c = Server(controller_prefix, {
+            "": [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): return 1",
+                ""
+            ],
+            "broken": [
+                "from endpoints import Controller",
+                "from does_not_exist import FairyDust",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): return 2",
+                ""
+            ],
+        })
+
+        res = c.handle('/')
+        self.assertEqual(200, res.code)
+
+        res = c.handle('/broken')
+        self.assertEqual(404, res.code)
+
+    def test_preload(self):
+        controller_prefix = "routes_preload"
+        testdata.create_modules({
+            controller_prefix: [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+            "{}.foo".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Bar(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+            "{}.broken".format(controller_prefix): [
+                "from endpoints import Controller",
+                "from does_not_exist import FairyDust",
+                "class Default(Controller):",
+                "    def GET(*args, **kwargs): pass",
+                ""
+            ],
+        })
+
+        r = Router([controller_prefix])
+        # the broken module doesn't stop the others from loading
+        timings = r.preload()
+        self.assertEqual(
+            set([controller_prefix, "{}.foo".format(controller_prefix)]),
+            set(t[0] for t in timings)
+        )
+
+        node = r.routes[0].children["foo"]
+        self.assertTrue(node.classes["Bar"] in MethodTable.tables)
+
     def test_get_controller_info_default(self):
         """I introduced a bug on 1-12-14 that caused default controllers to fail
         to be found, this makes sure that bug is squashed"""
@@ -346,6 +643,22 @@ class CallTest(TestCase):
         res = c.handle("/foo2/bar", query_kwargs={'foo2': 'bar', 'che': 'baz'})
         self.assertEqual(501, res.code)
 
+    def test_preload_warmup(self):
+        c = Server("controller_warmup", [
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    calls = []",
+            "    def GET(self, *args, **kwargs):",
+            "        self.calls.append(('GET', args, kwargs))",
+            "    def POST(self, *args, **kwargs):",
+            "        self.calls.append(('POST', args, kwargs))",
+        ])
+
+        c.preload(warmup=["/foo?bar=1", "POST /"])
+        calls = c.module.Default.calls
+        self.assertEqual(("GET", ("foo",), {"bar": "1"}), calls[0])
+        self.assertEqual("POST", calls[1][0])
+
     def test_handle_redirect(self):
         c = Server("controllerhr", {"handle": [
             "from endpoints import Controller, Redirect",
@@ -508,6 +821,185 @@ class CallTest(TestCase):
         self.assertTrue(res.handle_called)
         self.assertTrue(res.GET_called)
 
+    def test_handle_lazy_body(self):
+        """the body shouldn't be loaded until the request has been routed"""
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "class Foo(Controller):",
+            "    def POST(self, *args, **kwargs):",
+            "        return [args, kwargs]",
+            "",
+        ])
+        c.method = "POST"
+        c.kwargs = {}
+
+        def handle(path, loader):
+            req = c.create_request(path)
+            req.set_body_loader(loader)
+            return c.create_call(None, request=req).handle()
+
+        calls = []
+        def loader(req):
+            calls.append(req.path)
+            req.body_args = [1]
+            req.body_kwargs = {"foo": 2}
+
+        res = handle("/bar", loader)
+        self.assertEqual(404, res.code)
+        self.assertEqual([], calls)
+
+        res = handle("/foo/bar", loader)
+        self.assertEqual(200, res.code)
+        self.assertEqual(["/foo/bar"], calls)
+        self.assertEqual([("bar", 1), {"foo": 2}], res.body)
+
+        def loader(req):
+            raise IOError("Server does not support chunked requests")
+
+        res = handle("/foo", loader)
+        self.assertEqual(408, res.code)
+
+    def test_handle_lazy_body_decorator(self):
+        """decorators on handle() should be able to reject the request before the
+        body is read"""
+        c = Server(contents=[
+            "from endpoints import Controller, CallError",
+            "from endpoints.decorators import auth",
+            "class Foo(Controller):",
+            "    @auth(target=lambda c, *args, **kwargs: 'authorization' in c.request.headers)",
+            "    def handle(self, *args, **kwargs):",
+            "        return super(Foo, self).handle(*args, **kwargs)",
+            "    def POST(self, *args, **kwargs):",
+            "        return kwargs",
+            "",
+        ])
+        c.method = "POST"
+        c.kwargs = {}
+
+        calls = []
+        def loader(req):
+            calls.append(req.path)
+            req.body_kwargs = {"foo": 1}
+
+        req = c.create_request("/foo")
+        req.set_body_loader(loader)
+        res = c.create_call(None, request=req).handle()
+        self.assertEqual(401, res.code)
+        self.assertEqual([], calls)
+
+        req = c.create_request("/foo")
+        req.headers["Authorization"] = "Bearer foo"
+        req.set_body_loader(loader)
+        res = c.create_call(None, request=req).handle()
+        self.assertEqual(200, res.code)
+        self.assertEqual(["/foo"], calls)
+        self.assertEqual({"foo": 1}, res.body)
+
+    def test_handle_generator_stream(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "class Foo(Controller):",
+            "    def GET(self, count):",
+            "        for x in range(int(count)):",
+            "            yield {'x': x}",
+            "",
+        ])
+        c.method = "GET"
+        c.kwargs = {}
+
+        def handle(path, accept=""):
+            req = c.create_request(path)
+            if accept:
+                req.set_header("Accept", accept)
+            res = c.create_call(None, request=req).handle()
+            return res, list(c.create_response_body(res))
+
+        res, chunks = handle("/foo/3")
+        self.assertTrue(res.is_json())
+        self.assertEqual(b'[{"x":0},{"x":1},{"x":2}]', b"".join(chunks).replace(b" ", b""))
+
+        res, chunks = handle("/foo/0")
+        self.assertEqual([b"[]"], chunks)
+
+        res, chunks = handle("/foo/3", "application/x-ndjson, application/json;q=0.5")
+        self.assertTrue(res.is_ndjson())
+        lines = b"".join(chunks).splitlines()
+        self.assertEqual([{"x": 0}, {"x": 1}, {"x": 2}], [json.loads(l) for l in lines])
+
+        res, chunks = handle("/foo/0", "application/x-ndjson")
+        self.assertEqual([], chunks)
+
+        res, chunks = handle("/foo/3", "application/json, application/x-ndjson;q=0.5")
+        self.assertTrue(res.is_json())
+
+        # big bodies are sent in bounded chunks instead of all at once
+        res, chunks = handle("/foo/20000")
+        self.assertLess(1, len(chunks))
+        for chunk in chunks[:-1]:
+            self.assertLess(len(chunk), RESPONSE_CHUNK_SIZE * 2)
+        self.assertEqual(20000, len(json.loads(b"".join(chunks))))
+
+    def test_handle_compression(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "class Foo(Controller):",
+            "    def GET(self, count):",
+            "        return [{'x': x} for x in range(int(count))]",
+            "",
+            "class Bar(Controller):",
+            "    def GET(self, count):",
+            "        for x in range(int(count)):",
+            "            yield {'x': x}",
+            "",
+        ])
+        c.method = "GET"
+        c.kwargs = {}
+
+        def handle(path, accept_encoding=""):
+            req = c.create_request(path)
+            if accept_encoding:
+                req.set_header("Accept-Encoding", accept_encoding)
+            res = c.create_call(None, request=req).handle()
+            c.set_response_compression(req, res)
+            return res, b"".join(c.create_response_body(res))
+
+        # compression is off by default
+        res, body = handle("/foo/1000", "gzip")
+        self.assertFalse("Content-Encoding" in res.headers)
+        self.assertFalse("Vary" in res.headers)
+
+        c.compression_level = 6
+        res, body = handle("/foo/1000", "gzip, deflate")
+        self.assertEqual("gzip", res.headers["Content-Encoding"])
+        self.assertEqual("Accept-Encoding", res.headers["Vary"])
+        body = zlib.decompress(body, zlib.MAX_WBITS | 16)
+        self.assertEqual(1000, len(json.loads(body)))
+
+        res, body = handle("/foo/1000", "gzip;q=0.5, deflate")
+        self.assertEqual("deflate", res.headers["Content-Encoding"])
+        self.assertEqual(1000, len(json.loads(zlib.decompress(body))))
+
+        res, body = handle("/foo/1000", "identity")
+        self.assertFalse("Content-Encoding" in res.headers)
+        self.assertEqual("Accept-Encoding", res.headers["Vary"])
+        self.assertEqual(1000, len(json.loads(body)))
+
+        # small bodies aren't worth compressing
+        res, body = handle("/foo/1", "gzip")
+        self.assertFalse("Content-Encoding" in res.headers)
+        self.assertFalse("Vary" in res.headers)
+        self.assertEqual([{"x": 0}], json.loads(body))
+
+        # streamed bodies are compressed as they are sent
+        res, body = handle("/bar/1000", "gzip")
+        self.assertEqual("gzip", res.headers["Content-Encoding"])
+        body = zlib.decompress(body, zlib.MAX_WBITS | 16)
+        self.assertEqual(1000, len(json.loads(body)))
+
+        res, body = handle("/bar/1000", "")
+        self.assertFalse("Content-Encoding" in res.headers)
+        self.assertEqual(1000, len(json.loads(body)))
+
 
 class CallVersioningTest(TestCase):
     def test_get_version(self):
@@ -45,6 +45,8 @@ class WebsocketClientTestCase(WebClientTestCase):
         }
 
         p = c.get_fetch_request("GET", "/foo", {"foo": 1})
-        self.assertTrue('"foo": 1' in p)
-        self.assertTrue('"bar": 2' in p)
+        # the payload's whitespace depends on which json codec is installed
+        body = c.payload_class.loads(p)["body"]
+        self.assertEqual(1, body["foo"])
+        self.assertEqual(2, body["bar"])
 
@@ -2,15 +2,19 @@
 from __future__ import unicode_literals, division, print_function, absolute_import
 from . import TestCase, skipIf, SkipTest, Server
 import time
+import threading
+import json
 import re
 
 import testdata
 
 import endpoints
+from endpoints.compat.environ import *
 from endpoints import CallError
 from endpoints import decorators
 from endpoints.utils import ByteString, Base64, String
 from endpoints.http import Request
+from endpoints.call import MethodTable
 from endpoints.decorators import (
     param,
     param_body,
@@ -1455,6 +1459,43 @@ class VersionTest(TestCase):
         self.assertEqual(22, res._body)
 
 
+    def test_version_table(self):
+        controller_prefix = "version_table"
+        c = Server(controller_prefix, [
+            "from endpoints import Controller",
+            "from endpoints.decorators import version, param",
+            "class Foo(Controller):",
+            "    @version('', 'v1')",
+            "    def GET_1(self):",
+            "        self.response.candidates = len(self.find_methods())",
+            "        return 1",
+            "",
+            "    @param('bar', default=2, type=int)",
+            "    @version('v2')",
+            "    def GET_2(self, **kwargs):",
+            "        return kwargs['bar']",
+            "",
+            "    def POST(self):",
+            "        return 3",
+        ])
+
+        Foo = c.module.Foo
+        table = MethodTable.get(Foo)[1]
+        self.assertEqual(set(["", "v1", "v2"]), set(table["GET"].keys()))
+        self.assertEqual("GET_2", table["GET"]["v2"][0][0])
+        self.assertFalse("POST" in table)
+
+        res = c.handle("/foo", version="v1")
+        self.assertEqual(1, res._body)
+        self.assertEqual(1, res.candidates)
+
+        res = c.handle("/foo", version="v2")
+        self.assertEqual(2, res._body)
+
+        res = c.handle("/foo", version="v3")
+        self.assertEqual(405, res.code)
+
+
 class CodeErrorTest(TestCase):
     def test_raise(self):
         controller_prefix = "ce_raise"
@@ -1486,3 +1527,420 @@ class CodeErrorTest(TestCase):
         res = c.handle("/foo/bar")
         self.assertEqual(400, res.code)
 
+
+
+class HttpcacheTest(TestCase):
+    def test_etag_body(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import httpcache",
+            "class Foo(Controller):",
+            "    @httpcache(60, etag=True)",
+            "    def GET(self, v):",
+            "        return {'v': v}",
+        ])
+
+        res = c.handle("/foo/1")
+        self.assertEqual(200, res.code)
+        self.assertEqual("max-age=60", res.headers["Cache-Control"])
+        etag = res.headers["ETag"]
+        self.assertTrue(etag.startswith('"'))
+        # the body was encoded to hash it so it doesn't need to be encoded again
+        self.assertEqual({"v": "1"}, json.loads(b"".join(c.create_response_body(res))))
+
+        res = c.handle("/foo/1", headers={"If-None-Match": etag})
+        self.assertEqual(304, res.code)
+        self.assertEqual(etag, res.headers["ETag"])
+        self.assertFalse(res.has_body())
+        self.assertFalse("Content-Type" in res.headers)
+        self.assertEqual(b"", b"".join(c.create_response_body(res)))
+
+        res = c.handle("/foo/1", headers={"If-None-Match": '"other", W/{}'.format(etag)})
+        self.assertEqual(304, res.code)
+
+        res = c.handle("/foo/2", headers={"If-None-Match": etag})
+        self.assertEqual(200, res.code)
+        self.assertNotEqual(etag, res.headers["ETag"])
+
+    def test_etag_callable(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import httpcache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @httpcache(60, etag=lambda self, v: v, last_modified=lambda self, v: 1000000000)",
+            "    def GET(self, v):",
+            "        type(self).calls += 1",
+            "        return {'v': v}",
+        ])
+        Foo = c.module.Foo
+
+        res = c.handle("/foo/1")
+        self.assertEqual(200, res.code)
+        self.assertEqual('"1"', res.headers["ETag"])
+        self.assertEqual("Sun, 09 Sep 2001 01:46:40 GMT", res.headers["Last-Modified"])
+        self.assertEqual(1, Foo.calls)
+
+        # the controller method isn't called if the client is current
+        res = c.handle("/foo/1", headers={"If-None-Match": '"1"'})
+        self.assertEqual(304, res.code)
+        self.assertEqual(b"", b"".join(c.create_response_body(res)))
+        self.assertEqual(1, Foo.calls)
+
+        res = c.handle("/foo/1", headers={"If-Modified-Since": "Sun, 09 Sep 2001 01:46:40 GMT"})
+        self.assertEqual(304, res.code)
+        self.assertEqual(1, Foo.calls)
+
+        res = c.handle("/foo/1", headers={"If-Modified-Since": "Sat, 08 Sep 2001 01:46:40 GMT"})
+        self.assertEqual(200, res.code)
+        self.assertEqual(2, Foo.calls)
+
+        # If-None-Match wins over If-Modified-Since
+        res = c.handle("/foo/1", headers={
+            "If-None-Match": '"2"',
+            "If-Modified-Since": "Sun, 09 Sep 2001 01:46:40 GMT",
+        })
+        self.assertEqual(200, res.code)
+        self.assertEqual(3, Foo.calls)
+
+
+class CacheTest(TestCase):
+    def setUp(self):
+        decorators.CacheBackend.clear()
+
+    def tearDown(self):
+        decorators.CacheBackend.clear()
+
+    def test_cache(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @cache(60)",
+            "    def GET(self, *args, **kwargs):",
+            "        type(self).calls += 1",
+            "        self.response.set_header('X-Calls', type(self).calls)",
+            "        return {'args': args, 'kwargs': kwargs}",
+            "    @cache(60)",
+            "    def POST(self, *args, **kwargs):",
+            "        type(self).calls += 1",
+            "        return {'args': args, 'kwargs': kwargs}",
+        ])
+        Foo = c.module.Foo
+
+        res = c.handle("/foo/1", query="a=1&b=2")
+        body = json.loads(b"".join(c.create_response_body(res)))
+        self.assertEqual(1, Foo.calls)
+        self.assertEqual({"args": ["1"], "kwargs": {"a": "1", "b": "2"}}, body)
+
+        res = c.handle("/foo/1", query="b=2&a=1")
+        body = json.loads(b"".join(c.create_response_body(res)))
+        self.assertEqual(1, Foo.calls)
+        self.assertEqual(200, res.code)
+        self.assertEqual("1", res.headers["X-Calls"])
+        self.assertEqual({"args": ["1"], "kwargs": {"a": "1", "b": "2"}}, body)
+
+        c.handle("/foo/2", query="a=1&b=2")
+        self.assertEqual(2, Foo.calls)
+
+        c.handle("/foo/1", query="a=1&b=2", version="v2")
+        self.assertEqual(3, Foo.calls)
+
+        c.handle("/foo/1", "POST")
+        self.assertEqual(4, Foo.calls)
+        c.handle("/foo/1", "POST")
+        self.assertEqual(5, Foo.calls)
+
+        stats = decorators.CacheBackend.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(3, stats["misses"])
+        self.assertEqual(3, stats["count"])
+        self.assertLess(0, stats["size"])
+
+    def test_credentials(self):
+        """a response is never given to a request with different credentials"""
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @cache(60, vary=['Accept-Language'])",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        return {",
+            "            'user': self.request.get_header('Authorization', ''),",
+            "            'cookie': self.request.get_header('Cookie', ''),",
+            "            'lang': self.request.get_header('Accept-Language', ''),",
+            "        }",
+        ])
+        Foo = c.module.Foo
+
+        def handle(**headers):
+            res = c.handle("/foo", headers=headers)
+            return json.loads(b"".join(c.create_response_body(res)))
+
+        requests = [
+            {},
+            {"Authorization": "Bearer A"},
+            {"Authorization": "Bearer B"},
+            {"Cookie": "session=A"},
+            {"Accept-Language": "en"},
+        ]
+        for i, headers in enumerate(requests, 1):
+            body = handle(**headers)
+            self.assertEqual(i, Foo.calls)
+            self.assertEqual(headers.get("Authorization", ""), body["user"])
+            self.assertEqual(headers.get("Cookie", ""), body["cookie"])
+            self.assertEqual(headers.get("Accept-Language", ""), body["lang"])
+
+        # the same credentials are still cached
+        body = handle(Authorization="Bearer B")
+        self.assertEqual(len(requests), Foo.calls)
+        self.assertEqual("Bearer B", body["user"])
+
+    def test_httpcache(self):
+        """a cached response is still checked against the request's validators"""
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache, httpcache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @cache(60)",
+            "    @httpcache(60, etag=True)",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        return {'foo': 1}",
+        ])
+        Foo = c.module.Foo
+
+        res = c.handle("/foo")
+        self.assertEqual(200, res.code)
+        etag = res.headers["ETag"]
+
+        res = c.handle("/foo", headers={"If-None-Match": etag})
+        self.assertEqual(304, res.code)
+        self.assertEqual(etag, res.headers["ETag"])
+        self.assertEqual(b"", b"".join(c.create_response_body(res)))
+        self.assertEqual(1, Foo.calls)
+
+        res = c.handle("/foo", headers={"If-None-Match": '"other"'})
+        self.assertEqual(200, res.code)
+        self.assertEqual({"foo": 1}, json.loads(b"".join(c.create_response_body(res))))
+        self.assertEqual(1, Foo.calls)
+
+    def test_ttl(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @cache(0.1)",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        return type(self).calls",
+        ])
+        Foo = c.module.Foo
+
+        c.handle("/foo")
+        c.handle("/foo")
+        self.assertEqual(1, Foo.calls)
+
+        time.sleep(0.2)
+        c.handle("/foo")
+        self.assertEqual(2, Foo.calls)
+        self.assertEqual(1, decorators.CacheBackend.stats()["expirations"])
+
+    def test_evict(self):
+        c = Server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import cache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @cache(60)",
+            "    def GET(self, v):",
+            "        type(self).calls += 1",
+            "        return {'v': v}",
+        ])
+        Foo = c.module.Foo
+        c.handle("/foo/1")
+        max_size = decorators.CacheBackend.stats()["size"] * 2
+
+        class Backend(decorators.CacheBackend):
+            pass
+        Backend.max_size = max_size
+
+        decorators.cache.backend_class = Backend
+        try:
+            for path in ["/foo/2", "/foo/3", "/foo/2", "/foo/4", "/foo/2", "/foo/3"]:
+                c.handle(path)
+
+            # 3 was the least recently used so it was evicted to make room for 4
+            self.assertEqual(5, Foo.calls)
+            stats = Backend.stats()
+            self.assertEqual(2, stats["count"])
+            self.assertLessEqual(stats["size"], max_size)
+            self.assertEqual(3, stats["evictions"])
+
+        finally:
+            decorators.cache.backend_class = decorators.CacheBackend
+
+
+class CoalesceTest(TestCase):
+    def handle_all(self, c, *requests):
+        """handle all the requests at the same time
+
+        :param *requests: tuple, each request is a path or a (path, headers) tuple
+        :returns: list, (code, headers, body) for each request
+        """
+        c.method = "GET"
+        c.kwargs = {}
+        rets = [None] * len(requests)
+        def target(i, path, headers):
+            path, _, query = path.partition("?")
+            req = c.create_request(path)
+            req.query = query
+            req.add_headers(headers)
+            res = c.create_call(None, request=req).handle()
+            rets[i] = (res.code, res.headers, b"".join(c.create_response_body(res)))
+
+        threads = []
+        for i, request in enumerate(requests):
+            path, headers = (request, {}) if isinstance(request, basestring) else request
+            t = threading.Thread(target=target, args=(i, path, headers))
+            t.start()
+            threads.append(t)
+            time.sleep(0.01)
+
+        for t in threads:
+            t.join()
+        return rets
+
+    def test_coalesce(self):
+        c = Server(contents=[
+            "import time",
+            "from endpoints import Controller",
+            "from endpoints.decorators import coalesce",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @coalesce()",
+            "    def GET(self, *args, **kwargs):",
+            "        type(self).calls += 1",
+            "        time.sleep(0.2)",
+            "        self.response.set_header('X-Calls', type(self).calls)",
+            "        return {'args': args, 'kwargs': kwargs}",
+        ])
+        Foo = c.module.Foo
+
+        rets = self.handle_all(c, "/foo/1?a=1", "/foo/1?a=1", "/foo/2", "/foo/1?a=1")
+        self.assertEqual(2, Foo.calls)
+        for i in [0, 1, 3]:
+            code, headers, body = rets[i]
+            self.assertEqual(200, code)
+            self.assertEqual(rets[0][1]["X-Calls"], headers["X-Calls"])
+            self.assertEqual({"args": ["1"], "kwargs": {"a": "1"}}, json.loads(body))
+        self.assertEqual({"args": ["2"], "kwargs": {}}, json.loads(rets[2][2]))
+
+        # the requests finished so the next one calls the method
+        self.handle_all(c, "/foo/1?a=1")
+        self.assertEqual(3, Foo.calls)
+
+    def test_credentials(self):
+        """requests with different credentials are never coalesced"""
+        c = Server(contents=[
+            "import time",
+            "from endpoints import Controller",
+            "from endpoints.decorators import coalesce",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @coalesce(vary=['Accept-Language'])",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        time.sleep(0.2)",
+            "        return {",
+            "            'user': self.request.get_header('Authorization', ''),",
+            "            'lang': self.request.get_header('Accept-Language', ''),",
+            "        }",
+        ])
+        Foo = c.module.Foo
+
+        requests = [
+            ("/foo", {"Authorization": "Bearer A"}),
+            ("/foo", {"Authorization": "Bearer B"}),
+            ("/foo", {"Authorization": "Bearer C"}),
+            ("/foo", {"Cookie": "session=A"}),
+            ("/foo", {"Accept-Language": "en"}),
+            ("/foo", {"Authorization": "Bearer A"}),
+        ]
+        rets = self.handle_all(c, *requests)
+        self.assertEqual(5, Foo.calls)
+        for (path, headers), (code, _, body) in zip(requests, rets):
+            self.assertEqual(200, code)
+            body = json.loads(body)
+            self.assertEqual(headers.get("Authorization", ""), body["user"])
+            self.assertEqual(headers.get("Accept-Language", ""), body["lang"])
+
+    def test_httpcache(self):
+        """a waiting request gets a 304 only if its own validators match"""
+        c = Server(contents=[
+            "import time",
+            "from endpoints import Controller",
+            "from endpoints.decorators import coalesce, httpcache",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @coalesce()",
+            "    @httpcache(60, etag=lambda self: '1')",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        time.sleep(0.2)",
+            "        return {'foo': 1}",
+        ])
+        Foo = c.module.Foo
+
+        rets = self.handle_all(c, "/foo", ("/foo", {"If-None-Match": '"1"'}))
+        self.assertEqual(1, Foo.calls)
+        self.assertEqual(200, rets[0][0])
+        self.assertEqual({"foo": 1}, json.loads(rets[0][2]))
+        self.assertEqual(304, rets[1][0])
+        self.assertEqual(b"", rets[1][2])
+
+        # the leader's 304 isn't shared with a request that needs the body
+        rets = self.handle_all(c, ("/foo", {"If-None-Match": '"1"'}), "/foo")
+        self.assertEqual(304, rets[0][0])
+        self.assertEqual(200, rets[1][0])
+        self.assertEqual({"foo": 1}, json.loads(rets[1][2]))
+
+    def test_error(self):
+        c = Server(contents=[
+            "import time",
+            "from endpoints import Controller, CallError",
+            "from endpoints.decorators import coalesce",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @coalesce()",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        time.sleep(0.2)",
+            "        raise CallError(409)",
+        ])
+        Foo = c.module.Foo
+        rets = self.handle_all(c, "/foo", "/foo")
+        self.assertEqual(1, Foo.calls)
+        self.assertEqual([409, 409], [r[0] for r in rets])
+
+    def test_timeout(self):
+        c = Server(contents=[
+            "import time",
+            "from endpoints import Controller",
+            "from endpoints.decorators import coalesce",
+            "class Foo(Controller):",
+            "    calls = 0",
+            "    @coalesce(0.05)",
+            "    def GET(self):",
+            "        type(self).calls += 1",
+            "        time.sleep(0.2)",
+        ])
+        Foo = c.module.Foo
+        rets = self.handle_all(c, "/foo", "/foo")
+        self.assertEqual(2, Foo.calls)
+        self.assertEqual([204, 204], [r[0] for r in rets])
@@ -2,6 +2,7 @@
 from __future__ import unicode_literals, division, print_function, absolute_import
 import random
 import os
+import binascii
 
 import testdata
 from unittest import TestSuite
@@ -126,6 +127,58 @@ class WebTestCase(TestCase):
         self.assertEqual(200, r.code)
         self.assertTrue("post_file_with_param.txt" in r.body)
 
+    def test_post_file_stream(self):
+        """uploaded files should be file like objects"""
+        filepath = testdata.create_file("post_file_stream.txt", "1234567890" * 10000)
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def POST(self, *args, **kwargs):",
+            "        f = kwargs['file']",
+            "        return {",
+            "            'filename': f.filename,",
+            "            'size': f.size,",
+            "            'start': f.read(10).decode('utf-8'),",
+            "            'foo': kwargs['foo'],",
+            "        }",
+            "",
+        ])
+
+        c = self.create_client()
+        r = c.post_file('/', {"foo": "bar"}, {"file": filepath})
+        self.assertEqual(200, r.code)
+        self.assertEqual("post_file_stream.txt", r._body["filename"])
+        self.assertEqual(100000, r._body["size"])
+        self.assertEqual("1234567890", r._body["start"])
+        self.assertEqual("bar", r._body["foo"])
+
+    def test_post_chunked(self):
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def POST(self, *args, **kwargs):",
+            "        if kwargs:",
+            "            return kwargs",
+            "        return [line.decode('utf-8').strip() for line in self.request.body_stream]",
+            "",
+        ])
+
+        def body(lines):
+            for line in lines:
+                yield "{}\n".format(line).encode("utf-8")
+
+        c = self.create_client()
+        lines = ["foo,bar", "1,2", "3,4"]
+        r = c.post('/', body(lines), headers={"content-type": "text/csv"})
+        self.assertEqual(200, r.code)
+        self.assertEqual(lines, r._body)
+
+        # chunked bodies are still parsed
+        parts = (p for p in [b"foo=1", b"&bar=2"])
+        r = c.post('/', parts, headers={"content-type": "application/x-www-form-urlencoded"})
+        self.assertEqual(200, r.code)
+        self.assertEqual({"foo": "1", "bar": "2"}, r._body)
+
     def test_post_basic(self):
         server = self.create_server(contents=[
             "from endpoints import Controller",
@@ -167,6 +220,22 @@ class WebTestCase(TestCase):
         self.assertEqual(200, r.code)
         self.assertEqual('"bar"', r.body)
 
+    def test_post_bad_json(self):
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def POST(*args, **kwargs): return kwargs",
+            "",
+        ])
+
+        c = self.create_client()
+        r = c.post(
+            '/',
+            data='{"foo": "bar"',
+            headers={"content-type": "application/json"}
+        )
+        self.assertEqual(400, r.code)
+
     def test_405_request(self):
         server = self.create_server(contents=[
             "from endpoints import Controller",
@@ -212,6 +281,47 @@ class WebTestCase(TestCase):
         self.assertEqual(content, r.body)
         #self.assertTrue(r.body)
 
+    def test_file_range(self):
+        content = binascii.hexlify(os.urandom(100000))
+        filepath = testdata.create_file("range.bin")
+        with open(filepath, "wb") as fp:
+            fp.write(content)
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self, *args, **kwargs):",
+            "        return open('{}', 'rb')".format(filepath),
+            "",
+        ])
+
+        c = self.create_client()
+        r = c.get('/')
+        self.assertEqual(200, r.code)
+        self.assertEqual("bytes", r.headers["Accept-Ranges"])
+        self.assertEqual(content, r._body)
+        last_modified = r.headers["Last-Modified"]
+
+        r = c.get('/', headers={"Range": "bytes=100-"})
+        self.assertEqual(206, r.code)
+        self.assertEqual("bytes 100-199999/200000", r.headers["Content-Range"])
+        self.assertEqual(content[100:], r._body)
+
+        r = c.get('/', headers={"Range": "bytes=10-19"})
+        self.assertEqual(206, r.code)
+        self.assertEqual(content[10:20], r._body)
+
+        r = c.get('/', headers={"Range": "bytes=-5", "If-Range": last_modified})
+        self.assertEqual(206, r.code)
+        self.assertEqual(content[-5:], r._body)
+
+        r = c.get('/', headers={"Range": "bytes=10-19", "If-Range": '"stale"'})
+        self.assertEqual(200, r.code)
+        self.assertEqual(content, r._body)
+
+        r = c.get('/', headers={"Range": "bytes=300000-"})
+        self.assertEqual(416, r.code)
+        self.assertEqual("bytes */200000", r.headers["Content-Range"])
+
     def test_generators(self):
         server = self.create_server(contents=[
             "from endpoints import Controller",
@@ -227,6 +337,75 @@ class WebTestCase(TestCase):
         self.assertEqual(200, r.code)
         self.assertEqual(content, r._body)
 
+    def test_response_compression(self):
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self):",
+            "        return [{'x': x} for x in range(1000)]",
+            "",
+            "class Stream(Controller):",
+            "    def GET(self):",
+            "        for x in range(1000):",
+            "            yield {'x': x}",
+        ])
+
+        # compression is off by default
+        server.environ["ENDPOINTS_COMPRESSION_LEVEL"] = "6"
+        server.stop()
+        server.start()
+
+        c = self.create_client()
+        for path in ["/", "/stream"]:
+            r = c.get(path, headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(200, r.code)
+            self.assertEqual("gzip", r.headers["Content-Encoding"])
+            self.assertTrue("Accept-Encoding" in r.headers["Vary"])
+            self.assertEqual(list(range(1000)), [d["x"] for d in r._body])
+
+            r = c.get(path, headers={"Accept-Encoding": "identity"})
+            self.assertFalse("Content-Encoding" in r.headers)
+            self.assertEqual(list(range(1000)), [d["x"] for d in r._body])
+
+    def test_httpcache_etag(self):
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "from endpoints.decorators import httpcache",
+            "class Default(Controller):",
+            "    @httpcache(60, etag=True)",
+            "    def GET(self):",
+            "        return [{'x': x} for x in range(1000)]",
+        ])
+
+        c = self.create_client()
+        r = c.get('/')
+        self.assertEqual(200, r.code)
+        etag = r.headers["ETag"]
+
+        r = c.get('/', headers={"If-None-Match": etag})
+        self.assertEqual(304, r.code)
+        self.assertEqual("", r.body)
+
+    def test_generators_ndjson(self):
+        server = self.create_server(contents=[
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self):",
+            "        for x in range(10000):",
+            "            yield {'x': x}",
+        ])
+
+        c = self.create_client()
+        r = c.get('/', headers={"Accept": "application/x-ndjson"})
+        self.assertEqual(200, r.code)
+        self.assertTrue("ndjson" in r.headers["Content-Type"])
+        lines = r.body.splitlines()
+        self.assertEqual(10000, len(lines))
+        self.assertEqual('{"x":9999}', lines[-1].replace(" ", ""))
+
+        r = c.get('/')
+        self.assertEqual(list(range(10000)), [d["x"] for d in r._body])
+
     def test_request_body_kwargs_bad_content_type(self):
         self.skip_test("moved from http.RequestTest, make this work at some point")
         """make sure a form upload content type with json body fails correctly"""
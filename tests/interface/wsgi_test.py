@@ -1,8 +1,21 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, division, print_function, absolute_import
+import threading
+import time
+import importlib
 
+import testdata
+
+from endpoints.compat.environ import *
+from endpoints.http import Host
+from endpoints.interface.wsgi import Application, Server, WSGIHTTPPoolServer
 from endpoints.interface.wsgi.client import WebServer
-from . import WebTestCase, WebServerTestCase
+from . import TestCase, WebTestCase, WebServerTestCase
+
+if is_py2:
+    from httplib import HTTPConnection
+else:
+    from http.client import HTTPConnection
 
 
 class WebTest(WebTestCase):
@@ -16,3 +29,150 @@ class WebServerTest(WebServerTestCase):
 del WebTestCase
 del WebServerTestCase
 
+
+
+class PoolServerTest(TestCase):
+    def create_server(self, serve=True, **kwargs):
+        controller_prefix = testdata.create_module(contents=[
+            "import time",
+            "import threading",
+            "from endpoints import Controller",
+            "",
+            "started = threading.Event()",
+            "release = threading.Event()",
+            "",
+            "class Default(Controller):",
+            "    def GET(self, sleep=0, block=0):",
+            "        if block:",
+            "            started.set()",
+            "            release.wait(10)",
+            "        time.sleep(float(sleep))",
+            "        return self.request.queue_wait",
+        ])
+        kwargs.setdefault("pool_size", 1)
+        kwargs.setdefault("queue_size", 1)
+        s = Server(**kwargs)
+        s.application = Application(controller_prefixes=[controller_prefix])
+        self.module = importlib.import_module(controller_prefix)
+        self.addCleanup(self.module.release.set)
+        self.addCleanup(s.backend.server_close)
+        if serve:
+            t = threading.Thread(target=s.serve_forever)
+            t.daemon = True
+            t.start()
+            self.addCleanup(s.backend.shutdown)
+        return s
+
+    def request(self, s, path):
+        """make a GET request to the server
+
+        :returns: tuple, (code, headers, body)
+        """
+        conn = HTTPConnection(Host(s.hostloc).client(), timeout=10)
+        try:
+            conn.request("GET", path)
+            res = conn.getresponse()
+            return res.status, dict(res.getheaders()), res.read()
+
+        finally:
+            conn.close()
+
+    def wait_queued(self, s, count):
+        """wait until count connections are waiting in the server's queue"""
+        for _ in range(1000):
+            if s.backend.queue.qsize() == count:
+                return
+            time.sleep(0.01)
+        raise AssertionError("{} connections were never queued".format(count))
+
+    def start_request(self, s, path):
+        """make a GET request to the server in another thread
+
+        :returns: tuple, (thread, rets) where rets will hold the (code, headers,
+            body) of the response once thread is done
+        """
+        rets = []
+        t = threading.Thread(target=lambda: rets.append(self.request(s, path)))
+        t.start()
+        return t, rets
+
+    def test_pool(self):
+        s = self.create_server()
+        self.assertTrue(isinstance(s.backend, WSGIHTTPPoolServer))
+
+        code, headers, body = self.request(s, "/")
+        self.assertEqual(200, code)
+
+        # the first request keeps the only worker busy
+        t1, rets1 = self.start_request(s, "/?block=1")
+        self.assertTrue(self.module.started.wait(10))
+
+        # the second request waits in the queue
+        t2, rets2 = self.start_request(s, "/?block=1")
+        self.wait_queued(s, 1)
+
+        # the queue is full so the rest are rejected right away
+        for _ in range(2):
+            code, headers, body = self.request(s, "/")
+            self.assertEqual(503, code)
+            self.assertEqual("1", headers["Retry-After"])
+
+        self.module.release.set()
+        t1.join()
+        t2.join()
+        self.assertEqual(200, rets1[0][0])
+        self.assertEqual(200, rets2[0][0])
+
+        # the queued request waited for the first one to finish
+        self.assertLess(float(rets1[0][2]), float(rets2[0][2]))
+
+    def test_reject_request(self):
+        """a rejected client that keeps sending can't hold up the accept thread"""
+        class Connection(object):
+            """a connection that always has more of the request body to read"""
+            def __init__(self):
+                self.sent = b""
+                self.reads = 0
+                self.closed = False
+
+            def sendall(self, b):
+                self.sent += b
+
+            def recv(self, size):
+                self.reads += 1
+                return b"x" * size
+
+            def setblocking(self, flag): pass
+            def shutdown(self, how): pass
+            def close(self):
+                self.closed = True
+
+        s = self.create_server(serve=False)
+        conn = Connection()
+        s.backend.reject_request(conn, ("127.0.0.1", 12345))
+        self.assertTrue(conn.sent.startswith(b"HTTP/1.1 503"))
+        self.assertEqual(1, conn.reads)
+        self.assertTrue(conn.closed)
+
+    def test_serve_count(self):
+        for pool_size in [1, 0]:
+            s = self.create_server(serve=False, pool_size=pool_size)
+
+            # the server can keep serving after serve_count returns
+            for i in range(2):
+                rets = []
+                t = threading.Thread(target=lambda: rets.append(self.request(s, "/?sleep=0.2")))
+                t.start()
+                s.serve_count(1)
+                if pool_size:
+                    # the response was sent before serve_count returned
+                    self.assertEqual(0, s.backend.queue.unfinished_tasks)
+                t.join()
+                self.assertEqual(200, rets[0][0])
+
+    def test_no_pool(self):
+        s = self.create_server(pool_size=0)
+        self.assertFalse(isinstance(s.backend, WSGIHTTPPoolServer))
+        code, headers, body = self.request(s, "/")
+        self.assertEqual(200, code)
+        self.assertEqual(b"0.0", body)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, division, print_function, absolute_import
+from . import TestCase
+import os
+import time
+
+import testdata
+
+from endpoints.call import Router
+from endpoints.reflection import Reflect
+from endpoints.manifest import Manifest
+
+
+class ManifestTest(TestCase):
+    def create_manifest(self, controller_prefix):
+        path = os.path.join(testdata.create_dir(), "endpoints.manifest.json")
+        m = Manifest(path, [controller_prefix]).build()
+        m.save()
+        return m
+
+    def test_build(self):
+        controller_prefix = testdata.get_module_name()
+        testdata.create_modules({
+            controller_prefix: [
+                "from endpoints import Controller",
+                "from endpoints.decorators import param, version",
+                "class Default(Controller):",
+                "    @param('foo', type=int, choices=(1, 2), default=1)",
+                "    @version('v1')",
+                "    def GET_v1(self, bar, che=None, *args, **kwargs):",
+                "        '''method docblock'''",
+                "        pass",
+                "",
+            ],
+            "{}.foo".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Bar(Controller):",
+                "    def POST(self): pass",
+                "",
+            ],
+        })
+
+        m = self.create_manifest(controller_prefix)
+        m2 = Manifest.load(m.path)
+        self.assertTrue(m2.is_fresh())
+        self.assertEqual(
+            set([controller_prefix, "{}.foo".format(controller_prefix)]),
+            m2.get_module_names(controller_prefix)
+        )
+        self.assertIsNone(m2.get_module_names("nope"))
+
+        live = [(rc.uri, rc.get_info()) for rc in Reflect([controller_prefix])]
+        r = Reflect([controller_prefix])
+        r.manifest = m2
+        loaded = [(rc.uri, rc.get_info()) for rc in r]
+        self.assertEqual(len(live), len(loaded))
+
+        live = dict(live)
+        for uri, info in loaded:
+            for http_method, methods in info.items():
+                for method_name, method_info in methods.items():
+                    live_info = live[uri][http_method][method_name]
+                    for k in ["params", "positionals", "keywords", "method"]:
+                        self.assertEqual(live_info[k], method_info[k])
+
+                    for ld, md in zip(live_info["decorators"], method_info["decorators"]):
+                        self.assertEqual(ld.name, md.name)
+                        self.assertEqual(ld.args, md.args)
+                        self.assertEqual(ld.kwargs, md.kwargs)
+                        self.assertEqual(ld.decorator, md.decorator)
+
+        rc = [rc for rc in r if rc.uri == "/"][0]
+        rm = rc.methods["GET"][0]
+        self.assertEqual("method docblock", rm.desc)
+        self.assertEqual("v1", rm.version)
+        self.assertEqual((1, 2), rm.params["foo"]["options"]["choices"])
+        self.assertEqual(int, rm.params["foo"]["options"]["type"])
+
+    def test_fresh(self):
+        controller_prefix = testdata.get_module_name()
+        modpath = testdata.create_modules({
+            controller_prefix: [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(self): pass",
+                "",
+            ],
+            "{}.foo".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(self): pass",
+                "",
+            ],
+        })
+        m = self.create_manifest(controller_prefix)
+        self.assertTrue(m is Manifest.find(m.path))
+
+        # just changing the mtime doesn't make it stale
+        path = os.path.join(str(modpath), controller_prefix, "foo.py")
+        t = time.time() + 10
+        os.utime(path, (t, t))
+        self.assertTrue(Manifest.load(m.path).is_fresh())
+
+        # but changing the contents does
+        with open(path, "a") as fp:
+            fp.write("\n# changed\n")
+        self.assertFalse(Manifest.load(m.path).is_fresh())
+
+        m = self.create_manifest(controller_prefix)
+        self.assertTrue(Manifest.load(m.path).is_fresh())
+
+        # adding a new module also makes it stale
+        testdata.create_module("{}.bar".format(controller_prefix), [
+            "from endpoints import Controller",
+            "class Default(Controller):",
+            "    def GET(self): pass",
+            "",
+        ], tmpdir=str(modpath))
+        self.assertFalse(Manifest.load(m.path).is_fresh())
+
+        Manifest._cache.pop(m.path)
+        self.assertIsNone(Manifest.find(m.path))
+
+    def test_router(self):
+        controller_prefix = testdata.get_module_name()
+        testdata.create_modules({
+            controller_prefix: [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(self): pass",
+                "",
+            ],
+            "{}.foo".format(controller_prefix): [
+                "from endpoints import Controller",
+                "class Default(Controller):",
+                "    def GET(self): pass",
+                "",
+            ],
+        })
+        m = self.create_manifest(controller_prefix)
+
+        # the manifest's module list is used instead of scanning the prefix
+        m.data["prefixes"][controller_prefix].remove("{}.foo".format(controller_prefix))
+        r = Router([controller_prefix])
+        r.manifest = m
+        self.assertEqual(set([controller_prefix]), r.module_names)
@@ -14,6 +14,7 @@ from endpoints.reflection import (
     ReflectPath,
     ReflectHTTPMethod,
     ReflectClass,
+    ReflectSource,
 )
 
 
@@ -785,3 +786,46 @@ class ReflectPathTest(TestCase):
         self.assertEqual("{}.foo".format(prefix), ms[0].module_name)
 
 
+
+
+class ReflectSourceTest(TestCase):
+    def test_find_class(self):
+        m = testdata.create_module(contents=[
+            "import endpoints",
+            "from endpoints.decorators import param",
+            "",
+            "class Foo(endpoints.Controller):",
+            "    @param('bar', che=1)",
+            "    def GET(self, bar, che=None, *args):",
+            "        '''get docblock'''",
+            "        pass",
+            "",
+            "def func():",
+            "    class Foo(object):",
+            "        def POST(self, **kwargs):",
+            "            super(Foo, self).POST(**kwargs)",
+            "    return Foo",
+            "",
+        ])
+        module = m.module
+
+        info = ReflectSource.find_class(module.Foo)
+        self.assertEqual("get docblock", info["methods"]["GET"]["desc"])
+        self.assertEqual(
+            [{"name": "param", "args": ["bar"], "kwargs": {"che": 1}}],
+            info["methods"]["GET"]["decorators"]
+        )
+        self.assertTrue(info["methods"]["GET"]["positionals"])
+        self.assertFalse(info["methods"]["GET"]["keywords"])
+        self.assertEqual(["bar", "che"], [p["name"] for p in info["methods"]["GET"]["params"]])
+
+        info = ReflectSource.find_class(module.func())
+        self.assertTrue(info["methods"]["POST"]["super"])
+        self.assertTrue(info["methods"]["POST"]["keywords"])
+
+        # the source is only parsed once until it changes
+        rs = ReflectSource.get_instance(module.__file__)
+        self.assertTrue(rs is ReflectSource.get_instance(module.__file__))
+        mtime = rs.mtime + 10
+        os.utime(module.__file__, (mtime, mtime))
+        self.assertFalse(rs is ReflectSource.get_instance(module.__file__))
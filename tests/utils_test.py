@@ -5,7 +5,7 @@ import json
 
 import testdata
 
-from endpoints.utils import MimeType, AcceptHeader, String, ByteString, Base64, JSONEncoder
+from endpoints.utils import MimeType, AcceptHeader, String, ByteString, Base64, JSONEncoder, JSONCodec, OrjsonCodec, UjsonCodec
 from endpoints.compat.environ import *
 
 
@@ -187,6 +187,65 @@ class AcceptHeaderTest(TestCase):
 
             self.assertEqual(t[2], count)
 
+    def test_parse(self):
+        header = "application/json;version=v1, */*;q=0.5"
+        a = AcceptHeader.parse(header)
+        self.assertTrue(a is AcceptHeader.parse(header))
+        self.assertEqual(2, len(list(a.filter("application/json"))))
+        self.assertEqual(1, len(list(a.filter("application/json", version="v1"))))
+        self.assertEqual(2, len(list(a.filter("application/json"))))
+
+        long_header = "application/json;version={}".format("v" * AcceptHeader.cache_max_header_size)
+        self.assertFalse(AcceptHeader.parse(long_header) is AcceptHeader.parse(long_header))
+
+        class LRUAcceptHeader(AcceptHeader):
+            cache_size = 2
+
+        a1 = LRUAcceptHeader.parse("text/html")
+        a2 = LRUAcceptHeader.parse("text/plain")
+        self.assertTrue(a1 is LRUAcceptHeader.parse("text/html"))
+        LRUAcceptHeader.parse("text/css")
+        self.assertTrue(a1 is LRUAcceptHeader.parse("text/html"))
+        self.assertFalse(a2 is LRUAcceptHeader.parse("text/plain"))
+
+
+class JSONCodecTest(TestCase):
+    def test_codecs(self):
+        codecs = [c for c in [JSONCodec, OrjsonCodec, UjsonCodec] if c.is_available()]
+        for codec in codecs:
+            d = codec.loads(codec.dumps({
+                "generator": (x for x in range(3)),
+                "error": ValueError("boom"),
+                "bytes": b"bar",
+                "unicode": "\u00fcber/che",
+                1: "int key",
+            }))
+            self.assertEqual([0, 1, 2], d["generator"])
+            self.assertEqual({"errmsg": "boom"}, d["error"])
+            self.assertEqual("bar", d["bytes"])
+            self.assertEqual("\u00fcber/che", d["unicode"])
+            self.assertEqual("int key", d["1"])
+
+            b = codec.dumpb({"foo": "\u00fc"}, "latin-1")
+            self.assertEqual({"foo": "\u00fc"}, json.loads(b.decode("latin-1")))
+
+            with self.assertRaises(TypeError):
+                codec.dumps({"foo": object()})
+
+            with self.assertRaises(ValueError):
+                codec.loads("{foo")
+
+    def test_find(self):
+        self.assertEqual(JSONCodec, JSONCodec.find("json"))
+        self.assertEqual(JSONCodec, JSONCodec.find())
+        self.assertEqual(JSONCodec, JSONCodec.find("bogus"))
+
+        for codec in [OrjsonCodec, UjsonCodec]:
+            if codec.is_available():
+                self.assertEqual(codec, JSONCodec.find(codec.name))
+            else:
+                self.assertEqual(JSONCodec, JSONCodec.find(codec.name))
+
 
 class JSONEncoderTest(TestCase):
     def test_string(self):